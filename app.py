@@ -1,11 +1,20 @@
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from config import Config
+from models.async_database import AsyncDatabase
 from models.database import Database
+from models.events import ChangeBus
+from models.fleet import FleetPositions
+from models.group_commit import GroupCommitQueue
+from models.contraction import load_hierarchy
+from models.road_graph import DriveTimeRanker, extract_source, load_graph
 from routes.ambulance import ambulance_router, set_db as set_ambulance_db
 from routes.hospital import hospital_router, set_db as set_hospital_db
 from routes.hospitals_list import hospitals_router, set_db as set_hospitals_db
+from routes.fleet import fleet_router, set_db as set_fleet_db
 
 
 app = FastAPI(
@@ -43,13 +52,101 @@ def startup_event():
 
     print("[OK] Database connection successful")
 
+    # restore persisted soft holds before ranking anything
+    db.load_holds()
+
+    print("Loading hospital catalog...")
+    hospital_count = db.load_catalog()
+    print(f"[OK] Hospital catalog ready ({hospital_count} hospitals)")
+
+    # seed the dashboard counters from the table
+    db.reconcile_stats()
+
+    if config.ROAD_GRAPH_PATH:
+        print("Loading road graph...")
+        graph = load_graph(config.ROAD_GRAPH_PATH, config.ROAD_GRAPH_SNAPSHOT or None)
+        hierarchy_path = config.ROAD_HIERARCHY_PATH or config.ROAD_GRAPH_PATH + '.ch'
+        hierarchy = load_hierarchy(hierarchy_path, extract_source(config.ROAD_GRAPH_PATH))
+        db.router = DriveTimeRanker(graph, hierarchy)
+        print(f"[OK] Road graph ready ({len(graph)} nodes, {graph.edge_count} edges)")
+        if hierarchy is None:
+            print(f"[WARN] No up-to-date contraction hierarchy at {hierarchy_path}; "
+                  "run build_routing.py for fast drive times")
+
+    # in-process change bus feeding the push endpoints
+    db.events = ChangeBus()
+
+    # live ambulance positions for dispatches that send an ambulance_id
+    db.fleet = FleetPositions(config.FLEET_HISTORY_SIZE)
+    db.load_ambulance_positions()
+
+    if config.GROUP_COMMIT_ENABLED:
+        db.group_commit = GroupCommitQueue(
+            db.write_emergency_requests,
+            config.GROUP_COMMIT_WINDOW_MS / 1000,
+            config.GROUP_COMMIT_MAX_BATCH
+        )
+
     # store db
     app.state.db = db
+    app.state.async_db = AsyncDatabase(db)
+
+    # pass db to routes (handlers await it, queries run off the event loop)
+    set_ambulance_db(app.state.async_db)
+    set_hospital_db(app.state.async_db)
+    set_hospitals_db(app.state.async_db)
+    set_fleet_db(app.state.async_db)
+
+
+async def probe_catalog(async_db, interval):
+    """Reload the hospital catalog when the table changes outside the API"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if await async_db.refresh_catalog():
+                print("[OK] Hospital catalog reloaded after external change")
+        except Exception as e:
+            print(f"Error refreshing hospital catalog: {e}")
+
+
+async def reconcile_stats(async_db, interval):
+    """Re-count requests per status and hospital to correct counter drift"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await async_db.reconcile_stats()
+        except Exception as e:
+            print(f"Error reconciling request stats: {e}")
+
+
+async def save_fleet_positions(async_db, interval):
+    """Write moved ambulances' latest positions in one batch per interval"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await async_db.save_ambulance_positions()
+        except Exception as e:
+            print(f"Error saving ambulance positions: {e}")
 
-    # pass db to routes
-    set_ambulance_db(db)
-    set_hospital_db(db)
-    set_hospitals_db(db)
+
+@app.on_event("startup")
+async def start_background_tasks():
+    config = app.state.db.config
+    app.state.catalog_probe = None
+    app.state.stats_reconcile = None
+    app.state.fleet_writer = None
+    if config.CATALOG_PROBE_INTERVAL > 0:
+        app.state.catalog_probe = asyncio.create_task(
+            probe_catalog(app.state.async_db, config.CATALOG_PROBE_INTERVAL)
+        )
+    if config.STATS_RECONCILE_INTERVAL > 0:
+        app.state.stats_reconcile = asyncio.create_task(
+            reconcile_stats(app.state.async_db, config.STATS_RECONCILE_INTERVAL)
+        )
+    if config.FLEET_FLUSH_INTERVAL > 0:
+        app.state.fleet_writer = asyncio.create_task(
+            save_fleet_positions(app.state.async_db, config.FLEET_FLUSH_INTERVAL)
+        )
 
 
 # -------------------------
@@ -57,9 +154,17 @@ def startup_event():
 # -------------------------
 @app.on_event("shutdown")
 def shutdown_event():
+    for task in (app.state.catalog_probe, app.state.stats_reconcile, app.state.fleet_writer):
+        if task:
+            task.cancel()
+
     db = app.state.db
     if db:
         print("Closing database connection...")
+        db.save_ambulance_positions()
+        if db.group_commit:
+            db.group_commit.close()
+        app.state.async_db.close()
         db.disconnect()
         print("Database disconnected")
 
@@ -81,6 +186,7 @@ def health_check():
 app.include_router(ambulance_router, prefix="/api/ambulance", tags=["Ambulance"])
 app.include_router(hospital_router, prefix="/api/hospital", tags=["Hospital"])
 app.include_router(hospitals_router, prefix="/api/hospitals", tags=["Hospitals"])
+app.include_router(fleet_router, prefix="/api/fleet", tags=["Fleet"])
 
 
 if __name__ == "__main__":
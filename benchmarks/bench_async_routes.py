@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Event-loop blocking benchmark - requests/second under 200 concurrent clients
+with database calls made inline on the event loop (the old behaviour) versus
+offloaded through AsyncDatabase.
+
+No MySQL server is needed: a stand-in Database sleeps for DB_LATENCY_MS per
+query to model the network round-trip. Requests are driven in-process
+through httpx's ASGI transport.
+
+Run from the project root:  python -m benchmarks.bench_async_routes
+"""
+
+import asyncio
+import time
+from datetime import datetime
+
+import httpx
+from fastapi import FastAPI
+
+from config import Config
+from models.async_database import AsyncDatabase
+from models.database import Database
+from routes.ambulance import ambulance_router, set_db as set_ambulance_db
+from routes.hospital import hospital_router, set_db as set_hospital_db
+
+CLIENTS = 200
+REQUESTS_PER_CLIENT = 10
+DB_LATENCY_MS = 5
+PENDING_REQUESTS = 120
+
+
+class SlowDatabase(Database):
+    """Database stand-in whose queries just sleep for DB_LATENCY_MS"""
+
+    REQUEST = {
+        'id': 1, 'patient_type': 'Serious', 'emergency_type': 'Accident',
+        'need_bed': True, 'need_icu': True, 'need_oxygen': False, 'need_ventilator': False,
+        'hospital_id': 1, 'hospital_name': 'Apollo Hospital Coimbatore',
+        'status': 'Pending', 'created_at': datetime(2024, 1, 1, 12, 0, 0),
+    }
+
+    def _query(self, result):
+        time.sleep(DB_LATENCY_MS / 1000)
+        return result
+
+    def get_request_status(self, request_id):
+        return self._query(dict(self.REQUEST, id=request_id))
+
+    def get_pending_requests(self, hospital_id=None, limit=None, after=None):
+        # Newest first, ids counting down, so a limit leaves a next page
+        rows = [dict(self.REQUEST, id=i) for i in range(PENDING_REQUESTS, 0, -1)]
+        if after is not None:
+            rows = [row for row in rows if row['id'] < after[1]]
+        return self._query(rows[:limit] if limit is not None else rows)
+
+
+class BlockingAsyncDatabase(AsyncDatabase):
+    """Calls the database directly on the event loop, as the handlers used to"""
+
+    async def _run(self, fn, *args):
+        return fn(*args)
+
+
+def build_app(async_db):
+    app = FastAPI()
+    app.include_router(ambulance_router, prefix="/api/ambulance")
+    app.include_router(hospital_router, prefix="/api/hospital")
+    set_ambulance_db(async_db)
+    set_hospital_db(async_db)
+    return app
+
+
+async def client_loop(client, client_id):
+    for i in range(REQUESTS_PER_CLIENT):
+        if (client_id + i) % 2:
+            response = await client.post("/api/ambulance/check-status", json={"request_id": client_id})
+        else:
+            response = await client.get("/api/hospital/pending-requests")
+        response.raise_for_status()
+
+
+async def measure(async_db):
+    app = build_app(async_db)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(client, c) for c in range(CLIENTS)))
+        elapsed = time.perf_counter() - start
+    return {"rps": CLIENTS * REQUESTS_PER_CLIENT / elapsed, "elapsed_s": elapsed}
+
+
+def run():
+    config = Config()
+    print(f"{CLIENTS} clients x {REQUESTS_PER_CLIENT} requests, {DB_LATENCY_MS}ms per query, "
+          f"pool size {config.MYSQL_POOL_SIZE}\n")
+
+    results = {}
+    for label, adapter in (("blocking (before)", BlockingAsyncDatabase), ("offloaded (after)", AsyncDatabase)):
+        async_db = adapter(SlowDatabase(config))
+        try:
+            results[label] = asyncio.run(measure(async_db))
+        finally:
+            async_db.close()
+        r = results[label]
+        print(f"{label:<20} {r['rps']:>8.0f} req/s   {r['elapsed_s']:>6.2f}s total")
+
+    before, after = results["blocking (before)"], results["offloaded (after)"]
+    print(f"\nThroughput gain: {after['rps'] / before['rps']:.1f}x")
+
+
+if __name__ == "__main__":
+    run()
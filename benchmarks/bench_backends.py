@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Storage backend benchmark - the same dispatch workload on each backend.
+
+Every backend gets a fresh database with a synthetic catalog of HOSPITALS
+hospitals, then THREADS workers each replay DISPATCHES synthetic requests as
+find -> create -> accept cycles through the real Database class. The SQLite
+and in-memory backends need no server, so these numbers are comparable from
+one Linux machine to the next; pass `mysql` to include the server from
+config (its tables must exist).
+
+Run from the project root:  python -m benchmarks.bench_backends [sqlite memory mysql]
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.synthetic import generate_hospitals, generate_requests, load_hospitals
+from config import Config
+from models.backends import MySQLBackend, MemoryBackend, SQLiteBackend
+from models.database import Database
+
+HOSPITALS = 500
+THREADS = 8
+DISPATCHES = 250
+
+
+def make_backend(name, directory):
+    if name == 'sqlite':
+        return SQLiteBackend(os.path.join(directory, 'bench.db'))
+    if name == 'memory':
+        return MemoryBackend()
+    return MySQLBackend(Config)
+
+
+def worker(db, requests, latencies, failures):
+    for request in requests:
+        start = time.perf_counter()
+        needs = request['needs']
+        hospitals = db.find_nearest_hospitals(request['latitude'], request['longitude'], needs, 5)
+        request_id = db.create_emergency_request(
+            request['patient_type'], request['emergency_type'], needs, hospitals[0]['id'], hospitals
+        ) if hospitals else None
+        if request_id is None or not db.update_request_status(request_id, 'Accepted'):
+            failures.append(1)
+        latencies.append(time.perf_counter() - start)
+
+
+def measure(name, directory, hospitals, requests):
+    db = Database(Config, backend=make_backend(name, directory))
+    if not db.connect():
+        return None
+    try:
+        load_hospitals(db, hospitals)
+        db.load_catalog()
+        latencies, failures = [], []
+        threads = [
+            threading.Thread(target=worker, args=(db, requests[i::THREADS], latencies, failures))
+            for i in range(THREADS)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        db.disconnect()
+    latencies.sort()
+    return len(latencies) / elapsed, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)], len(failures)
+
+
+def run(names):
+    hospitals = generate_hospitals(HOSPITALS)
+    requests = generate_requests(hospitals, THREADS * DISPATCHES)[:THREADS * DISPATCHES]
+    print(f"{HOSPITALS} hospitals, {THREADS} threads x {DISPATCHES} find/create/accept cycles\n")
+    print(f"{'backend':>8} {'throughput':>12} {'p50':>9} {'p99':>9} {'failed':>7}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name in names:
+            result = measure(name, directory, hospitals, requests)
+            if result is None:
+                print(f"{name:>8}   unavailable")
+                continue
+            rate, p50, p99, failed = result
+            print(f"{name:>8} {rate:>9.0f} /s {p50 * 1000:>6.2f} ms {p99 * 1000:>6.2f} ms {failed:>7}")
+
+
+if __name__ == "__main__":
+    run(sys.argv[1:] or ['sqlite', 'memory'])
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+GPS ingestion benchmark - pings/second through the fleet endpoints.
+
+Simulates VEHICLES ambulances reporting at 1 Hz along synthetic
+trajectories: each round sends one ping per vehicle, either as a bulk JSON
+array or as an NDJSON stream, through the real routes (httpx ASGI
+transport, no network). The batched database
+write is timed separately against a stand-in that only counts rows.
+
+Run from the project root:  python -m benchmarks.bench_fleet_ingest
+"""
+
+import asyncio
+import json
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from benchmarks.synthetic import generate_trajectories
+from config import Config
+from models.async_database import AsyncDatabase
+from models.database import Database
+from models.fleet import FleetPositions
+from routes.fleet import fleet_router, set_db
+
+VEHICLES = 500
+ROUNDS = 40
+BATCH_SIZE = 500
+ORIGIN = (11.0168, 76.9558)
+
+
+class CountingDatabase(Database):
+    """Database stand-in whose position writes only count the rows"""
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.rows_written = 0
+
+    def save_ambulance_positions(self):
+        rows = self.fleet.drain_dirty()
+        self.rows_written += len(rows)
+        return len(rows)
+
+
+def make_rounds():
+    """ROUNDS lists of one ping per vehicle, one second apart"""
+    return generate_trajectories(VEHICLES, ROUNDS, seed=3, centre=ORIGIN)
+
+
+async def send_bulk(client, rounds):
+    for pings in rounds:
+        for start in range(0, len(pings), BATCH_SIZE):
+            response = await client.post("/api/fleet/positions", json=pings[start:start + BATCH_SIZE])
+            response.raise_for_status()
+
+
+async def send_ndjson(client, rounds):
+    body = "".join(json.dumps(ping) + "\n" for pings in rounds for ping in pings).encode()
+    response = await client.post(
+        "/api/fleet/positions/stream",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    response.raise_for_status()
+
+
+async def measure(sender, rounds):
+    db = CountingDatabase(Config())
+    db.fleet = FleetPositions()
+    async_db = AsyncDatabase(db)
+    set_db(async_db)
+    app = FastAPI()
+    app.include_router(fleet_router, prefix="/api/fleet")
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            start = time.perf_counter()
+            await sender(client, rounds)
+            elapsed = time.perf_counter() - start
+    finally:
+        async_db.close()
+
+    written = db.save_ambulance_positions()
+    return VEHICLES * ROUNDS / elapsed, written
+
+
+def run():
+    rounds = make_rounds()
+    total = VEHICLES * ROUNDS
+    print(f"{VEHICLES} vehicles x {ROUNDS} pings ({total} pings), bulk batches of {BATCH_SIZE}\n")
+
+    for label, sender in (("bulk JSON", send_bulk), ("NDJSON stream", send_ndjson)):
+        rate, written = asyncio.run(measure(sender, rounds))
+        print(f"{label:<15} {rate:>10.0f} pings/s   {written} rows in one coalesced write")
+
+    fleet = FleetPositions()
+    pings = [
+        (p['ambulance_id'], p['latitude'], p['longitude'], p['recorded_at'])
+        for pings in rounds for p in pings
+    ]
+    start = time.perf_counter()
+    fleet.ingest(pings)
+    elapsed = time.perf_counter() - start
+    print(f"{'store only':<15} {total / elapsed:>10.0f} pings/s   (FleetPositions.ingest)")
+
+
+if __name__ == "__main__":
+    run()
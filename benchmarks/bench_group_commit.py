@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Group commit benchmark - dispatch inserts per second vs concurrency.
+
+Each transaction commit is simulated as an FSYNC_MS log flush that only one
+transaction can perform at a time (a single redo log), with no other cost.
+Concurrent create_emergency_request calls go through AsyncDatabase, with
+one commit per request and then through the group commit queue.
+
+Run from the project root:  python -m benchmarks.bench_group_commit
+"""
+
+import asyncio
+import itertools
+import threading
+import time
+
+from config import Config
+from models.async_database import AsyncDatabase
+from models.database import Database
+from models.group_commit import GroupCommitQueue
+
+FSYNC_MS = 2.0
+REQUESTS = 400
+CONCURRENCY = (1, 8, 32, 128)
+
+
+class SimulatedLogDatabase(Database):
+    """Database stand-in whose writes cost one serialized log flush per commit"""
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.commits = 0
+        self._ids = itertools.count(1)
+        self._log = threading.Lock()
+
+    def write_emergency_requests(self, requests, release_holds=True):
+        with self._log:
+            time.sleep(FSYNC_MS / 1000)
+            self.commits += 1
+            return [next(self._ids) for _ in requests]
+
+
+async def dispatch_all(async_db, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            return await async_db.create_emergency_request('Normal', 'Accident', {}, 1)
+
+    return await asyncio.gather(*(one(i) for i in range(REQUESTS)))
+
+
+def measure(concurrency, group_commit):
+    config = Config()
+    db = SimulatedLogDatabase(config)
+    if group_commit:
+        db.group_commit = GroupCommitQueue(
+            db.write_emergency_requests,
+            config.GROUP_COMMIT_WINDOW_MS / 1000,
+            config.GROUP_COMMIT_MAX_BATCH
+        )
+    async_db = AsyncDatabase(db)
+    try:
+        start = time.perf_counter()
+        ids = asyncio.run(dispatch_all(async_db, concurrency))
+        elapsed = time.perf_counter() - start
+    finally:
+        async_db.close()
+        if db.group_commit:
+            db.group_commit.close()
+    assert len(set(ids)) == REQUESTS
+    return REQUESTS / elapsed, db.commits
+
+
+def run():
+    print(f"{REQUESTS} dispatches, {FSYNC_MS}ms serialized commit\n")
+    print(f"{'concurrency':>11} {'per-request':>14} {'commits':>8} {'group commit':>14} {'commits':>8}")
+    for concurrency in CONCURRENCY:
+        single, single_commits = measure(concurrency, False)
+        grouped, grouped_commits = measure(concurrency, True)
+        print(f"{concurrency:>11} {single:>10.0f} /s {single_commits:>8} {grouped:>10.0f} /s {grouped_commits:>8}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Haversine microbenchmark - scalar Database.calculate_distance vs the
+vectorized models.haversine kernel at 1k, 10k and 100k hospitals.
+
+Run from the project root:  python -m benchmarks.bench_haversine
+"""
+
+import random
+import time
+from decimal import Decimal
+
+import numpy as np
+
+from config import Config
+from models.database import Database
+from models.haversine import coordinate_arrays, haversine_distances, nearest_index, top_k
+
+SIZES = [1_000, 10_000, 100_000]
+REPEATS = 5
+ORIGIN = (11.0168, 76.9558)
+
+
+def make_hospitals(count, seed=42):
+    """Hospital rows shaped like mysql.connector output (DECIMAL coordinates)"""
+    rng = random.Random(seed)
+    return [
+        {
+            'id': i + 1,
+            'latitude': Decimal(f"{rng.uniform(8.0, 13.5):.8f}"),
+            'longitude': Decimal(f"{rng.uniform(76.0, 80.3):.8f}"),
+        }
+        for i in range(count)
+    ]
+
+
+def best_of(fn):
+    """Best wall-clock time of REPEATS runs, in milliseconds"""
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return min(timings)
+
+
+def scalar_nearest(db, hospitals):
+    """The original per-row loop from find_nearest_hospital"""
+    nearest, min_distance = None, float('inf')
+    for hospital in hospitals:
+        distance = db.calculate_distance(
+            ORIGIN[0], ORIGIN[1],
+            float(hospital['latitude']), float(hospital['longitude'])
+        )
+        if distance < min_distance:
+            min_distance, nearest = distance, hospital
+    return nearest
+
+
+def run():
+    db = Database(Config())
+
+    print(f"{'hospitals':>10} {'scalar ms':>10} {'vector ms':>10} {'+arrays ms':>11} {'top-10 ms':>10} {'speedup':>8}")
+    for size in SIZES:
+        hospitals = make_hospitals(size)
+        lat_rad, lon_rad = coordinate_arrays(hospitals)
+
+        # Sanity check: both paths agree on the winner
+        distances = haversine_distances(ORIGIN[0], ORIGIN[1], lat_rad, lon_rad)
+        assert hospitals[nearest_index(distances)] is scalar_nearest(db, hospitals)
+        reference = [db.calculate_distance(ORIGIN[0], ORIGIN[1], float(h['latitude']), float(h['longitude']))
+                     for h in hospitals[:100]]
+        assert np.allclose(distances[:100], reference, rtol=0, atol=1e-9)
+
+        scalar_ms = best_of(lambda: scalar_nearest(db, hospitals))
+        vector_ms = best_of(lambda: nearest_index(haversine_distances(ORIGIN[0], ORIGIN[1], lat_rad, lon_rad)))
+        arrays_ms = best_of(lambda: nearest_index(haversine_distances(ORIGIN[0], ORIGIN[1], *coordinate_arrays(hospitals))))
+        topk_ms = best_of(lambda: top_k(haversine_distances(ORIGIN[0], ORIGIN[1], lat_rad, lon_rad), 10))
+
+        print(f"{size:>10} {scalar_ms:>10.2f} {vector_ms:>10.3f} {arrays_ms:>11.2f} {topk_ms:>10.3f} {scalar_ms / vector_ms:>7.0f}x")
+
+    print("\n'+arrays' includes building the radian arrays from DECIMAL rows (the SQL fallback path).")
+
+
+if __name__ == "__main__":
+    run()
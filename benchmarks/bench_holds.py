@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Mass-casualty burst simulation - rejections and re-routes with and without
+soft capacity holds at dispatch time.
+
+A burst of patients is dispatched around one incident faster than hospitals
+answer. Hospitals accept while they have the capacity a patient needs and
+reject otherwise, which sends the request to its next ranked candidate (as
+reroute_request does). Ranking uses the real HospitalIndex and HoldLedger on
+a simulated clock; no MySQL server is needed.
+
+Run from the project root:  python -m benchmarks.bench_holds
+"""
+
+import heapq
+import random
+
+from config import Config
+from models.database import Database
+from models.dispatch import need_columns
+from models.holds import HoldLedger
+from models.spatial_index import HospitalIndex, hospital_matches
+
+HOSPITALS = 40
+PATIENTS = 120
+BURST_SECONDS = 30
+ANSWER_SECONDS = 45
+HOLD_TTL_SECONDS = 120
+CANDIDATES = 5
+INCIDENT = (11.0168, 76.9558)
+
+
+def make_hospitals(rng):
+    """Small hospitals scattered within ~15 km of the incident"""
+    return [
+        {
+            'id': i + 1,
+            'name': f"Hospital {i + 1}",
+            'latitude': INCIDENT[0] + rng.uniform(-0.15, 0.15),
+            'longitude': INCIDENT[1] + rng.uniform(-0.15, 0.15),
+            'available_beds': rng.randint(1, 6),
+            'available_icu': rng.randint(0, 2),
+            'available_oxygen': rng.randint(0, 3),
+            'available_ventilator': rng.randint(0, 1),
+        }
+        for i in range(HOSPITALS)
+    ]
+
+
+def make_patients(rng):
+    """(dispatch time, needs, location) for each patient of the burst"""
+    patients = []
+    for _ in range(PATIENTS):
+        serious = rng.random() < 0.4
+        needs = {
+            'icu': serious and rng.random() < 0.5,
+            'oxygen': rng.random() < 0.4,
+            'ventilator': serious and rng.random() < 0.2,
+        }
+        location = (
+            INCIDENT[0] + rng.uniform(-0.01, 0.01),
+            INCIDENT[1] + rng.uniform(-0.01, 0.01),
+        )
+        patients.append((rng.uniform(0, BURST_SECONDS), needs, location))
+    patients.sort(key=lambda p: p[0])
+    return patients
+
+
+def simulate(use_holds, seed=7):
+    """Run one burst; returns counters for the summary table"""
+    rng = random.Random(seed)
+    hospitals = make_hospitals(rng)
+    patients = make_patients(rng)
+
+    now = [0.0]
+    index = HospitalIndex(hospitals, Database(Config()).calculate_distance)
+    ledger = HoldLedger(HOLD_TTL_SECONDS, clock=lambda: now[0]) if use_holds else None
+
+    def sync(hospital_ids):
+        for hospital_id in set(hospital_ids):
+            index.set_held(hospital_id, ledger.held(hospital_id))
+
+    # (time, sequence, kind, payload); answers are processed in time order
+    events = [(t, n, 'dispatch', n) for n, (t, _, _) in enumerate(patients)]
+    heapq.heapify(events)
+    sequence = len(events)
+    requests = {}
+    counts = {'accepted': 0, 'rejections': 0, 'reroutes': 0, 'unplaced': 0}
+
+    while events:
+        now[0], _, kind, request_id = heapq.heappop(events)
+        if ledger is not None:
+            sync(ledger.expire())
+
+        if kind == 'dispatch':
+            _, needs, (lat, lon) = patients[request_id]
+            candidates = index.nearest_k(lat, lon, needs, CANDIDATES)
+            if not candidates:
+                counts['unplaced'] += 1
+                continue
+            requests[request_id] = {'needs': needs, 'candidates': candidates, 'rank': 0}
+            if ledger is not None:
+                columns = need_columns(needs)
+                ledger.place(candidates[0]['id'], columns, request_id=request_id)
+                sync([candidates[0]['id']])
+            sequence += 1
+            heapq.heappush(events, (now[0] + ANSWER_SECONDS, sequence, 'answer', request_id))
+            continue
+
+        request = requests[request_id]
+        needs = request['needs']
+        hospital = index.get(request['candidates'][request['rank']]['id'])
+        columns = need_columns(needs)
+
+        if hospital_matches(hospital, needs):
+            for column in columns:
+                hospital[column] -= 1
+            index.update_availability(hospital['id'])
+            if ledger is not None:
+                sync(ledger.release_request(request_id))
+            counts['accepted'] += 1
+            continue
+
+        # Rejected: move on to the next candidate that still looks available
+        counts['rejections'] += 1
+        request['rank'] += 1
+        while request['rank'] < len(request['candidates']):
+            candidate = index.get(request['candidates'][request['rank']]['id'])
+            held = ledger.held(candidate['id']) if ledger is not None else None
+            if hospital_matches(candidate, needs, held):
+                break
+            request['rank'] += 1
+
+        if request['rank'] >= len(request['candidates']):
+            counts['unplaced'] += 1
+            if ledger is not None:
+                sync(ledger.release_request(request_id))
+            continue
+
+        counts['reroutes'] += 1
+        if ledger is not None:
+            sync(ledger.move_request(request_id, request['candidates'][request['rank']]['id']))
+        sequence += 1
+        heapq.heappush(events, (now[0] + ANSWER_SECONDS, sequence, 'answer', request_id))
+
+    return counts
+
+
+def main():
+    print(f"{PATIENTS} patients over {BURST_SECONDS}s, {HOSPITALS} hospitals, "
+          f"{ANSWER_SECONDS}s to answer, {CANDIDATES} candidates per request")
+    print(f"{'mode':>12} {'accepted':>10} {'rejections':>12} {'re-routes':>10} {'unplaced':>10}")
+    for label, use_holds in (('no holds', False), ('soft holds', True)):
+        counts = simulate(use_holds)
+        print(f"{label:>12} {counts['accepted']:>10} {counts['rejections']:>12} "
+              f"{counts['reroutes']:>10} {counts['unplaced']:>10}")
+
+
+if __name__ == "__main__":
+    main()
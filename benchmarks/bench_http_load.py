@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+HTTP load generator - latency percentiles, throughput and error rates for the
+dispatch API under a configurable request mix.
+
+`concurrency` asyncio workers each loop: pick an operation from the mix,
+send it, record the latency and status. Operations:
+
+  find     POST /api/ambulance/find-hospital for the next synthetic request
+  status   POST /api/ambulance/check-status for a request created earlier
+  pending  GET  /api/hospital/pending-requests for a hospital seen earlier
+  accept   POST /api/hospital/accept-request for a request not yet accepted
+
+status/pending/accept fall back to find until there is something to ask
+about. Find requests replay a stream from benchmarks.synthetic over the
+catalog given by --hospitals/--layout/--seed. With --url the load goes to a
+running server (load the same catalog with `python -m benchmarks.synthetic`
+beforehand). Without it the app from app.py runs in-process on the chosen
+storage backend and index strategy with that catalog bulk-loaded first;
+client and server then share one event loop, so compare in-process numbers
+only with each other.
+
+The JSON report goes to stdout (or --output). With --baseline, the run fails
+(exit code 1) when throughput drops, or p99 or the error rate rises, by more
+than --tolerance relative to that earlier report.
+
+Run from the project root:
+  python -m benchmarks.bench_http_load --backend memory --hospitals 10000 --requests 5000
+  python -m benchmarks.bench_http_load --index grid --mix find=80,status=20 --duration 30
+  python -m benchmarks.bench_http_load --url http://127.0.0.1:5000 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.synthetic import generate_hospitals, generate_requests, load_hospitals, region_bounds
+from config import Config
+from models.stats import percentile
+
+OPERATIONS = ('find', 'status', 'pending', 'accept')
+DEFAULT_MIX = 'find=50,status=25,pending=15,accept=10'
+
+# Request ids kept for status checks
+KNOWN_REQUESTS = 10000
+
+# Size of the synthetic request stream find cycles through (one day's worth)
+STREAM_PER_DAY = 20000
+
+
+def parse_mix(value):
+    """{'find': 0.5, ...} from 'find=50,status=25,...' (weights need not sum to 100)"""
+    weights = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation in mix: {name}")
+        weights[name] = float(weight)
+    total = sum(weights.values())
+    if total <= 0:
+        raise ValueError("Request mix has no weight")
+    return {name: weight / total for name, weight in weights.items()}
+
+
+def percentile_ms(ordered, fraction):
+    """Nearest-rank percentile of sorted latencies in seconds, in milliseconds"""
+    value = percentile(ordered, fraction)
+    return round(value * 1000, 3) if value is not None else None
+
+
+def summarize(samples, elapsed):
+    """Report section for a list of (latency seconds, status code) samples"""
+    latencies = sorted(latency for latency, _ in samples)
+    codes = {}
+    for _, code in samples:
+        codes[str(code)] = codes.get(str(code), 0) + 1
+    errors = sum(1 for _, code in samples if not 200 <= code < 300)
+    return {
+        'requests': len(samples),
+        'throughput_rps': round(len(samples) / elapsed, 1) if elapsed else None,
+        'errors': errors,
+        'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+        'p50_ms': percentile_ms(latencies, 0.50),
+        'p95_ms': percentile_ms(latencies, 0.95),
+        'p99_ms': percentile_ms(latencies, 0.99),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3) if latencies else None,
+        'status_codes': codes,
+    }
+
+
+class LoadGenerator:
+    """Closed-loop workers sharing the ids the API has handed out"""
+
+    def __init__(self, client, mix, seed, stream):
+        self.client = client
+        self.stream = itertools.cycle(stream)
+        self.operations = list(mix)
+        self.weights = [mix[name] for name in self.operations]
+        self.rng = random.Random(seed)
+        self.requests = []
+        self.unaccepted = []
+        self.hospitals = []
+        self.samples = {name: [] for name in OPERATIONS}
+
+    def _find_payload(self):
+        request = next(self.stream)
+        return {
+            'patient_type': request['patient_type'],
+            'emergency_type': request['emergency_type'],
+            'needs': request['needs'],
+            'latitude': request['latitude'],
+            'longitude': request['longitude'],
+        }
+
+    def _choose(self):
+        operation = self.rng.choices(self.operations, self.weights)[0]
+        if operation == 'status' and not self.requests:
+            return 'find'
+        if operation == 'pending' and not self.hospitals:
+            return 'find'
+        if operation == 'accept' and not self.unaccepted:
+            return 'find'
+        return operation
+
+    async def _send(self, operation):
+        client = self.client
+        if operation == 'find':
+            return await client.post('/api/ambulance/find-hospital', json=self._find_payload())
+        if operation == 'status':
+            request_id = self.rng.choice(self.requests)
+            return await client.post('/api/ambulance/check-status', json={'request_id': request_id})
+        if operation == 'pending':
+            hospital_id = self.rng.choice(self.hospitals)
+            return await client.get('/api/hospital/pending-requests', params={'hospital_id': hospital_id, 'limit': 20})
+        request_id = self.unaccepted.pop(self.rng.randrange(len(self.unaccepted)))
+        return await client.post('/api/hospital/accept-request', json={'request_id': request_id})
+
+    def _remember(self, response):
+        body = response.json()
+        self.requests.append(body['request_id'])
+        if len(self.requests) > KNOWN_REQUESTS:
+            self.requests = self.requests[-KNOWN_REQUESTS // 2:]
+        self.unaccepted.append(body['request_id'])
+        if len(self.hospitals) < KNOWN_REQUESTS:
+            self.hospitals.append(body['hospital_id'])
+
+    async def worker(self, budget, deadline):
+        while budget is None or budget[0] > 0:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            if budget is not None:
+                budget[0] -= 1
+            operation = self._choose()
+            start = time.perf_counter()
+            try:
+                response = await self._send(operation)
+                code = response.status_code
+            except httpx.HTTPError:
+                response, code = None, 0
+            self.samples[operation].append((time.perf_counter() - start, code))
+            if operation == 'find' and code == 200:
+                self._remember(response)
+
+    async def run(self, concurrency, requests=None, duration=None):
+        budget = [requests] if requests is not None else None
+        deadline = time.perf_counter() + duration if duration is not None else None
+        start = time.perf_counter()
+        await asyncio.gather(*(self.worker(budget, deadline) for _ in range(concurrency)))
+        return time.perf_counter() - start
+
+
+def apply_settings(settings):
+    """Override Config attributes from KEY=VALUE strings, keeping their types"""
+    for setting in settings:
+        key, _, value = setting.partition('=')
+        current = getattr(Config, key)
+        if isinstance(current, bool):
+            value = value.lower() == 'true'
+        elif current is not None:
+            value = type(current)(value)
+        setattr(Config, key, value)
+
+
+def synthetic_city(args):
+    """The benchmark catalog and the request stream replayed by find"""
+    hospitals = generate_hospitals(args.hospitals, args.seed, args.layout)
+    return hospitals, generate_requests(hospitals, STREAM_PER_DAY, seed=args.seed)
+
+
+async def run_in_process(args, mix):
+    """Start app.py's application in this process and load-test it over ASGI"""
+    hospitals, stream = synthetic_city(args)
+    Config.DB_BACKEND = args.backend
+    Config.SQLITE_PATH = os.path.join(args.workdir, 'load.db')
+    Config.CATALOG_PROBE_INTERVAL = 0
+    if args.index == 'grid':
+        Config.COVERAGE_BOUNDS = ','.join(f"{x:.6f}" for x in region_bounds(hospitals))
+    apply_settings(args.set)
+
+    from app import app
+
+    await app.router.startup()
+    try:
+        db = app.state.db
+        started = time.perf_counter()
+        load_hospitals(db, hospitals)
+        hospital_count = db.load_catalog()
+        if args.index == 'sql':
+            # Every search goes to the database, as before the catalog loads
+            db.catalog = None
+        setup_seconds = time.perf_counter() - started
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+            generator = LoadGenerator(client, mix, args.seed, stream)
+            elapsed = await generator.run(args.concurrency, args.requests, args.duration)
+    finally:
+        await app.router.shutdown()
+    return generator, elapsed, {'hospitals': hospital_count, 'setup_s': round(setup_seconds, 3)}
+
+
+async def run_remote(args, mix):
+    _, stream = synthetic_city(args)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as client:
+        generator = LoadGenerator(client, mix, args.seed, stream)
+        elapsed = await generator.run(args.concurrency, args.requests, args.duration)
+    return generator, elapsed, {}
+
+
+def regressions(report, baseline, tolerance):
+    """Human-readable list of metrics that got worse than baseline by more than tolerance"""
+    found = []
+    current, previous = report['total'], baseline['total']
+    if previous['throughput_rps'] and (current['throughput_rps'] or 0) < previous['throughput_rps'] * (1 - tolerance):
+        found.append(f"throughput {current['throughput_rps']} rps < baseline {previous['throughput_rps']} rps")
+    if current['p99_ms'] is None:
+        found.append("p99 missing: no requests recorded")
+    elif previous['p99_ms'] and current['p99_ms'] > previous['p99_ms'] * (1 + tolerance):
+        found.append(f"p99 {current['p99_ms']} ms > baseline {previous['p99_ms']} ms")
+    if current['error_rate'] > previous['error_rate'] + tolerance * max(previous['error_rate'], 0.01):
+        found.append(f"error rate {current['error_rate']} > baseline {previous['error_rate']}")
+    return found
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the dispatch API")
+    parser.add_argument('--url', help="running server to load (default: in-process app)")
+    parser.add_argument('--backend', default='memory', choices=('memory', 'sqlite', 'mysql'),
+                        help="storage backend for the in-process app")
+    parser.add_argument('--index', default='kdtree', choices=('kdtree', 'grid', 'sql'),
+                        help="hospital search: catalog KD-tree, coverage grid, or SQL only")
+    parser.add_argument('--hospitals', type=int, default=10000, help="synthetic catalog size")
+    parser.add_argument('--layout', default='urban', choices=('urban', 'rural'), help="synthetic catalog layout")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="operation weights, e.g. find=50,status=25")
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, help="total requests (default 5000 unless --duration)")
+    parser.add_argument('--duration', type=float, help="seconds to run instead of a request count")
+    parser.add_argument('--timeout', type=float, default=30.0, help="per-request timeout with --url")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE',
+                        help="override a Config setting in-process, e.g. GROUP_COMMIT_ENABLED=true")
+    parser.add_argument('--output', help="write the JSON report here instead of stdout")
+    parser.add_argument('--baseline', help="earlier JSON report to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.10, help="allowed relative regression")
+    args = parser.parse_args(argv)
+    if args.requests is None and args.duration is None:
+        args.requests = 5000
+    return args
+
+
+def run(argv=None):
+    args = parse_args(argv)
+    mix = parse_mix(args.mix)
+
+    if args.url:
+        generator, elapsed, setup = asyncio.run(run_remote(args, mix))
+        target = {'url': args.url, 'hospitals': args.hospitals}
+    else:
+        # The app's own logging goes to stderr, keeping stdout for the report
+        with tempfile.TemporaryDirectory() as workdir, contextlib.redirect_stdout(sys.stderr):
+            args.workdir = workdir
+            generator, elapsed, setup = asyncio.run(run_in_process(args, mix))
+        target = {'backend': args.backend, 'index': args.index, 'settings': args.set, **setup}
+
+    samples = [sample for operation in OPERATIONS for sample in generator.samples[operation]]
+    report = {
+        'target': target,
+        'layout': args.layout,
+        'mix': args.mix,
+        'concurrency': args.concurrency,
+        'seed': args.seed,
+        'elapsed_s': round(elapsed, 3),
+        'total': summarize(samples, elapsed),
+        'operations': {
+            operation: summarize(generator.samples[operation], elapsed)
+            for operation in OPERATIONS if generator.samples[operation]
+        },
+    }
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            report['regressions'] = regressions(report, json.load(f), args.tolerance)
+
+    encoded = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(encoded + '\n')
+    else:
+        print(encoded)
+    return 1 if report.get('regressions') else 0
+
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Drive-time query benchmark - A* and Dijkstra vs the contraction hierarchy.
+
+Builds a synthetic SIDE x SIDE street grid (random speeds, some one-way and
+missing blocks), contracts it, and times the ambulance x candidate-hospital
+matrix that find_hospital needs: one origin against CANDIDATES targets.
+Targets are drawn from HOSPITALS fixed nodes, as in production, so the
+hierarchy's cached target searches are exercised; a grid has no road
+hierarchy, so real extracts contract better than this.
+
+Run from the project root:  python -m benchmarks.bench_routing
+"""
+
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from models.contraction import build_hierarchy, load_hierarchy
+from models.road_graph import RoadGraph
+
+SIDE = 80
+SPACING_DEG = 0.004
+CANDIDATES = 10
+QUERIES = 200
+HOSPITALS = 150
+
+
+def make_grid(seed=5):
+    rng = random.Random(seed)
+    lat = np.repeat(11.0 + np.arange(SIDE) * SPACING_DEG, SIDE)
+    lon = np.tile(76.9 + np.arange(SIDE) * SPACING_DEG, SIDE)
+    sources, targets, seconds = [], [], []
+    for row in range(SIDE):
+        for col in range(SIDE):
+            node = row * SIDE + col
+            neighbours = ([node + 1] if col < SIDE - 1 else []) + ([node + SIDE] if row < SIDE - 1 else [])
+            for other in neighbours:
+                if rng.random() < 0.05:
+                    continue
+                travel = rng.uniform(10, 60)
+                oneway = rng.random() < 0.15
+                sources.append(node)
+                targets.append(other)
+                seconds.append(travel)
+                if not oneway:
+                    sources.append(other)
+                    targets.append(node)
+                    seconds.append(travel)
+
+    sources = np.asarray(sources)
+    order = np.argsort(sources, kind='stable')
+    offsets = np.zeros(SIDE * SIDE + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=SIDE * SIDE), out=offsets[1:])
+    return RoadGraph(
+        lat, lon, offsets,
+        np.asarray(targets, dtype=np.int32)[order],
+        np.asarray(seconds, dtype=np.float32)[order],
+        100.0
+    )
+
+
+def per_pair_ms(queries, answer):
+    start = time.perf_counter()
+    for source, targets in queries:
+        answer(source, targets)
+    return (time.perf_counter() - start) / (len(queries) * CANDIDATES) * 1000
+
+
+def run():
+    graph = make_grid()
+    print(f"Grid: {len(graph)} nodes, {graph.edge_count} edges; {CANDIDATES} candidates per query\n")
+
+    start = time.perf_counter()
+    hierarchy = build_hierarchy(graph)
+    print(f"Contraction: {time.perf_counter() - start:.1f}s, {hierarchy.edge_count} upward/downward edges")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'grid.ch')
+        hierarchy.save(path)
+        start = time.perf_counter()
+        mapped = load_hierarchy(path)
+        print(f"Mapped load: {(time.perf_counter() - start) * 1000:.2f}ms\n")
+
+        rng = random.Random(9)
+        hospitals = rng.sample(range(len(graph)), HOSPITALS)
+        queries = [
+            (rng.randrange(len(graph)), rng.sample(hospitals, CANDIDATES))
+            for _ in range(QUERIES)
+        ]
+        for source, targets in queries[:20]:
+            expected = graph.travel_times(source, targets)
+            actual = mapped.travel_times(source, targets)
+            assert expected.keys() == actual.keys()
+            assert all(abs(expected[t] - actual[t]) <= 1e-3 * max(1.0, expected[t]) for t in expected)
+
+        def a_star(source, targets):
+            return [graph.route(source, target) for target in targets]
+
+        print(f"{'A* per pair':<22} {per_pair_ms(queries, a_star):>8.3f} ms")
+        print(f"{'Dijkstra one-to-many':<22} {per_pair_ms(queries, graph.travel_times):>8.3f} ms")
+        print(f"{'CH bucket many-to-many':<22} {per_pair_ms(queries, mapped.travel_times):>8.3f} ms")
+
+
+if __name__ == "__main__":
+    run()
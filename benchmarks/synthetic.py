@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Synthetic city generator - deterministic hospital catalogs, emergency request
+streams and ambulance trajectories for scale testing, plus bulk loaders.
+
+Everything is drawn from random.Random(seed), so the same arguments always
+produce the same data:
+
+  generate_hospitals     urban (clustered around districts of one city) or
+                         rural (sparse, a few small towns) layouts, with a
+                         clinic / district / tertiary capacity mix
+  generate_requests      arrivals over whole days following DIURNAL_PROFILE,
+                         located around hospitals in proportion to their size
+  generate_trajectories  one ping per vehicle per interval, driving between
+                         random waypoints at road speeds with GPS jitter
+
+load_hospitals / load_requests write through a connected Database's pool
+with chunked executemany, one transaction per chunk, on any storage backend.
+
+Run from the project root to fill a database (DB_BACKEND / SQLITE_PATH, or
+--backend / --sqlite-path) and optionally write trajectories as NDJSON for
+POST /api/fleet/positions/stream:
+  python -m benchmarks.synthetic --backend sqlite --sqlite-path city.db \\
+      --hospitals 100000 --requests-per-day 20000 --days 7 --trajectories pings.ndjson
+"""
+
+import argparse
+import bisect
+import json
+import math
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from config import Config
+from models.database import Database
+
+CITY_CENTRE = (11.0168, 76.9558)
+
+KM_PER_DEG_LAT = 111.32
+
+# (tier, share in urban, share in rural, beds, icu, oxygen, ventilator) ranges
+CAPACITY_TIERS = (
+    ('Clinic', 0.55, 0.80, (5, 30), (0, 2), (2, 10), (0, 1)),
+    ('District Hospital', 0.35, 0.18, (50, 200), (4, 20), (20, 80), (2, 8)),
+    ('Medical College Hospital', 0.10, 0.02, (300, 1200), (30, 120), (100, 400), (10, 40)),
+)
+
+# Relative arrival rate for each hour of the day: quiet before dawn, a
+# late-morning peak and a larger evening peak
+DIURNAL_PROFILE = (
+    0.55, 0.45, 0.40, 0.35, 0.35, 0.45, 0.65, 0.90, 1.10, 1.25, 1.30, 1.25,
+    1.20, 1.15, 1.10, 1.15, 1.25, 1.40, 1.55, 1.50, 1.35, 1.15, 0.90, 0.70,
+)
+
+# (patient type, share, P(icu), P(oxygen), P(ventilator)); only the two
+# patient types the frontend and the dispatch severity order
+# (models.dispatch.SEVERITY_ORDER) know
+SEVERITY_MIX = (
+    ('Normal', 0.60, 0.02, 0.15, 0.00),
+    ('Serious', 0.40, 0.46, 0.68, 0.17),
+)
+
+EMERGENCY_TYPES = (
+    ('Accident', 0.30), ('Cardiac', 0.20), ('Stroke', 0.10),
+    ('Respiratory', 0.15), ('Burns', 0.05), ('Other', 0.20),
+)
+
+# Rows per executemany call and transaction
+LOAD_CHUNK = 5000
+
+
+def _offset(rng, origin, sigma_km):
+    """A point normally distributed around origin with sigma_km in each direction"""
+    lat = origin[0] + rng.gauss(0, sigma_km) / KM_PER_DEG_LAT
+    lon = origin[1] + rng.gauss(0, sigma_km) / (KM_PER_DEG_LAT * math.cos(math.radians(origin[0])))
+    return lat, lon
+
+
+def _in_disc(rng, origin, radius_km):
+    """A point uniformly distributed within radius_km of origin"""
+    distance = radius_km * math.sqrt(rng.random())
+    bearing = rng.uniform(0, 2 * math.pi)
+    lat = origin[0] + distance * math.cos(bearing) / KM_PER_DEG_LAT
+    lon = origin[1] + distance * math.sin(bearing) / (KM_PER_DEG_LAT * math.cos(math.radians(origin[0])))
+    return lat, lon
+
+
+def _pick(rng, table, column=1):
+    """A row of table chosen with the weights in `column`"""
+    return rng.choices(table, [row[column] for row in table])[0]
+
+
+def generate_hospitals(count, seed=1, layout='urban', centre=CITY_CENTRE, radius_km=None, clusters=None):
+    """Hospital rows (dicts with the hospitals table's columns) for one region
+
+    urban: `clusters` districts (default count // 500, at least 4) within
+    radius_km (default 25) of the centre, sized by a Zipf-like law, with
+    hospitals normally scattered ~1.5 km around them and 10% spread evenly.
+    rural: radius_km defaults to 150; a few small towns hold half the
+    hospitals, the rest are spread evenly, and clinics dominate.
+    """
+    if layout not in ('urban', 'rural'):
+        raise ValueError(f"Unknown layout: {layout}")
+    rng = random.Random(seed)
+    urban = layout == 'urban'
+    radius_km = radius_km or (25 if urban else 150)
+    clusters = clusters or max(4, count // (500 if urban else 2000))
+
+    towns = [_in_disc(rng, centre, radius_km * (0.8 if urban else 1.0)) for _ in range(clusters)]
+    town_weights = [1 / (rank + 1) for rank in range(clusters)]
+    clustered_share = 0.9 if urban else 0.5
+    share_column = 1 if urban else 2
+
+    hospitals = []
+    for i in range(count):
+        if rng.random() < clustered_share:
+            town = rng.choices(towns, town_weights)[0]
+            latitude, longitude = _offset(rng, town, 1.5 if urban else 3.0)
+        else:
+            latitude, longitude = _in_disc(rng, centre, radius_km)
+        tier, _, _, beds, icu, oxygen, ventilator = _pick(rng, CAPACITY_TIERS, share_column)
+        hospitals.append({
+            'name': f"{tier} {layout.title()} {seed}-{i + 1}",
+            'latitude': round(latitude, 6),
+            'longitude': round(longitude, 6),
+            'available_beds': rng.randint(*beds),
+            'available_icu': rng.randint(*icu),
+            'available_oxygen': rng.randint(*oxygen),
+            'available_ventilator': rng.randint(*ventilator),
+        })
+    return hospitals
+
+
+def diurnal_rate(seconds):
+    """Relative arrival rate at a time of day, interpolated between hours"""
+    hour = (seconds / 3600) % 24
+    low = int(hour)
+    fraction = hour - low
+    return DIURNAL_PROFILE[low] * (1 - fraction) + DIURNAL_PROFILE[(low + 1) % 24] * fraction
+
+
+def generate_requests(hospitals, per_day, days=1, seed=1, scatter_km=2.0):
+    """Emergency requests over `days` days, oldest first
+
+    Arrivals are a Poisson process whose rate follows DIURNAL_PROFILE
+    (averaging per_day a day), drawn by thinning. Each request starts near
+    a hospital picked in proportion to its beds, a stand-in for population,
+    which is recorded as its `hospital` (index into hospitals). Needs follow
+    the patient's severity.
+    """
+    rng = random.Random(seed)
+    mean = sum(DIURNAL_PROFILE) / len(DIURNAL_PROFILE)
+    peak = max(DIURNAL_PROFILE) / mean * per_day / 86400
+    cumulative = []
+    total = 0
+    for hospital in hospitals:
+        total += hospital['available_beds'] + 1
+        cumulative.append(total)
+
+    requests = []
+    at = 0.0
+    end = days * 86400
+    while True:
+        at += rng.expovariate(peak)
+        if at >= end:
+            return requests
+        if rng.random() * max(DIURNAL_PROFILE) > diurnal_rate(at):
+            continue
+        index = bisect.bisect_right(cumulative, rng.random() * total)
+        hospital = hospitals[index]
+        latitude, longitude = _offset(rng, (hospital['latitude'], hospital['longitude']), scatter_km)
+        patient_type, _, icu, oxygen, ventilator = _pick(rng, SEVERITY_MIX)
+        requests.append({
+            'at': round(at, 3),
+            'patient_type': patient_type,
+            'emergency_type': _pick(rng, EMERGENCY_TYPES)[0],
+            'needs': {
+                'bed': True,
+                'icu': rng.random() < icu,
+                'oxygen': rng.random() < oxygen,
+                'ventilator': rng.random() < ventilator,
+            },
+            'latitude': round(latitude, 6),
+            'longitude': round(longitude, 6),
+            'hospital': index,
+        })
+
+
+def generate_trajectories(vehicles, duration, interval=1.0, seed=1, centre=CITY_CENTRE,
+                          radius_km=20, start=1_700_000_000, jitter_m=5.0):
+    """Rounds of GPS pings: one list per interval with one ping per vehicle
+
+    Each vehicle drives in a straight line towards a random waypoint at
+    20-70 km/h, waits 0-60 s there, then picks the next one. Reported
+    positions carry normally distributed GPS error of jitter_m metres.
+    Pings are dicts shaped like the fleet ingest API's reports.
+    """
+    rng = random.Random(seed)
+    jitter_km = jitter_m / 1000
+    fleet = []
+    for n in range(vehicles):
+        position = _in_disc(rng, centre, radius_km)
+        fleet.append({
+            'ambulance_id': f"AMB-{n:05d}",
+            'position': position,
+            'waypoint': _in_disc(rng, centre, radius_km),
+            'speed_kmh': rng.uniform(20, 70),
+            'wait': 0.0,
+        })
+
+    rounds = []
+    for step in range(int(duration / interval)):
+        pings = []
+        for vehicle in fleet:
+            if vehicle['wait'] > 0:
+                vehicle['wait'] -= interval
+            else:
+                lat, lon = vehicle['position']
+                target_lat, target_lon = vehicle['waypoint']
+                scale = math.cos(math.radians(lat))
+                north_km = (target_lat - lat) * KM_PER_DEG_LAT
+                east_km = (target_lon - lon) * KM_PER_DEG_LAT * scale
+                remaining = math.hypot(north_km, east_km)
+                travel = vehicle['speed_kmh'] * interval / 3600
+                if travel >= remaining:
+                    vehicle['position'] = vehicle['waypoint']
+                    vehicle['waypoint'] = _in_disc(rng, centre, radius_km)
+                    vehicle['speed_kmh'] = rng.uniform(20, 70)
+                    vehicle['wait'] = rng.uniform(0, 60)
+                else:
+                    vehicle['position'] = (
+                        lat + north_km / remaining * travel / KM_PER_DEG_LAT,
+                        lon + east_km / remaining * travel / (KM_PER_DEG_LAT * scale),
+                    )
+            latitude, longitude = _offset(rng, vehicle['position'], jitter_km)
+            pings.append({
+                'ambulance_id': vehicle['ambulance_id'],
+                'latitude': round(latitude, 6),
+                'longitude': round(longitude, 6),
+                'recorded_at': start + step * interval,
+            })
+        rounds.append(pings)
+    return rounds
+
+
+def region_bounds(rows, margin_deg=0.01):
+    """(south, west, north, east) around every row's latitude/longitude"""
+    latitudes = [row['latitude'] for row in rows]
+    longitudes = [row['longitude'] for row in rows]
+    return (
+        min(latitudes) - margin_deg, min(longitudes) - margin_deg,
+        max(latitudes) + margin_deg, max(longitudes) + margin_deg,
+    )
+
+
+def _insert_chunks(db, query, rows, chunk):
+    with db.pool.connection() as conn:
+        cursor = conn.cursor()
+        for start in range(0, len(rows), chunk):
+            cursor.executemany(query, rows[start:start + chunk])
+            conn.commit()
+        cursor.close()
+
+
+def load_hospitals(db, hospitals, chunk=LOAD_CHUNK):
+    """Bulk-insert generated hospitals; returns their ids in input order"""
+    _insert_chunks(
+        db,
+        """
+        INSERT INTO hospitals (name, latitude, longitude, available_beds,
+                               available_icu, available_oxygen, available_ventilator)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """,
+        [
+            (h['name'], h['latitude'], h['longitude'], h['available_beds'],
+             h['available_icu'], h['available_oxygen'], h['available_ventilator'])
+            for h in hospitals
+        ],
+        chunk
+    )
+    with db.pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, name FROM hospitals")
+        ids = dict((name, hospital_id) for hospital_id, name in cursor.fetchall())
+        cursor.close()
+    return [ids[h['name']] for h in hospitals]
+
+
+def load_requests(db, requests, hospital_ids, start=None, pending_seconds=3600, seed=1, chunk=LOAD_CHUNK):
+    """Bulk-insert a generated request stream as emergency_requests history
+
+    The stream is placed to start at `start` (default: midnight UTC, as
+    many whole days ago as the stream spans, so hours of the day line up
+    with DIURNAL_PROFILE). Requests from the last pending_seconds stay Pending; older ones
+    are Accepted (85%) or Rejected. Capacity is not touched. Returns the
+    number of rows written.
+    """
+    rng = random.Random(seed)
+    if start is None:
+        midnight = datetime.now(timezone.utc).replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0)
+        start = midnight - timedelta(days=math.ceil(requests[-1]['at'] / 86400) if requests else 0)
+    cutoff = (requests[-1]['at'] if requests else 0) - pending_seconds
+
+    rows = []
+    for request in requests:
+        if request['at'] >= cutoff:
+            status = 'Pending'
+        else:
+            status = 'Accepted' if rng.random() < 0.85 else 'Rejected'
+        created_at = start + timedelta(seconds=request['at'])
+        needs = request['needs']
+        rows.append((
+            request['patient_type'], request['emergency_type'], needs['bed'], needs['icu'],
+            needs['oxygen'], needs['ventilator'], hospital_ids[request['hospital']],
+            status, created_at, created_at
+        ))
+    _insert_chunks(
+        db,
+        """
+        INSERT INTO emergency_requests
+        (patient_type, emergency_type, need_bed, need_icu, need_oxygen, need_ventilator,
+         hospital_id, status, created_at, updated_at)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """,
+        rows,
+        chunk
+    )
+    return len(rows)
+
+
+def write_ndjson(path, rounds):
+    """Write trajectory rounds as newline-delimited JSON pings"""
+    with open(path, 'w') as f:
+        for pings in rounds:
+            for ping in pings:
+                f.write(json.dumps(ping) + '\n')
+
+
+def run(argv=None):
+    parser = argparse.ArgumentParser(description="Generate and bulk-load a synthetic city")
+    parser.add_argument('--backend', choices=('mysql', 'sqlite'), help="default: DB_BACKEND")
+    parser.add_argument('--sqlite-path', help="default: SQLITE_PATH")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--layout', choices=('urban', 'rural'), default='urban')
+    parser.add_argument('--hospitals', type=int, default=10000)
+    parser.add_argument('--requests-per-day', type=int, default=0)
+    parser.add_argument('--days', type=float, default=1)
+    parser.add_argument('--vehicles', type=int, default=0, help="ambulances to simulate for --trajectories")
+    parser.add_argument('--trajectory-seconds', type=float, default=600)
+    parser.add_argument('--trajectories', help="NDJSON file for the generated pings")
+    args = parser.parse_args(argv)
+
+    if args.backend:
+        Config.DB_BACKEND = args.backend
+    if args.sqlite_path:
+        Config.SQLITE_PATH = args.sqlite_path
+
+    started = time.perf_counter()
+    hospitals = generate_hospitals(args.hospitals, args.seed, args.layout)
+    requests = generate_requests(hospitals, args.requests_per_day, args.days, args.seed) if args.requests_per_day else []
+    generated = time.perf_counter()
+    print(f"Generated {len(hospitals)} hospitals and {len(requests)} requests in {generated - started:.1f}s")
+
+    db = Database(Config)
+    if not db.connect():
+        return 1
+    try:
+        hospital_ids = load_hospitals(db, hospitals)
+        written = load_requests(db, requests, hospital_ids, seed=args.seed) if requests else 0
+    finally:
+        db.disconnect()
+    print(f"Loaded {len(hospital_ids)} hospitals and {written} requests into {db.backend.name} "
+          f"in {time.perf_counter() - generated:.1f}s")
+    print(f"Region (COVERAGE_BOUNDS): {','.join(f'{x:.4f}' for x in region_bounds(hospitals))}")
+
+    if args.trajectories and args.vehicles:
+        rounds = generate_trajectories(args.vehicles, args.trajectory_seconds, seed=args.seed)
+        write_ndjson(args.trajectories, rounds)
+        print(f"Wrote {args.vehicles * len(rounds)} pings to {args.trajectories}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(run())
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Rebuild the road-routing files for the configured (or given) map extract.
+
+Writes the graph snapshot and the contraction hierarchy the API loads at
+startup. Run it whenever the OSM extract changes:
+
+    python build_routing.py [extract] [--snapshot PATH] [--hierarchy PATH]
+"""
+
+import argparse
+import sys
+import time
+
+from config import Config
+from models.contraction import build_hierarchy, load_hierarchy
+from models.road_graph import extract_source, load_graph
+
+
+def main(argv=None):
+    config = Config()
+    parser = argparse.ArgumentParser(description="Rebuild the road graph snapshot and contraction hierarchy")
+    parser.add_argument('extract', nargs='?', default=config.ROAD_GRAPH_PATH, help="OSM extract (default: ROAD_GRAPH_PATH)")
+    parser.add_argument('--snapshot', default=config.ROAD_GRAPH_SNAPSHOT or None, help="graph snapshot path")
+    parser.add_argument('--hierarchy', default=None, help="contraction hierarchy path")
+    parser.add_argument('--force', action='store_true', help="rebuild even if the hierarchy is up to date")
+    args = parser.parse_args(argv)
+
+    if not args.extract:
+        parser.error("no extract given and ROAD_GRAPH_PATH is not set")
+    target = args.hierarchy or config.ROAD_HIERARCHY_PATH or args.extract + '.ch'
+    source = extract_source(args.extract)
+
+    start = time.perf_counter()
+    graph = load_graph(args.extract, args.snapshot)
+    print(f"[OK] Road graph: {len(graph)} nodes, {graph.edge_count} edges ({time.perf_counter() - start:.1f}s)")
+
+    if not args.force and load_hierarchy(target, source) is not None:
+        print(f"[OK] {target} is up to date")
+        return 0
+
+    start = time.perf_counter()
+    hierarchy = build_hierarchy(graph)
+    hierarchy.save(target, source)
+    print(f"[OK] Contraction hierarchy: {hierarchy.edge_count} edges -> {target} ({time.perf_counter() - start:.1f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,6 +13,17 @@ class Config:
     MYSQL_DB = os.environ.get('MYSQL_DB') or 'emergency_routing_db'
     MYSQL_PORT = int(os.environ.get('MYSQL_PORT') or 3306)
     
+    # Storage backend: mysql (the server above), sqlite (a WAL-mode file at
+    # SQLITE_PATH) or memory (in-process); the last two create the
+    # database_setup.sql schema themselves, for benchmarks and soak tests
+    DB_BACKEND = (os.environ.get('DB_BACKEND') or 'mysql').lower()
+    SQLITE_PATH = os.environ.get('SQLITE_PATH') or 'emergency_routing.db'
+    
+    # Connection pool: max connections, checkout wait (s), idle time before a ping (s)
+    MYSQL_POOL_SIZE = int(os.environ.get('MYSQL_POOL_SIZE') or 10)
+    MYSQL_POOL_TIMEOUT = float(os.environ.get('MYSQL_POOL_TIMEOUT') or 5)
+    MYSQL_POOL_HEALTH_CHECK = float(os.environ.get('MYSQL_POOL_HEALTH_CHECK') or 30)
+    
     # Application Settings
     DEBUG = os.environ.get('DEBUG') or True
     TEMPLATES_AUTO_RELOAD = True
@@ -21,6 +32,60 @@ class Config:
     DEFAULT_AMBULANCE_LATITUDE = float(os.environ.get('DEFAULT_AMBULANCE_LATITUDE') or 11.0168)
     DEFAULT_AMBULANCE_LONGITUDE = float(os.environ.get('DEFAULT_AMBULANCE_LONGITUDE') or 76.9558)
     
+    # SQL hospital search (used when the in-memory index is not loaded):
+    # initial search radius, and whether to use the MySQL SPATIAL index
+    # (migrations/002) instead of a plain latitude/longitude range
+    SPATIAL_SEARCH_RADIUS_KM = float(os.environ.get('SPATIAL_SEARCH_RADIUS_KM') or 5)
+    SPATIAL_SQL_ENABLED = (os.environ.get('SPATIAL_SQL_ENABLED') or 'true').lower() == 'true'
+    
+    # Seconds between checks for hospital changes made outside the API (0 = off)
+    CATALOG_PROBE_INTERVAL = float(os.environ.get('CATALOG_PROBE_INTERVAL') or 30)
+    
+    # Number of ranked fallback hospitals stored with each request
+    CANDIDATE_COUNT = int(os.environ.get('CANDIDATE_COUNT') or 5)
+    
+    # Seconds between re-counts of the request stats from the table (0 = off)
+    STATS_RECONCILE_INTERVAL = float(os.environ.get('STATS_RECONCILE_INTERVAL') or 60)
+    
+    # Soft holds on capacity placed at dispatch: lifetime in seconds (0 = off)
+    # and whether to mirror them to the capacity_holds table (migrations/005).
+    # The hold ledger lives in the API process and persisted holds are only
+    # read back at startup, so holds need a single worker process.
+    HOLD_TTL_SECONDS = float(os.environ.get('HOLD_TTL_SECONDS') or 120)
+    HOLDS_PERSIST = (os.environ.get('HOLDS_PERSIST') or 'false').lower() == 'true'
+    
+    # Ambulance GPS tracking: positions kept per vehicle, seconds between
+    # batched writes to ambulance_positions, and the age (seconds) after
+    # which a position is too old to dispatch from (0 = no limit)
+    FLEET_HISTORY_SIZE = int(os.environ.get('FLEET_HISTORY_SIZE') or 60)
+    FLEET_FLUSH_INTERVAL = float(os.environ.get('FLEET_FLUSH_INTERVAL') or 2)
+    FLEET_POSITION_MAX_AGE = float(os.environ.get('FLEET_POSITION_MAX_AGE') or 300)
+    
+    # Road-network routing: OSM extract (.osm/.osm.bz2/.pbf; empty = straight
+    # line only), its binary snapshot (default: next to the extract), and how
+    # many straight-line candidates are re-ranked by drive time
+    ROAD_GRAPH_PATH = os.environ.get('ROAD_GRAPH_PATH') or ''
+    ROAD_GRAPH_SNAPSHOT = os.environ.get('ROAD_GRAPH_SNAPSHOT') or ''
+    # Contraction hierarchy from build_routing.py (default: <extract>.ch);
+    # without an up-to-date one, drive times fall back to plain Dijkstra
+    ROAD_HIERARCHY_PATH = os.environ.get('ROAD_HIERARCHY_PATH') or ''
+    ROUTING_CANDIDATES = int(os.environ.get('ROUTING_CANDIDATES') or 10)
+    
+    # Precomputed coverage grid: service region as "south,west,north,east"
+    # degrees (empty = off), cell size in degrees, and hospitals per cell
+    # guaranteed (lookups for more fall back to the KD-tree)
+    COVERAGE_BOUNDS = os.environ.get('COVERAGE_BOUNDS') or ''
+    COVERAGE_CELL_DEG = float(os.environ.get('COVERAGE_CELL_DEG') or 0.01)
+    COVERAGE_DEPTH = int(os.environ.get('COVERAGE_DEPTH') or 10)
+    
+    # Group commit for new emergency requests: off by default; when on,
+    # inserts queued while a commit is in flight share the next transaction
+    # (at most GROUP_COMMIT_MAX_BATCH rows), optionally waiting a further
+    # window (ms) for company
+    GROUP_COMMIT_ENABLED = (os.environ.get('GROUP_COMMIT_ENABLED') or 'false').lower() == 'true'
+    GROUP_COMMIT_WINDOW_MS = float(os.environ.get('GROUP_COMMIT_WINDOW_MS') or 0)
+    GROUP_COMMIT_MAX_BATCH = int(os.environ.get('GROUP_COMMIT_MAX_BATCH') or 500)
+    
     # API Settings
     API_TITLE = "Emergency Routing System API"
     API_VERSION = "1.0.0"
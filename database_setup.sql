@@ -15,7 +15,15 @@ CREATE TABLE IF NOT EXISTS hospitals (
   available_icu INT DEFAULT 0,
   available_oxygen INT DEFAULT 0,
   available_ventilator INT DEFAULT 0,
-  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  updated_at TIMESTAMP(6) DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+  location POINT
+    GENERATED ALWAYS AS (
+      ST_PointFromText(CONCAT('POINT(', latitude, ' ', longitude, ')'), 4326, 'axis-order=lat-long')
+    ) STORED NOT NULL SRID 4326,
+  SPATIAL INDEX idx_location (location),
+  INDEX idx_lat_lon (latitude, longitude),
+  INDEX idx_updated_at (updated_at)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Create emergency_requests table
@@ -31,10 +39,50 @@ CREATE TABLE IF NOT EXISTS emergency_requests (
   status VARCHAR(50) DEFAULT 'Pending',
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
   updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+  batch_token CHAR(32) NULL,
+  batch_row INT NULL,
   FOREIGN KEY (hospital_id) REFERENCES hospitals(id) ON DELETE RESTRICT ON UPDATE CASCADE,
   INDEX idx_status (status),
   INDEX idx_created_at (created_at),
-  INDEX idx_hospital_id (hospital_id)
+  INDEX idx_hospital_id (hospital_id),
+  INDEX idx_hospital_status_created (hospital_id, status, created_at, id),
+  INDEX idx_status_created (status, created_at, id),
+  INDEX idx_batch_token (batch_token)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Ranked fallback hospitals computed at dispatch time; a rejection moves the
+-- request to the next candidate_rank without a new search
+CREATE TABLE IF NOT EXISTS request_candidates (
+  request_id INT NOT NULL,
+  candidate_rank INT NOT NULL,
+  hospital_id INT NOT NULL,
+  distance DECIMAL(10, 2) NOT NULL,
+  PRIMARY KEY (request_id, candidate_rank),
+  FOREIGN KEY (request_id) REFERENCES emergency_requests(id) ON DELETE CASCADE,
+  FOREIGN KEY (hospital_id) REFERENCES hospitals(id) ON DELETE CASCADE ON UPDATE CASCADE,
+  INDEX idx_request_hospital (request_id, hospital_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Soft holds on hospital capacity placed at dispatch time (HOLDS_PERSIST);
+-- rows past expires_at are ignored and purged when the API starts
+CREATE TABLE IF NOT EXISTS capacity_holds (
+  request_id INT PRIMARY KEY,
+  hospital_id INT NOT NULL,
+  need_icu BOOLEAN DEFAULT FALSE,
+  need_oxygen BOOLEAN DEFAULT FALSE,
+  need_ventilator BOOLEAN DEFAULT FALSE,
+  expires_at TIMESTAMP(6) NOT NULL,
+  FOREIGN KEY (request_id) REFERENCES emergency_requests(id) ON DELETE CASCADE,
+  FOREIGN KEY (hospital_id) REFERENCES hospitals(id) ON DELETE CASCADE ON UPDATE CASCADE,
+  INDEX idx_expires_at (expires_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+-- Last known ambulance positions, batch-written from the in-memory fleet store
+CREATE TABLE IF NOT EXISTS ambulance_positions (
+  ambulance_id VARCHAR(64) PRIMARY KEY,
+  latitude DECIMAL(10, 8) NOT NULL,
+  longitude DECIMAL(11, 8) NOT NULL,
+  recorded_at TIMESTAMP(6) NOT NULL
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 
 -- Insert sample hospitals (Coimbatore, Tamil Nadu, India)
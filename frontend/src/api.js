@@ -10,23 +10,42 @@ const api = axios.create({
 });
 
 export const ambulanceAPI = {
-  findHospital: (patientType, emergencyType, needs) =>
+  // origin: { latitude, longitude } or { ambulance_id }; the server's
+  // default ambulance location is used when omitted
+  findHospital: (patientType, emergencyType, needs, origin = {}) =>
     api.post('/ambulance/find-hospital', {
       patient_type: patientType,
       emergency_type: emergencyType,
       needs: needs,
+      ...origin,
     }),
-  checkStatus: (requestId) =>
+  // With lastStatus and timeout (seconds) the server holds the call until
+  // the request changes or the timeout expires
+  checkStatus: (requestId, lastStatus = null, timeout = null) =>
     api.post('/ambulance/check-status', {
       request_id: requestId,
+      last_status: lastStatus,
+      timeout: timeout,
     }),
+  cancelRequest: (requestId) =>
+    api.post('/ambulance/cancel-request', { request_id: requestId }),
   getStats: () =>
     api.get('/ambulance/stats'),
 };
 
 export const hospitalAPI = {
-  getPendingRequests: () =>
-    api.get('/hospital/pending-requests'),
+  // Newest first; pass the previous response's next_cursor for the next page
+  getPendingRequests: (hospitalId = null, cursor = null) =>
+    api.get('/hospital/pending-requests', {
+      params: { hospital_id: hospitalId ?? undefined, cursor: cursor ?? undefined },
+    }),
+  // Server-Sent Events: 'snapshot', 'request_created', 'request_updated'
+  // and (when filtered by hospital) 'request_removed'
+  streamPendingRequests: (hospitalId = null) =>
+    new EventSource(
+      `${API_BASE_URL}/hospital/pending-requests/stream` +
+      (hospitalId != null ? `?hospital_id=${hospitalId}` : '')
+    ),
   acceptRequest: (requestId) =>
     api.post('/hospital/accept-request', {
       request_id: requestId,
@@ -6,12 +6,46 @@ const HospitalPanel = ({ onRefresh }) => {
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
   const [actionLoading, setActionLoading] = useState({});
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
-    fetchPendingRequests();
-    // Auto-refresh every 10 seconds
-    const interval = setInterval(fetchPendingRequests, 10000);
-    return () => clearInterval(interval);
+    setLoading(true);
+    // Live updates pushed by the server instead of polling
+    const source = hospitalAPI.streamPendingRequests();
+
+    source.addEventListener('snapshot', (event) => {
+      const snapshot = JSON.parse(event.data);
+      setRequests(snapshot.requests);
+      setNextCursor(snapshot.next_cursor);
+      setError(null);
+      setLoading(false);
+    });
+
+    const applyChange = (event) => {
+      const { request } = JSON.parse(event.data);
+      setRequests(prev => {
+        const others = prev.filter(r => r.id !== request.id);
+        if (request.status !== 'Pending') {
+          return others;
+        }
+        return [request, ...others].sort((a, b) => new Date(b.created_at) - new Date(a.created_at));
+      });
+    };
+    source.addEventListener('request_created', applyChange);
+    source.addEventListener('request_updated', applyChange);
+    source.addEventListener('request_removed', (event) => {
+      const { request } = JSON.parse(event.data);
+      setRequests(prev => prev.filter(r => r.id !== request.id));
+    });
+
+    // EventSource reconnects by itself; the next snapshot clears the error
+    source.onerror = () => {
+      setError('Live updates interrupted, reconnecting...');
+      setLoading(false);
+    };
+
+    return () => source.close();
   }, []);
 
   const fetchPendingRequests = async () => {
@@ -19,6 +53,7 @@ const HospitalPanel = ({ onRefresh }) => {
     try {
       const result = await hospitalAPI.getPendingRequests();
       setRequests(result.data.requests);
+      setNextCursor(result.data.next_cursor);
       setError(null);
     } catch (err) {
       setError(err.response?.data?.detail || 'Failed to fetch requests');
@@ -27,6 +62,24 @@ const HospitalPanel = ({ onRefresh }) => {
     }
   };
 
+  // Older pages come from the REST endpoint; live events keep them current
+  const loadMoreRequests = async () => {
+    setLoadingMore(true);
+    try {
+      const result = await hospitalAPI.getPendingRequests(null, nextCursor);
+      setRequests(prev => {
+        const seen = new Set(prev.map(r => r.id));
+        return [...prev, ...result.data.requests.filter(r => !seen.has(r.id))];
+      });
+      setNextCursor(result.data.next_cursor);
+      setError(null);
+    } catch (err) {
+      setError(err.response?.data?.detail || 'Failed to fetch requests');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleAccept = async (requestId) => {
     setActionLoading(prev => ({ ...prev, [requestId]: 'accepting' }));
     try {
@@ -190,6 +243,17 @@ const HospitalPanel = ({ onRefresh }) => {
             </div>
           ))}
         </div>
+
+        {/* Load More */}
+        {nextCursor && (
+          <button
+            onClick={loadMoreRequests}
+            disabled={loadingMore}
+            className="w-full mt-3 px-3 py-2 border border-purple-300 text-purple-700 font-semibold rounded-lg hover:bg-purple-50 transition-all duration-200 disabled:opacity-50 disabled:cursor-not-allowed text-sm"
+          >
+            {loadingMore ? '⏳ Loading...' : 'Load more'}
+          </button>
+        )}
       </div>
     </div>
   );
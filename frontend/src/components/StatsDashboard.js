@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import { ambulanceAPI } from '../api';
+import { ambulanceAPI, hospitalAPI } from '../api';
 
 const StatsDashboard = () => {
   const [stats, setStats] = useState({
@@ -12,9 +12,19 @@ const StatsDashboard = () => {
 
   useEffect(() => {
     fetchStats();
-    // Auto-refresh every 15 seconds
-    const interval = setInterval(fetchStats, 15000);
-    return () => clearInterval(interval);
+    // Refresh only when a request changes, batching bursts of events
+    const source = hospitalAPI.streamPendingRequests();
+    let timer = null;
+    const scheduleFetch = () => {
+      clearTimeout(timer);
+      timer = setTimeout(fetchStats, 500);
+    };
+    source.addEventListener('request_created', scheduleFetch);
+    source.addEventListener('request_updated', scheduleFetch);
+    return () => {
+      clearTimeout(timer);
+      source.close();
+    };
   }, []);
 
   const fetchStats = async () => {
@@ -0,0 +1,15 @@
+-- Migration 001: ranked fallback candidates for emergency requests
+-- Apply to databases created before request_candidates was added to database_setup.sql
+
+USE emergency_routing_db;
+
+CREATE TABLE IF NOT EXISTS request_candidates (
+  request_id INT NOT NULL,
+  candidate_rank INT NOT NULL,
+  hospital_id INT NOT NULL,
+  distance DECIMAL(10, 2) NOT NULL,
+  PRIMARY KEY (request_id, candidate_rank),
+  FOREIGN KEY (request_id) REFERENCES emergency_requests(id) ON DELETE CASCADE,
+  FOREIGN KEY (hospital_id) REFERENCES hospitals(id) ON DELETE CASCADE ON UPDATE CASCADE,
+  INDEX idx_request_hospital (request_id, hospital_id)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
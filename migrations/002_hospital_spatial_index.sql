@@ -0,0 +1,14 @@
+-- Migration 002: spatial lookup support for hospitals
+-- Adds a POINT (SRID 4326) column kept in sync with latitude/longitude, a
+-- SPATIAL index for MBRCovers() bounding-box searches, and a composite
+-- (latitude, longitude) index for the plain range fallback.
+
+USE emergency_routing_db;
+
+ALTER TABLE hospitals
+  ADD COLUMN location POINT
+    GENERATED ALWAYS AS (
+      ST_PointFromText(CONCAT('POINT(', latitude, ' ', longitude, ')'), 4326, 'axis-order=lat-long')
+    ) STORED NOT NULL SRID 4326,
+  ADD SPATIAL INDEX idx_location (location),
+  ADD INDEX idx_lat_lon (latitude, longitude);
@@ -0,0 +1,9 @@
+-- Migration 003: change tracking for the in-process hospital catalog
+-- The API probes COUNT(*) and MAX(updated_at) to notice hospital edits made
+-- outside it; the index keeps MAX(updated_at) a single index lookup.
+
+USE emergency_routing_db;
+
+ALTER TABLE hospitals
+  ADD COLUMN updated_at TIMESTAMP(6) DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+  ADD INDEX idx_updated_at (updated_at);
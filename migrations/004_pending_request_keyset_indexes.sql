@@ -0,0 +1,9 @@
+-- Migration 004: indexes for keyset-paginated pending-request queries
+-- (hospital_id, status, created_at, id) serves the per-hospital dashboard;
+-- (status, created_at, id) serves the all-hospitals view.
+
+USE emergency_routing_db;
+
+ALTER TABLE emergency_requests
+  ADD INDEX idx_hospital_status_created (hospital_id, status, created_at, id),
+  ADD INDEX idx_status_created (status, created_at, id);
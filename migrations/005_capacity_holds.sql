@@ -0,0 +1,17 @@
+-- Migration 005: persisted soft holds on hospital capacity (HOLDS_PERSIST=true)
+-- One row per pending request holding resources at its current hospital;
+-- rows past expires_at are ignored and purged when the API starts.
+
+USE emergency_routing_db;
+
+CREATE TABLE IF NOT EXISTS capacity_holds (
+  request_id INT PRIMARY KEY,
+  hospital_id INT NOT NULL,
+  need_icu BOOLEAN DEFAULT FALSE,
+  need_oxygen BOOLEAN DEFAULT FALSE,
+  need_ventilator BOOLEAN DEFAULT FALSE,
+  expires_at TIMESTAMP(6) NOT NULL,
+  FOREIGN KEY (request_id) REFERENCES emergency_requests(id) ON DELETE CASCADE,
+  FOREIGN KEY (hospital_id) REFERENCES hospitals(id) ON DELETE CASCADE ON UPDATE CASCADE,
+  INDEX idx_expires_at (expires_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
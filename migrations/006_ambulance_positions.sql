@@ -0,0 +1,12 @@
+-- Migration 006: last known ambulance positions
+-- Written in periodic batches (one upsert per moved ambulance) from the
+-- in-memory fleet store, and read back at startup.
+
+USE emergency_routing_db;
+
+CREATE TABLE IF NOT EXISTS ambulance_positions (
+  ambulance_id VARCHAR(64) PRIMARY KEY,
+  latitude DECIMAL(10, 8) NOT NULL,
+  longitude DECIMAL(11, 8) NOT NULL,
+  recorded_at TIMESTAMP(6) NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
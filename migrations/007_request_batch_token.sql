@@ -0,0 +1,11 @@
+-- Migration 007: ids for multi-row emergency request inserts
+-- The ids of one multi-row INSERT are not guaranteed to be consecutive
+-- (innodb_autoinc_lock_mode=2, auto_increment_increment > 1), so batch
+-- dispatch tags its rows and reads their ids back by batch_row.
+
+USE emergency_routing_db;
+
+ALTER TABLE emergency_requests
+  ADD COLUMN batch_token CHAR(32) NULL,
+  ADD COLUMN batch_row INT NULL,
+  ADD INDEX idx_batch_token (batch_token);
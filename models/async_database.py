@@ -0,0 +1,124 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+
+class AsyncDatabase:
+    """Awaitable facade over Database for the async route handlers
+
+    Blocking MySQL calls run on a dedicated thread pool sized to the
+    connection pool, so the event loop keeps serving other requests while a
+    query is in flight and no worker thread ever waits on a pool checkout.
+    Lookups answered from the in-memory hospital catalog stay on the loop.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.config = db.config
+        self._executor = ThreadPoolExecutor(
+            max_workers=db.config.MYSQL_POOL_SIZE,
+            thread_name_prefix="db"
+        )
+
+    @property
+    def events(self):
+        """The ChangeBus the underlying Database publishes to (or None)"""
+        return self.db.events
+
+    @property
+    def catalog(self):
+        """The Database's current HospitalCatalog (or None)"""
+        return self.db.catalog
+
+    @property
+    def fleet(self):
+        """The FleetPositions store of live ambulance positions (or None)"""
+        return self.db.fleet
+
+    @property
+    def stats(self):
+        """The Database's DispatchStats counters"""
+        return self.db.stats
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(fn, *args))
+
+    def close(self):
+        """Stop the worker threads after in-flight calls finish"""
+        self._executor.shutdown(wait=True)
+
+    async def load_catalog(self):
+        return await self._run(self.db.load_catalog)
+
+    async def refresh_catalog(self):
+        return await self._run(self.db.refresh_catalog)
+
+    async def reconcile_stats(self):
+        return await self._run(self.db.reconcile_stats)
+
+    def _answers_inline(self):
+        # The catalog's index answers in microseconds; road routing does not
+        return self.db.catalog is not None and self.db.router is None
+
+    async def find_nearest_hospitals(self, ambulance_lat, ambulance_lon, needs, k):
+        if self._answers_inline():
+            return self.db.find_nearest_hospitals(ambulance_lat, ambulance_lon, needs, k)
+        return await self._run(self.db.find_nearest_hospitals, ambulance_lat, ambulance_lon, needs, k)
+
+    async def find_and_hold(self, ambulance_lat, ambulance_lon, needs, k):
+        # Search and hold are one Database call under its dispatch lock, so
+        # no await separates them even when ranking runs on a worker thread
+        if self._answers_inline():
+            return self.db.find_and_hold(ambulance_lat, ambulance_lon, needs, k)
+        return await self._run(self.db.find_and_hold, ambulance_lat, ambulance_lon, needs, k)
+
+    async def create_emergency_request(self, patient_type, emergency_type, needs, hospital_id, candidates=None, hold_id=None):
+        if self.db.group_commit is not None:
+            request_ids = await self.create_emergency_requests([{
+                'patient_type': patient_type,
+                'emergency_type': emergency_type,
+                'needs': needs,
+                'hospital_id': hospital_id,
+                'candidates': candidates,
+                'hold_id': hold_id,
+            }])
+            return request_ids[0] if request_ids else None
+        return await self._run(
+            self.db.create_emergency_request,
+            patient_type, emergency_type, needs, hospital_id, candidates, hold_id
+        )
+
+    async def create_emergency_requests(self, requests):
+        # Group commit: wait on the batch's future without holding a worker thread
+        queue = self.db.group_commit
+        if queue is not None:
+            return await asyncio.wrap_future(queue.submit(requests))
+        return await self._run(self.db.create_emergency_requests, requests)
+
+    async def plan_dispatch_batch(self, ambulance_lat, ambulance_lon, patients):
+        # Ranking plus holds is one call under the dispatch lock, like
+        # find_and_hold; it stays on the loop when the catalog can answer it
+        if self._answers_inline():
+            return self.db.plan_dispatch_batch(ambulance_lat, ambulance_lon, patients)
+        return await self._run(self.db.plan_dispatch_batch, ambulance_lat, ambulance_lon, patients)
+
+    async def reroute_request(self, request_id):
+        return await self._run(self.db.reroute_request, request_id)
+
+    async def get_pending_requests(self, hospital_id=None, limit=None, after=None):
+        return await self._run(self.db.get_pending_requests, hospital_id, limit, after)
+
+    async def get_request_status(self, request_id):
+        return await self._run(self.db.get_request_status, request_id)
+
+    async def update_request_status(self, request_id, status):
+        return await self._run(self.db.update_request_status, request_id, status)
+
+    async def save_ambulance_positions(self):
+        return await self._run(self.db.save_ambulance_positions)
+
+    async def get_all_hospitals(self):
+        if self.db.catalog is not None:
+            return self.db.get_all_hospitals()
+        return await self._run(self.db.get_all_hospitals)
@@ -0,0 +1,315 @@
+import datetime
+import os
+import re
+import sqlite3
+from abc import ABC, abstractmethod
+
+try:
+    import mysql.connector
+    from mysql.connector import Error
+except ImportError:  # optional: the SQLite and in-memory backends run without it
+    mysql = None
+
+    class Error(Exception):
+        """Stand-in for mysql.connector.Error when the driver is not installed"""
+
+        def __init__(self, msg=None, errno=None):
+            super().__init__(msg)
+            self.msg = msg
+            self.errno = errno
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database_setup.sql')
+
+# Timestamps are stored as UTC text with microseconds, so they compare as strings
+SQLITE_NOW = "strftime('%Y-%m-%d %H:%M:%f000', 'now')"
+
+
+class StorageBackend(ABC):
+    """Where Database gets its connections from
+
+    connect() returns a DB-API connection with the mysql.connector surface
+    Database and ConnectionPool use: cursor(dictionary=...), commit(),
+    rollback(), in_transaction, is_connected(), ping() and close(), raising
+    Error on failure. `spatial` says whether MySQL spatial SQL is available
+    and `max_connections` caps the pool (None = no cap).
+    """
+
+    name = 'base'
+    spatial = False
+    max_connections = None
+
+    @abstractmethod
+    def connect(self):
+        """Open a new connection"""
+
+    def ensure_schema(self, conn):
+        """Create the tables on a fresh database (no-op where migrations manage them)"""
+
+
+class MySQLBackend(StorageBackend):
+    """The production MySQL server from config"""
+
+    name = 'mysql'
+    spatial = True
+
+    def __init__(self, config):
+        if mysql is None:
+            raise RuntimeError("The MySQL backend requires mysql-connector-python")
+        self.config = config
+
+    def connect(self):
+        return mysql.connector.connect(
+            host=self.config.MYSQL_HOST,
+            user=self.config.MYSQL_USER,
+            password=self.config.MYSQL_PASSWORD,
+            database=self.config.MYSQL_DB,
+            port=self.config.MYSQL_PORT
+        )
+
+
+def _timestamp_diff(match):
+    factor = {'SECOND': '86400', 'MICROSECOND': '86400000000'}[match.group(1)]
+    start, end = (
+        "'now'" if re.fullmatch(r'NOW\(6?\)', arg) else arg
+        for arg in (match.group(2), match.group(3))
+    )
+    return f"CAST((julianday({end}) - julianday({start})) * {factor} AS INTEGER)"
+
+
+# MySQL constructs used by Database, rewritten for SQLite (applied in order)
+SQLITE_QUERY_RULES = (
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\s+FOR UPDATE\b'), ''),
+    (re.compile(r'TIMESTAMPDIFF\((SECOND|MICROSECOND),\s*(NOW\(6?\)|[\w.]+),\s*(NOW\(6?\)|[\w.]+)\)'), _timestamp_diff),
+    (re.compile(r'NOW\(6\) \+ INTERVAL \? MICROSECOND'),
+     "strftime('%Y-%m-%d %H:%M:%f000', 'now', (? / 1000000.0) || ' seconds')"),
+    (re.compile(r'NOW\(6?\)'), SQLITE_NOW),
+    (re.compile(r'FROM_UNIXTIME\(\?\)'), "strftime('%Y-%m-%d %H:%M:%f000', ?, 'unixepoch')"),
+    (re.compile(r'UNIX_TIMESTAMP\(([\w.]+)\)'), r"((julianday(\1) - 2440587.5) * 86400.0)"),
+    (re.compile(r'ON DUPLICATE KEY UPDATE'), 'ON CONFLICT DO UPDATE SET'),
+    (re.compile(r'VALUES\((\w+)\)'), r'excluded.\1'),
+    (re.compile(r'\bIF\('), 'IIF('),
+    (re.compile(r'\bGREATEST\('), 'MAX('),
+)
+
+
+def translate_query(query):
+    """Rewrite one of Database's MySQL statements for SQLite"""
+    for pattern, replacement in SQLITE_QUERY_RULES:
+        query = pattern.sub(replacement, query)
+    return query
+
+
+def translate_schema(script):
+    """Rewrite database_setup.sql (CREATE TABLEs and sample rows) for SQLite
+
+    Drops the database/USE statements, table options and the generated
+    spatial `location` column (SPATIAL_SQL is never used on SQLite), turns
+    inline INDEXes into CREATE INDEX statements and ON UPDATE
+    CURRENT_TIMESTAMP columns into triggers.
+    """
+    script = '\n'.join(line for line in script.splitlines() if not line.strip().startswith('--'))
+    statements = []
+    for statement in script.split(';'):
+        statement = statement.strip()
+        if not statement or re.match(r'(CREATE DATABASE|USE|SELECT)\b', statement):
+            continue
+
+        table = re.match(r'CREATE TABLE IF NOT EXISTS (\w+)', statement)
+        if not table:
+            statements.append(statement)
+            continue
+        table = table.group(1)
+
+        body = statement[statement.index('(') + 1:statement.rindex(')')]
+        columns, indexes, triggers = [], [], []
+        for item in re.split(r',\s*\n', body):
+            item = item.strip()
+            if item.startswith('location') or item.startswith('SPATIAL INDEX'):
+                continue
+            index = re.match(r'INDEX (\w+) \((.+)\)', item)
+            if index:
+                indexes.append(f"CREATE INDEX IF NOT EXISTS {index.group(1)} ON {table} ({index.group(2)})")
+                continue
+            if 'ON UPDATE CURRENT_TIMESTAMP' in item and not item.startswith('FOREIGN KEY'):
+                column = item.split()[0]
+                triggers.append(
+                    f"CREATE TRIGGER IF NOT EXISTS {table}_{column}_touch AFTER UPDATE ON {table} "
+                    f"WHEN NEW.{column} IS OLD.{column} BEGIN "
+                    f"UPDATE {table} SET {column} = {SQLITE_NOW} WHERE rowid = NEW.rowid; END"
+                )
+                item = re.sub(r'\s+ON UPDATE CURRENT_TIMESTAMP(\(6\))?', '', item)
+            item = item.replace('INT PRIMARY KEY AUTO_INCREMENT', 'INTEGER PRIMARY KEY AUTOINCREMENT')
+            item = re.sub(r'CURRENT_TIMESTAMP(\(6\))?', f'({SQLITE_NOW})', item)
+            columns.append(item)
+
+        statements.append(f"CREATE TABLE IF NOT EXISTS {table} (\n  " + ",\n  ".join(columns) + "\n)")
+        statements.extend(indexes)
+        statements.extend(triggers)
+    return ';\n'.join(statements) + ';\n'
+
+
+def _adapt_datetime(value):
+    return value.isoformat(' ', timespec='microseconds')
+
+
+def _convert_timestamp(value):
+    return datetime.datetime.fromisoformat(value.decode())
+
+
+sqlite3.register_adapter(datetime.datetime, _adapt_datetime)
+sqlite3.register_converter('TIMESTAMP', _convert_timestamp)
+
+
+class SQLiteCursor:
+    """mysql.connector-style cursor over sqlite3 that translates each statement"""
+
+    def __init__(self, connection, dictionary=False):
+        self._connection = connection
+        self._cursor = connection.raw.cursor()
+        self._dictionary = dictionary
+        self.lastrowid = None
+        self.rowcount = -1
+
+    def _row(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return {column[0]: value for column, value in zip(self._cursor.description, row)}
+
+    def execute(self, query, params=()):
+        try:
+            if re.search(r'\bFOR UPDATE\b', query) and not self._connection.raw.in_transaction:
+                # Row locks become the database write lock, taken up front
+                self._cursor.execute("BEGIN IMMEDIATE")
+            self._cursor.execute(translate_query(query), tuple(params))
+        except sqlite3.Error as e:
+            raise Error(msg=str(e))
+        self.rowcount = self._cursor.rowcount
+        self.lastrowid = self._cursor.lastrowid
+        if self.rowcount > 1 and query.lstrip().upper().startswith('INSERT'):
+            # MySQL reports the first id of a multi-row INSERT, SQLite the last
+            self.lastrowid -= self.rowcount - 1
+
+    def executemany(self, query, rows):
+        try:
+            self._cursor.executemany(translate_query(query), [tuple(row) for row in rows])
+        except sqlite3.Error as e:
+            raise Error(msg=str(e))
+        self.rowcount = self._cursor.rowcount
+
+    def fetchone(self):
+        return self._row(self._cursor.fetchone())
+
+    def fetchall(self):
+        return [self._row(row) for row in self._cursor.fetchall()]
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """mysql.connector-style connection wrapper around sqlite3"""
+
+    def __init__(self, raw, owns_raw=True):
+        self.raw = raw
+        self._owns_raw = owns_raw
+        self._open = True
+
+    @property
+    def in_transaction(self):
+        return self.raw.in_transaction
+
+    def cursor(self, dictionary=False):
+        return SQLiteCursor(self, dictionary)
+
+    def commit(self):
+        try:
+            self.raw.commit()
+        except sqlite3.Error as e:
+            raise Error(msg=str(e))
+
+    def rollback(self):
+        self.raw.rollback()
+
+    def is_connected(self):
+        return self._open
+
+    def ping(self, reconnect=False, attempts=1, delay=0):
+        if not self._open:
+            raise Error(msg="Connection is closed")
+
+    def close(self):
+        self._open = False
+        if self._owns_raw:
+            self.raw.close()
+
+
+class SQLiteBackend(StorageBackend):
+    """A SQLite database file in WAL mode, for load testing without a MySQL server
+
+    The schema is database_setup.sql translated by translate_schema() and is
+    created on first connect. Writers serialize on the database lock;
+    SELECT ... FOR UPDATE takes it at the start of the transaction.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path, busy_timeout=5.0):
+        self.path = path
+        self.busy_timeout = busy_timeout
+
+    def _open(self, target, **kwargs):
+        raw = sqlite3.connect(
+            target, timeout=self.busy_timeout, check_same_thread=False,
+            detect_types=sqlite3.PARSE_DECLTYPES, **kwargs
+        )
+        raw.execute("PRAGMA foreign_keys = ON")
+        return raw
+
+    def connect(self):
+        raw = self._open(self.path)
+        raw.execute("PRAGMA journal_mode = WAL")
+        raw.execute("PRAGMA synchronous = NORMAL")
+        return SQLiteConnection(raw)
+
+    def ensure_schema(self, conn):
+        raw = conn.raw
+        exists = raw.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'hospitals'").fetchone()
+        if exists:
+            return
+        with open(SCHEMA_PATH) as f:
+            raw.executescript(translate_schema(f.read()))
+        raw.commit()
+
+
+class MemoryBackend(SQLiteBackend):
+    """A private in-memory SQLite database with the same schema
+
+    Every connection to ':memory:' is a separate database, so the backend
+    keeps one and the pool is capped at a single connection; a reconnect
+    gets the same database back. Nothing survives the process.
+    """
+
+    name = 'memory'
+    max_connections = 1
+
+    def __init__(self):
+        super().__init__(':memory:')
+        self._raw = None
+
+    def connect(self):
+        if self._raw is None:
+            self._raw = self._open(':memory:')
+        return SQLiteConnection(self._raw, owns_raw=False)
+
+
+def create_backend(config):
+    """The StorageBackend selected by config.DB_BACKEND (mysql, sqlite or memory)"""
+    kind = config.DB_BACKEND
+    if kind == 'mysql':
+        return MySQLBackend(config)
+    if kind == 'sqlite':
+        return SQLiteBackend(config.SQLITE_PATH)
+    if kind == 'memory':
+        return MemoryBackend()
+    raise ValueError(f"Unknown DB_BACKEND: {kind}")
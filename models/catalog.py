@@ -0,0 +1,203 @@
+import math
+import threading
+from contextlib import contextmanager
+
+from models.coverage import CoverageGrid
+from models.spatial_index import HospitalIndex, hospital_matches
+
+
+class HospitalCatalog:
+    """Process-level cache of the hospitals table
+
+    Holds the hospital rows, the spatial index built over them and a version
+    number that only ever increases: it advances with every capacity change
+    applied through the API and whenever a reload picks up a change made
+    outside it. The
+    fingerprint is the (row count, MAX(updated_at)) pair the reload was
+    based on, compared by the periodic probe.
+
+    With `coverage` ((bounds, cell_deg, depth)), lookups inside the service
+    region are answered from a precomputed CoverageGrid. Availability and
+    location changes are queued for it and applied by a background thread,
+    so holds placed on the event loop never wait for grid maintenance; until
+    a queued hospital is applied, lookups it could change use the KD-tree.
+    """
+
+    def __init__(self, hospitals, distance_fn, version=1, fingerprint=None, held=None, coverage=None):
+        self.hospitals = hospitals
+        self.version = version
+        self.fingerprint = fingerprint
+        self.distance_fn = distance_fn
+        self.index = HospitalIndex(hospitals, distance_fn, held)
+        self.coverage = CoverageGrid(self.index, *coverage) if coverage else None
+        self._lock = threading.Lock()
+        # Hospital ids whose grid update is queued, and the thread applying them
+        self._coverage_pending = set()
+        self._coverage_worker = None
+
+    def __len__(self):
+        return len(self.hospitals)
+
+    def get(self, hospital_id):
+        """Return the cached row for a hospital id, or None"""
+        return self.index.get(hospital_id)
+
+    def nearest_k(self, latitude, longitude, needs, k):
+        """Up to k hospital rows satisfying needs, nearest first (grid, else KD-tree)"""
+        coverage = self.coverage
+        if coverage is not None:
+            results = coverage.nearest_k(latitude, longitude, needs, k)
+            if results is not None and self._settled(latitude, longitude, needs, k, results):
+                return results
+        return self.index.nearest_k(latitude, longitude, needs, k)
+
+    def _settled(self, latitude, longitude, needs, k, results):
+        """Whether no queued grid update could change a grid answer"""
+        pending = list(self._coverage_pending)
+        if not pending:
+            return True
+        ids = {hospital['id'] for hospital in results}
+        # Rounded distances: leave a 0.01 km margin at the k-th
+        farthest = results[-1]['distance'] + 0.01 if len(results) == k else math.inf
+        for hospital_id in pending:
+            if hospital_id in ids:
+                return False
+            hospital = self.index.get(hospital_id)
+            if hospital is None or not hospital_matches(hospital, needs, self.index.held.get(hospital_id)):
+                continue
+            distance = self.distance_fn(
+                latitude, longitude, float(hospital['latitude']), float(hospital['longitude'])
+            )
+            if distance <= farthest:
+                return False
+        return True
+
+    def _availability_changed(self, hospital_id):
+        self.index.update_availability(hospital_id)
+        if self.coverage is not None:
+            self._queue_coverage(hospital_id)
+
+    def _queue_coverage(self, hospital_id):
+        """Queue a hospital's grid update for the background thread; call under the lock"""
+        self._coverage_pending.add(hospital_id)
+        if self._coverage_worker is None:
+            self._coverage_worker = threading.Thread(
+                target=self._maintain_coverage, name="coverage-grid", daemon=True
+            )
+            self._coverage_worker.start()
+
+    def _maintain_coverage(self):
+        """Apply queued grid updates, one hospital per lock hold, until none are left"""
+        while True:
+            with self._lock:
+                if not self._coverage_pending:
+                    self._coverage_worker = None
+                    return
+                hospital_id = next(iter(self._coverage_pending))
+                self.coverage.update(hospital_id)
+                self._coverage_pending.discard(hospital_id)
+
+    def wait_for_coverage(self, timeout=None):
+        """Block until every queued grid update has been applied (for tools and checks)"""
+        worker = self._coverage_worker
+        if worker is not None:
+            worker.join(timeout)
+
+    def adjust_availability(self, hospital_id, changes):
+        """Apply a committed capacity change ({column: delta}) to one cached row"""
+        with self._lock:
+            hospital = self.index.get(hospital_id)
+            if hospital is None:
+                return False
+            for column, delta in changes.items():
+                hospital[column] = hospital.get(column, 0) + delta
+            self._availability_changed(hospital_id)
+            self.version += 1
+            return True
+
+    def set_held(self, hospital_id, held):
+        """Update the units on soft hold at one hospital (not a catalog version change)"""
+        with self._lock:
+            if not self.index.set_held(hospital_id, held):
+                return False
+            if self.coverage is not None:
+                self._queue_coverage(hospital_id)
+            return True
+
+    def update_rows(self, rows):
+        """Overwrite cached rows with fresh copies read from the table
+
+        A hospital that moved gets the KD-tree rebuilt over the cached rows
+        and only its own cells of the coverage grid patched. Returns False,
+        without changing anything, if any row is new, in which case the
+        catalog must be rebuilt instead.
+        """
+        with self._lock:
+            moved = False
+            for row in rows:
+                cached = self.index.get(row['id'])
+                if cached is None:
+                    return False
+                if (float(cached['latitude']), float(cached['longitude'])) != (
+                        float(row['latitude']), float(row['longitude'])):
+                    moved = True
+
+            for row in rows:
+                self.index.get(row['id']).update(row)
+            if moved:
+                index = HospitalIndex(self.index.hospitals, self.distance_fn, self.index.held)
+                if self.coverage is not None:
+                    self.coverage.index = index
+                self.index = index
+            for row in rows:
+                self._availability_changed(row['id'])
+            if rows:
+                self.version += 1
+            return True
+
+
+class RefreshGate:
+    """Keeps catalog refreshes apart from capacity writes still in flight
+
+    A capacity write holds the gate (shared, any number at once) from before
+    its commit until its delta is applied to the catalog; a refresh holds it
+    alone while it reads the hospitals table and applies what it read. A
+    refresh therefore never reads a committed change the catalog has not
+    applied yet, which would otherwise be applied twice. A waiting refresh
+    keeps new writes out so it cannot be starved.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._writes = 0
+        self._waiting = 0
+        self._refreshing = False
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            while self._refreshing or self._waiting:
+                self._cond.wait()
+            self._writes += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writes -= 1
+                if not self._writes:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def refresh(self):
+        with self._cond:
+            self._waiting += 1
+            while self._refreshing or self._writes:
+                self._cond.wait()
+            self._waiting -= 1
+            self._refreshing = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._refreshing = False
+                self._cond.notify_all()
@@ -0,0 +1,304 @@
+import heapq
+import json
+import math
+
+import numpy as np
+
+# Bumped whenever the file layout or the build changes
+HIERARCHY_VERSION = 1
+
+HIERARCHY_MAGIC = b'ERCH'
+
+# Nodes a witness search may settle before giving up (more shortcuts, never wrong)
+WITNESS_SETTLE_LIMIT = 60
+
+# Backward search spaces kept for reuse; targets are hospitals, which rarely move
+TARGET_CACHE_SIZE = 4096
+
+# Arrays in the file start on this boundary so they can be mapped directly
+ALIGNMENT = 64
+
+ARRAYS = (
+    ('up_offsets', np.int64),
+    ('up_targets', np.int32),
+    ('up_weights', np.float32),
+    ('down_offsets', np.int64),
+    ('down_targets', np.int32),
+    ('down_weights', np.float32),
+)
+
+
+def _witness_distances(out, source, skip, targets, limit):
+    """Tentative distances from source avoiding `skip`, bounded by limit and settle count"""
+    dist = {source: 0.0}
+    heap = [(0.0, source)]
+    pending = set(targets)
+    settled = 0
+    while heap and pending and settled < WITNESS_SETTLE_LIMIT:
+        cost, node = heapq.heappop(heap)
+        if cost > dist[node]:
+            continue
+        if cost > limit:
+            break
+        pending.discard(node)
+        settled += 1
+        for neighbour, weight in out[node].items():
+            if neighbour == skip:
+                continue
+            new_cost = cost + weight
+            if new_cost < dist.get(neighbour, math.inf):
+                dist[neighbour] = new_cost
+                heapq.heappush(heap, (new_cost, neighbour))
+    return dist
+
+
+def _shortcuts(out, inn, node):
+    """(u, x, seconds) shortcuts needed to contract node without losing a shortest path"""
+    shortcuts = []
+    for u, to_node in inn[node].items():
+        via = {x: to_node + weight for x, weight in out[node].items() if x != u}
+        if not via:
+            continue
+        dist = _witness_distances(out, u, node, via, max(via.values()))
+        for x, seconds in via.items():
+            if dist.get(x, math.inf) > seconds:
+                shortcuts.append((u, x, seconds))
+    return shortcuts
+
+
+def build_hierarchy(graph):
+    """Contract a RoadGraph into a ContractionHierarchy
+
+    Nodes are contracted in order of edge difference plus contracted
+    neighbours plus hierarchy depth (lazily re-evaluated on pop), adding a
+    shortcut wherever a bounded witness search finds no path as short as
+    the one through the node.
+    Every node keeps its remaining edges to higher-ranked nodes: outgoing
+    ones form the upward graph, incoming ones the (reversed) downward graph.
+    """
+    n = len(graph)
+    offsets, targets, weights = graph.offsets.tolist(), graph.targets.tolist(), graph.weights.tolist()
+    out = [{} for _ in range(n)]
+    inn = [{} for _ in range(n)]
+    for u in range(n):
+        for edge in range(offsets[u], offsets[u + 1]):
+            v, weight = targets[edge], weights[edge]
+            if v != u and weight < out[u].get(v, math.inf):
+                out[u][v] = weight
+                inn[v][u] = weight
+
+    contracted_neighbours = [0] * n
+    level = [0] * n
+
+    def priority(node):
+        shortcuts = _shortcuts(out, inn, node)
+        edge_difference = len(shortcuts) - len(inn[node]) - len(out[node])
+        return edge_difference + contracted_neighbours[node] + level[node], shortcuts
+
+    heap = [(priority(node)[0], node) for node in range(n)]
+    heapq.heapify(heap)
+
+    up = [None] * n
+    down = [None] * n
+    while heap:
+        _, node = heapq.heappop(heap)
+        current, shortcuts = priority(node)
+        if heap and current > heap[0][0]:
+            heapq.heappush(heap, (current, node))
+            continue
+
+        up[node] = list(out[node].items())
+        down[node] = list(inn[node].items())
+        neighbours = set(out[node]) | set(inn[node])
+        for x in out[node]:
+            del inn[x][node]
+        for u in inn[node]:
+            del out[u][node]
+        out[node] = {}
+        inn[node] = {}
+        for u, x, seconds in shortcuts:
+            if seconds < out[u].get(x, math.inf):
+                out[u][x] = seconds
+                inn[x][u] = seconds
+        for neighbour in neighbours:
+            contracted_neighbours[neighbour] += 1
+            level[neighbour] = max(level[neighbour], level[node] + 1)
+
+    return ContractionHierarchy(*_to_csr(up), *_to_csr(down))
+
+
+def _to_csr(adjacency):
+    offsets = np.zeros(len(adjacency) + 1, dtype=np.int64)
+    np.cumsum([len(edges) for edges in adjacency], out=offsets[1:])
+    targets = np.fromiter((x for edges in adjacency for x, _ in edges), dtype=np.int32, count=int(offsets[-1]))
+    weights = np.fromiter((w for edges in adjacency for _, w in edges), dtype=np.float32, count=int(offsets[-1]))
+    return offsets, targets, weights
+
+
+def load_hierarchy(path, source=None):
+    """Map a hierarchy file, or None if missing or built from a different source"""
+    try:
+        return ContractionHierarchy.load(path, source)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error reading contraction hierarchy: {e}")
+        return None
+
+
+class ContractionHierarchy:
+    """Contraction hierarchy over a RoadGraph's nodes, answering travel times
+
+    up_* holds, per node, edges to higher-ranked nodes in travel direction;
+    down_* holds, per node, edges from higher-ranked nodes reversed. A
+    shortest path always climbs then descends the ranking, so a query is two
+    small upward searches that meet in the middle. Loaded files are
+    memory-mapped: startup reads only the header.
+    """
+
+    def __init__(self, up_offsets, up_targets, up_weights, down_offsets, down_targets, down_weights):
+        self.up = (up_offsets, up_targets, up_weights)
+        self.down = (down_offsets, down_targets, down_weights)
+        # Decoded edge lists of the nodes queries have touched; the top of
+        # the hierarchy is shared by nearly every search
+        self._up_edges = {}
+        self._down_edges = {}
+        self._target_spaces = {}
+
+    def __len__(self):
+        return len(self.up[0]) - 1
+
+    @property
+    def edge_count(self):
+        return len(self.up[1]) + len(self.down[1])
+
+    def save(self, path, source=None):
+        """Write the hierarchy in a layout load() can memory-map"""
+        arrays = [np.ascontiguousarray(array, dtype=dtype)
+                  for array, (_, dtype) in zip(self.up + self.down, ARRAYS)]
+        header = {'source': [int(x) for x in source] if source is not None else None, 'arrays': {}}
+
+        # Offsets depend on the header length, which depends on the offsets:
+        # reserve generously and pad the header to the reserved size
+        reserved = 1024
+        offset = reserved
+        for (name, _), array in zip(ARRAYS, arrays):
+            offset = -(-offset // ALIGNMENT) * ALIGNMENT
+            header['arrays'][name] = [offset, len(array)]
+            offset += array.nbytes
+        encoded = json.dumps(header).encode()
+        prefix = HIERARCHY_MAGIC + np.array([HIERARCHY_VERSION, len(encoded)], dtype='<u4').tobytes()
+        if len(prefix) + len(encoded) > reserved:
+            raise ValueError("Hierarchy header too large")
+
+        with open(path, 'wb') as f:
+            f.write(prefix + encoded)
+            for (name, _), array in zip(ARRAYS, arrays):
+                f.seek(header['arrays'][name][0])
+                f.write(array.tobytes())
+
+    @classmethod
+    def load(cls, path, source=None):
+        """Memory-map a hierarchy file; returns None if built from a different source"""
+        with open(path, 'rb') as f:
+            prefix = f.read(12)
+            if prefix[:4] != HIERARCHY_MAGIC:
+                raise ValueError(f"{path} is not a contraction hierarchy file")
+            version, length = np.frombuffer(prefix[4:], dtype='<u4')
+            if version != HIERARCHY_VERSION:
+                return None
+            header = json.loads(f.read(int(length)))
+
+        if source is not None and header['source'] != [int(x) for x in source]:
+            return None
+        arrays = []
+        for name, dtype in ARRAYS:
+            offset, count = header['arrays'][name]
+            if count:
+                mapped = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(count,))
+                # Plain ndarray view of the mapping: slicing a memmap is far slower
+                arrays.append(mapped.view(np.ndarray))
+            else:
+                arrays.append(np.zeros(0, dtype=dtype))
+        return cls(*arrays)
+
+    @staticmethod
+    def _edges(graph, cache, node):
+        edges = cache.get(node)
+        if edges is None:
+            offsets, targets, weights = graph
+            start, end = offsets[node:node + 2].tolist()
+            edges = cache[node] = list(zip(targets[start:end].tolist(), weights[start:end].tolist()))
+        return edges
+
+    def _upward(self, node, forward):
+        """Shortest distances to the nodes reachable upward from node
+
+        Stall-on-demand: a node reached more cheaply through a higher
+        neighbour (via the opposite graph's edges) is neither relaxed nor
+        returned, since no shortest path meets there.
+        """
+        if forward:
+            search, search_cache, stall, stall_cache = self.up, self._up_edges, self.down, self._down_edges
+        else:
+            search, search_cache, stall, stall_cache = self.down, self._down_edges, self.up, self._up_edges
+
+        dist = {node: 0.0}
+        heap = [(0.0, node)]
+        settled = {}
+        stalled = set()
+        while heap:
+            cost, current = heapq.heappop(heap)
+            if current in settled or current in stalled:
+                continue
+            if any(dist.get(higher, math.inf) + weight < cost
+                   for higher, weight in self._edges(stall, stall_cache, current)):
+                stalled.add(current)
+                continue
+            settled[current] = cost
+            for neighbour, weight in self._edges(search, search_cache, current):
+                new_cost = cost + weight
+                if new_cost < dist.get(neighbour, math.inf):
+                    dist[neighbour] = new_cost
+                    heapq.heappush(heap, (new_cost, neighbour))
+        return settled
+
+    def many_to_many(self, sources, targets):
+        """Travel-time matrix {source: {target: seconds}} via bucket search
+
+        One backward upward search per target fills per-node buckets; one
+        forward upward search per source then scans the buckets it meets.
+        Backward search spaces are cached, so repeat targets cost nothing.
+        Unreachable pairs are missing.
+        """
+        buckets = {}
+        for target in set(targets):
+            space = self._target_spaces.get(target)
+            if space is None:
+                if len(self._target_spaces) >= TARGET_CACHE_SIZE:
+                    self._target_spaces.clear()
+                space = self._target_spaces[target] = self._upward(target, forward=False)
+            for node, cost in space.items():
+                buckets.setdefault(node, []).append((target, cost))
+
+        matrix = {}
+        for source in set(sources):
+            best = {}
+            for node, cost in self._upward(source, forward=True).items():
+                for target, remaining in buckets.get(node, ()):
+                    total = cost + remaining
+                    if total < best.get(target, math.inf):
+                        best[target] = total
+            matrix[source] = best
+        return matrix
+
+    def travel_times(self, source, targets, limit=None):
+        """Same contract as RoadGraph.travel_times, answered from the hierarchy"""
+        times = self.many_to_many([source], targets)[source]
+        if limit is not None:
+            times = {target: seconds for target, seconds in times.items() if seconds <= limit}
+        return times
+
+    def route(self, source, target):
+        """Fastest travel time in seconds between two nodes, or None"""
+        return self.many_to_many([source], [target])[source].get(target)
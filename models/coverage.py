@@ -0,0 +1,220 @@
+import bisect
+import math
+
+import numpy as np
+
+from models.haversine import EARTH_RADIUS_KM, haversine_distances
+from models.spatial_index import BED, ICU, OXYGEN, VENTILATOR, needs_mask
+
+# Every mask PatientNeeds can produce: a bed plus any mix of the others
+NEED_MASKS = tuple(
+    BED | icu | oxygen | ventilator
+    for icu in (0, ICU) for oxygen in (0, OXYGEN) for ventilator in (0, VENTILATOR)
+)
+
+
+def parse_bounds(value):
+    """(south, west, north, east) from 'south,west,north,east', or None if empty"""
+    if not value:
+        return None
+    south, west, north, east = (float(part) for part in value.split(','))
+    if not (south < north and west < east):
+        raise ValueError(f"Invalid coverage bounds: {value}")
+    return south, west, north, east
+
+
+def _pairwise_km(lat1, lon1, lat2, lon2):
+    """Element-wise haversine (km) between arrays of points in radians"""
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+class CoverageGrid:
+    """Precomputed nearest-hospital candidates for every cell of a service region
+
+    The region is tiled into cell_deg x cell_deg cells. For each cell and
+    each needs mask the grid stores, by distance from the cell centre, every
+    hospital that currently has those resources within a threshold T: the
+    centre distance of the depth-th such hospital plus twice the cell's
+    radius. Any point in the cell is within one radius of the centre, so
+    its k nearest (k <= depth) are guaranteed to be in that list and a
+    lookup is one cell access plus ranking a few rows.
+
+    The grid shares the HospitalIndex's rows and capability masks. After a
+    hospital's masks or location change, update() patches only the cells
+    whose lists it leaves or now qualifies for.
+    """
+
+    def __init__(self, index, bounds, cell_deg=0.01, depth=10):
+        self.index = index
+        self.south, self.west, north, east = bounds
+        self.cell_deg = cell_deg
+        self.depth = depth
+        self.rows = max(1, math.ceil((north - self.south) / cell_deg))
+        self.cols = max(1, math.ceil((east - self.west) / cell_deg))
+
+        row, col = np.divmod(np.arange(self.rows * self.cols), self.cols)
+        self.cell_lat = self.south + (row + 0.5) * cell_deg
+        self.cell_lon = self.west + (col + 0.5) * cell_deg
+        self.cell_lat_rad = np.radians(self.cell_lat)
+        self.cell_lon_rad = np.radians(self.cell_lon)
+        # Centre to corner; the corner nearer the equator is the farthest
+        corner_lat = np.radians(self.cell_lat - np.sign(self.cell_lat) * cell_deg / 2)
+        self.radius = _pairwise_km(
+            self.cell_lat_rad, self.cell_lon_rad,
+            corner_lat, np.radians(self.cell_lon + cell_deg / 2)
+        )
+
+        hospitals = index.hospitals
+        self._lat = [float(h['latitude']) for h in hospitals]
+        self._lon = [float(h['longitude']) for h in hospitals]
+        self._lat_rad = np.radians(self._lat)
+        self._lon_rad = np.radians(self._lon)
+        self._masks = list(index.masks)
+
+        # entries[mask][cell] = (T, [(centre km, hospital index), ...]) sorted;
+        # which cells list a hospital is found from T, not stored per hospital
+        cells = len(self.cell_lat)
+        self.entries = {mask: [None] * cells for mask in NEED_MASKS}
+        self.thresholds = {mask: np.full(cells, math.inf) for mask in NEED_MASKS}
+
+        mask_array = np.asarray(self._masks, dtype=np.int64)
+        capable = {mask: np.nonzero((mask_array & mask) == mask)[0] for mask in NEED_MASKS}
+        for cell in range(cells):
+            distances = haversine_distances(self.cell_lat[cell], self.cell_lon[cell], self._lat_rad, self._lon_rad)
+            for mask in NEED_MASKS:
+                self._fill(mask, cell, capable[mask], distances[capable[mask]])
+
+    def __len__(self):
+        return len(self.cell_lat)
+
+    def locate(self, latitude, longitude):
+        """Cell number containing a coordinate, or None outside the region"""
+        row = math.floor((latitude - self.south) / self.cell_deg)
+        col = math.floor((longitude - self.west) / self.cell_deg)
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return row * self.cols + col
+        return None
+
+    def _store(self, mask, cell, threshold, entry):
+        # One tuple, replaced whole, so lock-free readers see T and list together
+        self.entries[mask][cell] = (threshold, entry)
+        self.thresholds[mask][cell] = threshold
+
+    def _fill(self, mask, cell, positions, distances, complete=True):
+        """Store capable hospitals (positions, centre distances) within the cell's threshold
+
+        complete says positions are every capable hospital; only then may a
+        list of depth or fewer go unbounded (T = inf).
+        """
+        if len(positions) > self.depth or not complete:
+            threshold = float(np.partition(distances, self.depth - 1)[self.depth - 1] + 2 * self.radius[cell])
+            keep = distances <= threshold
+            positions, distances = positions[keep], distances[keep]
+        else:
+            threshold = math.inf
+        entry = sorted(zip(distances.tolist(), positions.tolist()))
+        self._store(mask, cell, threshold, entry)
+
+    def _refill(self, mask, cell):
+        """Rebuild one list from bounded KD-tree queries around the cell centre"""
+        latitude, longitude = float(self.cell_lat[cell]), float(self.cell_lon[cell])
+        positions = np.asarray(self.index.nearest_positions(latitude, longitude, mask, self.depth), dtype=np.intp)
+        complete = len(positions) < self.depth
+        if not complete:
+            reach = haversine_distances(latitude, longitude, self._lat_rad[positions], self._lon_rad[positions]).max()
+            radius = float(reach + 2 * self.radius[cell]) + 1e-6
+            positions = np.asarray(self.index.positions_within(latitude, longitude, mask, radius), dtype=np.intp)
+        distances = haversine_distances(latitude, longitude, self._lat_rad[positions], self._lon_rad[positions])
+        self._fill(mask, cell, positions, distances, complete)
+
+    def update(self, hospital_id):
+        """Patch the cells affected by one hospital's new masks or location
+
+        Call after the HospitalIndex has recomputed the hospital's mask.
+        Lists the hospital leaves shrink, and are refilled from bounded
+        KD-tree queries only if fewer than depth hospitals remain; lists it
+        now qualifies for (centre distance within T) gain it, trimming T when
+        they grow long. The cells to visit are found from the thresholds, so
+        nothing per hospital is kept.
+        """
+        i = self.index.positions.get(hospital_id)
+        if i is None:
+            return False
+        hospital = self.index.hospitals[i]
+        latitude, longitude = float(hospital['latitude']), float(hospital['longitude'])
+        moved = (latitude, longitude) != (self._lat[i], self._lon[i])
+        old_mask, new_mask = self._masks[i], self.index.masks[i]
+        if not moved and old_mask == new_mask:
+            return True
+
+        old_distances = haversine_distances(self._lat[i], self._lon[i], self.cell_lat_rad, self.cell_lon_rad)
+        self._lat[i], self._lon[i] = latitude, longitude
+        self._lat_rad[i], self._lon_rad[i] = math.radians(latitude), math.radians(longitude)
+        self._masks[i] = new_mask
+        distances = haversine_distances(latitude, longitude, self.cell_lat_rad, self.cell_lon_rad)
+
+        for mask in NEED_MASKS:
+            was = old_mask & mask == mask
+            now = new_mask & mask == mask
+            if was and (moved or not now):
+                # Lists holding i are those whose T reaches its old position
+                for cell in np.nonzero(old_distances <= self.thresholds[mask] + 1e-6)[0].tolist():
+                    self._remove(mask, cell, i)
+            if now and (moved or not was):
+                for cell in np.nonzero(distances <= self.thresholds[mask])[0].tolist():
+                    self._insert(mask, cell, i, float(distances[cell]))
+        return True
+
+    def _remove(self, mask, cell, i):
+        threshold, entry = self.entries[mask][cell]
+        remaining = [item for item in entry if item[1] != i]
+        if len(remaining) == len(entry):
+            return
+        if len(remaining) < self.depth and threshold != math.inf:
+            self._refill(mask, cell)
+        else:
+            self._store(mask, cell, threshold, remaining)
+
+    def _insert(self, mask, cell, i, distance):
+        threshold, entry = self.entries[mask][cell]
+        if any(item[1] == i for item in entry):
+            return
+        entry = list(entry)
+        bisect.insort(entry, (distance, i))
+        # Trim long lists, and bound one that held every capable hospital
+        if len(entry) > 2 * self.depth or (threshold == math.inf and len(entry) > self.depth):
+            threshold = entry[self.depth - 1][0] + 2 * float(self.radius[cell])
+            entry = [item for item in entry if item[0] <= threshold]
+        self._store(mask, cell, threshold, entry)
+
+    def nearest_k(self, latitude, longitude, needs, k):
+        """Same result as HospitalIndex.nearest_k, or None when the grid cannot answer
+
+        None means outside the region, k above depth, or (defensively) a
+        list that cannot prove its k-th hospital is the true k-th.
+        """
+        if k > self.depth or k <= 0:
+            return None
+        cell = self.locate(latitude, longitude)
+        if cell is None:
+            return None
+
+        threshold, entry = self.entries[needs_mask(needs)][cell]
+        hospitals = self.index.hospitals
+        distance_fn = self.index.distance_fn
+        ranked = sorted(
+            (distance_fn(latitude, longitude, float(hospitals[i]['latitude']), float(hospitals[i]['longitude'])), i)
+            for _, i in entry
+        )
+        if threshold != math.inf:
+            # Hospitals left out are at least T - radius away from this point
+            if len(ranked) < k or ranked[k - 1][0] > threshold - self.radius[cell] - 1e-9:
+                return None
+
+        results = []
+        for distance, i in ranked[:k]:
+            hospital = dict(hospitals[i])
+            hospital['distance'] = round(distance, 2)
+            results.append(hospital)
+        return results
@@ -1,38 +1,87 @@
-import mysql.connector
-from mysql.connector import Error
 import math
+import threading
+import uuid
+
+from models.backends import Error, create_backend
+from models.pool import ConnectionPool
+from models.haversine import bounding_box, coordinate_arrays, haversine_distances, top_k
+from models.catalog import HospitalCatalog, RefreshGate
+from models.coverage import parse_bounds
+from models.holds import HoldLedger
+from models.dispatch import need_columns, plan_batch
+from models.spatial_index import hospital_matches
+from models.stats import DispatchStats
+
+# Explicit column list so the binary `location` geometry is never fetched
+HOSPITAL_COLUMNS = (
+    "id, name, latitude, longitude, available_beds, available_icu, "
+    "available_oxygen, available_ventilator, created_at"
+)
+
+# Half the Earth's circumference: a box this large already covers the globe
+MAX_SEARCH_RADIUS_KM = 20016
+
+def reservation_columns(request):
+    """Hospital capacity columns an accepted request (a table row) holds one unit of"""
+    return need_columns({
+        'icu': request.get('need_icu'),
+        'oxygen': request.get('need_oxygen'),
+        'ventilator': request.get('need_ventilator'),
+    })
 
 class Database:
     """Database connection and operations manager"""
     
-    def __init__(self, config):
-        """Initialize database connection"""
+    def __init__(self, config, backend=None):
+        """Initialize database connection (backend defaults to config.DB_BACKEND)"""
         self.config = config
-        self.connection = None
+        self.backend = backend or create_backend(config)
+        self.pool = None
+        self.catalog = None
+        self.events = None
+        self.fleet = None
+        self.router = None
+        self.group_commit = None
+        self.stats = DispatchStats()
+        self.holds = HoldLedger(config.HOLD_TTL_SECONDS) if config.HOLD_TTL_SECONDS > 0 else None
+        # Serializes ranking with the holds placed on its result
+        self._dispatch_lock = threading.Lock()
+        # Capacity writes (shared) versus catalog refreshes (exclusive)
+        self._refresh_gate = RefreshGate()
         
+    def _open_connection(self):
+        """Open a new connection for the pool"""
+        return self.backend.connect()
+    
     def connect(self):
-        """Create database connection"""
+        """Create the connection pool and verify the database is reachable"""
+        size = self.config.MYSQL_POOL_SIZE
+        if self.backend.max_connections is not None:
+            size = min(size, self.backend.max_connections)
         try:
-            self.connection = mysql.connector.connect(
-                host=self.config.MYSQL_HOST,
-                user=self.config.MYSQL_USER,
-                password=self.config.MYSQL_PASSWORD,
-                database=self.config.MYSQL_DB,
-                port=self.config.MYSQL_PORT
+            self.pool = ConnectionPool(
+                self._open_connection,
+                size=size,
+                timeout=self.config.MYSQL_POOL_TIMEOUT,
+                health_check_interval=self.config.MYSQL_POOL_HEALTH_CHECK
             )
-            if self.connection.is_connected():
-                return True
+            with self.pool.connection() as conn:
+                self.backend.ensure_schema(conn)
+                return conn.is_connected()
         except Error as e:
-            print(f"Error connecting to MySQL: {e}")
+            print(f"Error connecting to {self.backend.name} database: {e}")
             return False
     
     def disconnect(self):
-        """Close database connection"""
-        if self.connection and self.connection.is_connected():
-            self.connection.close()
+        """Close all pooled connections"""
+        if self.pool:
+            self.pool.close()
     
     def calculate_distance(self, lat1, lon1, lat2, lon2):
-        """Calculate distance between two coordinates using Haversine formula"""
+        """Calculate distance between two coordinates using Haversine formula
+        
+        Scalar reference implementation; bulk scans use models.haversine.
+        """
         R = 6371  # Earth's radius in kilometers
         
         dlat = math.radians(lat2 - lat1)
@@ -46,103 +95,653 @@ class Database:
         distance = R * c
         return distance
     
-    def find_nearest_hospital(self, ambulance_lat, ambulance_lon, needs):
-        """Find nearest hospital with required facilities"""
+    def load_catalog(self):
+        """Load (or reload) the in-process hospital catalog and its spatial index
+        
+        Returns the number of hospitals cached.
+        """
+        with self._refresh_gate.refresh():
+            return self._load_catalog()
+    
+    def _load_catalog(self):
+        fingerprint = self.probe_hospitals()
+        hospitals = self._fetch_hospitals()
+        
+        previous = self.catalog
+        if not hospitals:
+            self.catalog = None
+        else:
+            version = previous.version + 1 if previous else 1
+            held = self.holds.totals() if self.holds else None
+            bounds = parse_bounds(self.config.COVERAGE_BOUNDS)
+            coverage = (bounds, self.config.COVERAGE_CELL_DEG, self.config.COVERAGE_DEPTH) if bounds else None
+            self.catalog = HospitalCatalog(hospitals, self.calculate_distance, version, fingerprint, held, coverage)
+        return len(hospitals)
+    
+    def refresh_catalog(self):
+        """Reload the catalog if the hospitals table changed behind its back
+        
+        Cheap probe (row count and MAX(updated_at)) meant to run periodically.
+        When only existing rows changed, just those rows are re-read and
+        patched into the catalog; otherwise it is rebuilt. Returns True when
+        the catalog changed. The re-read waits for capacity writes in flight,
+        so it never picks up a change before that write applies it itself.
+        """
+        if not self._catalog_stale():
+            return False
+        
+        with self._refresh_gate.refresh():
+            fingerprint = self._catalog_stale()
+            if not fingerprint:
+                return False
+            catalog = self.catalog
+            current = catalog.fingerprint if catalog else (0, None)
+            if catalog is not None and fingerprint[0] == current[0] and current[1] is not None:
+                rows = self._fetch_hospitals_since(current[1])
+                if rows is not None and catalog.update_rows(rows):
+                    catalog.fingerprint = fingerprint
+                    return True
+            self._load_catalog()
+            return True
+    
+    def _catalog_stale(self):
+        """The probed fingerprint if it differs from the catalog's, else None"""
+        fingerprint = self.probe_hospitals()
+        if fingerprint is None:
+            return None
+        catalog = self.catalog
+        current = catalog.fingerprint if catalog else (0, None)
+        return fingerprint if fingerprint != current else None
+    
+    def probe_hospitals(self):
+        """Return the (row count, last update) fingerprint of the hospitals table"""
         try:
-            cursor = self.connection.cursor(dictionary=True)
-            
-            # Build query based on needs
-            query = """
-                SELECT * FROM hospitals 
-                WHERE available_beds > 0
-            """
-            
-            if needs.get('icu'):
-                query += " AND available_icu > 0"
-            if needs.get('oxygen'):
-                query += " AND available_oxygen > 0"
-            if needs.get('ventilator'):
-                query += " AND available_ventilator > 0"
-            
-            cursor.execute(query)
-            hospitals = cursor.fetchall()
-            
-            if not hospitals:
-                return None
-            
-            # Calculate distances and find nearest
-            nearest_hospital = None
-            min_distance = float('inf')
-            
-            for hospital in hospitals:
-                distance = self.calculate_distance(
-                    ambulance_lat, ambulance_lon,
-                    float(hospital['latitude']), float(hospital['longitude'])
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT COUNT(*), MAX(updated_at) FROM hospitals")
+                count, updated = cursor.fetchone()
+                cursor.close()
+                return (count, updated)
+        except Error as e:
+            print(f"Error probing hospitals: {e}")
+            return None
+    
+    def _fetch_hospitals_since(self, updated_at):
+        """Read the hospitals updated at or after a timestamp (None on error)"""
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor(dictionary=True)
+                cursor.execute(
+                    f"SELECT {HOSPITAL_COLUMNS} FROM hospitals WHERE updated_at >= %s",
+                    (updated_at,)
                 )
-                
-                if distance < min_distance:
-                    min_distance = distance
-                    nearest_hospital = hospital
-                    nearest_hospital['distance'] = round(distance, 2)
-            
-            cursor.close()
-            return nearest_hospital
-            
+                hospitals = cursor.fetchall()
+                cursor.close()
+                return hospitals
         except Error as e:
-            print(f"Error finding nearest hospital: {e}")
+            print(f"Error fetching changed hospitals: {e}")
+            return None
+    
+    def hold_capacity(self, hospital_id, needs):
+        """Place a soft hold for a dispatch's needs at the chosen hospital
+        
+        Returns the hold id (None when holds are disabled); pass it to
+        create_emergency_request so the hold follows the request.
+        """
+        if self.holds is None:
             return None
+        hold_id = self.holds.place(hospital_id, need_columns(needs))
+        self._sync_holds([hospital_id])
+        return hold_id
+    
+    def release_hold(self, hold_id):
+        """Drop a hold that did not turn into a request"""
+        if self.holds is not None and hold_id is not None:
+            self._sync_holds(self.holds.release(hold_id))
     
-    def create_emergency_request(self, patient_type, emergency_type, needs, hospital_id):
-        """Create new emergency request"""
+    def expire_holds(self):
+        """Drop expired holds so their capacity ranks as free again"""
+        if self.holds is not None:
+            self._sync_holds(self.holds.expire())
+    
+    def _sync_holds(self, hospital_ids):
+        """Push the held totals of some hospitals into the catalog's index"""
+        catalog = self.catalog
+        if catalog is None:
+            return
+        for hospital_id in set(hospital_ids):
+            catalog.set_held(hospital_id, self.holds.held(hospital_id))
+    
+    def load_holds(self):
+        """Restore unexpired holds from the capacity_holds table
+        
+        Only used with HOLDS_PERSIST; expired rows are purged. Returns the
+        number of holds restored.
+        """
+        if self.holds is None or not self.config.HOLDS_PERSIST:
+            return 0
         try:
-            cursor = self.connection.cursor()
-            
-            query = """
-                INSERT INTO emergency_requests 
-                (patient_type, emergency_type, need_bed, need_icu, need_oxygen, need_ventilator, hospital_id, status)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, 'Pending')
-            """
-            
-            values = (
-                patient_type,
-                emergency_type,
-                True,  # Bed is always mandatory
-                needs.get('icu', False),
-                needs.get('oxygen', False),
-                needs.get('ventilator', False),
-                hospital_id
+            with self.pool.connection() as conn:
+                cursor = conn.cursor(dictionary=True)
+                cursor.execute("DELETE FROM capacity_holds WHERE expires_at <= NOW(6)")
+                cursor.execute(
+                    """
+                    SELECT request_id, hospital_id, need_icu, need_oxygen, need_ventilator,
+                           TIMESTAMPDIFF(MICROSECOND, NOW(6), expires_at) AS remaining
+                    FROM capacity_holds
+                    """
+                )
+                rows = cursor.fetchall()
+                conn.commit()
+                cursor.close()
+        except Error as e:
+            print(f"Error loading capacity holds: {e}")
+            return 0
+        
+        for row in rows:
+            self.holds.place(
+                row['hospital_id'], reservation_columns(row),
+                request_id=row['request_id'], ttl=row['remaining'] / 1e6
             )
-            
-            cursor.execute(query, values)
-            self.connection.commit()
-            request_id = cursor.lastrowid
-            cursor.close()
-            
-            return request_id
+        self._sync_holds(row['hospital_id'] for row in rows)
+        return len(rows)
+    
+    def find_nearest_hospital(self, ambulance_lat, ambulance_lon, needs):
+        """Find nearest hospital with required facilities"""
+        hospitals = self.find_nearest_hospitals(ambulance_lat, ambulance_lon, needs, 1)
+        return hospitals[0] if hospitals else None
+    
+    def find_nearest_hospitals(self, ambulance_lat, ambulance_lon, needs, k):
+        """Find up to k hospitals with required facilities, nearest first
+        
+        Capacity on soft hold by other dispatches does not count as available.
+        With a road graph loaded (self.router), the ROUTING_CANDIDATES
+        nearest in a straight line are re-ranked by drive time.
+        """
+        self.expire_holds()
+        router = self.router
+        if router is None:
+            return self._find_nearest_hospitals(ambulance_lat, ambulance_lon, needs, k)
+        
+        candidates = self._find_nearest_hospitals(
+            ambulance_lat, ambulance_lon, needs, max(k, self.config.ROUTING_CANDIDATES)
+        )
+        return router.rank(ambulance_lat, ambulance_lon, candidates, k)
+    
+    def find_and_hold(self, ambulance_lat, ambulance_lon, needs, k):
+        """Rank up to k hospitals and hold the needs at the first, atomically
+        
+        No other dispatch can rank hospitals between this search and its
+        hold, so two concurrent dispatches never both count the same last
+        unit. Returns (candidates, hold_id); hold_id is None when nothing
+        was found or holds are disabled.
+        """
+        with self._dispatch_lock:
+            candidates = self.find_nearest_hospitals(ambulance_lat, ambulance_lon, needs, k)
+            if not candidates:
+                return candidates, None
+            return candidates, self.hold_capacity(candidates[0]['id'], needs)
+    
+    def _find_nearest_hospitals(self, ambulance_lat, ambulance_lon, needs, k):
+        """Straight-line (haversine) k-nearest search behind find_nearest_hospitals"""
+        catalog = self.catalog
+        if catalog is not None:
+            return catalog.nearest_k(ambulance_lat, ambulance_lon, needs, k)
+        held = self.holds.totals() if self.holds else {}
+        
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor(dictionary=True)
+                
+                # Build query based on needs
+                query = f"""
+                    SELECT {HOSPITAL_COLUMNS} FROM hospitals 
+                    WHERE available_beds > 0
+                """
+                
+                if needs.get('icu'):
+                    query += " AND available_icu > 0"
+                if needs.get('oxygen'):
+                    query += " AND available_oxygen > 0"
+                if needs.get('ventilator'):
+                    query += " AND available_ventilator > 0"
+                
+                # Search an expanding box around the ambulance. Every hospital
+                # within `radius` lies inside the box, so once k matches are
+                # within the radius they are the k nearest overall.
+                radius = self.config.SPATIAL_SEARCH_RADIUS_KM
+                while True:
+                    full_scan = radius >= MAX_SEARCH_RADIUS_KM
+                    if full_scan:
+                        cursor.execute(query)
+                    else:
+                        box_clause, box_params = self._bounding_box_clause(
+                            bounding_box(ambulance_lat, ambulance_lon, radius)
+                        )
+                        cursor.execute(query + box_clause, box_params)
+                    hospitals = cursor.fetchall()
+                    if held:
+                        hospitals = [
+                            h for h in hospitals
+                            if hospital_matches(h, needs, held.get(h['id']))
+                        ]
+                    
+                    # Calculate all distances in one vectorized pass
+                    if hospitals:
+                        lat_rad, lon_rad = coordinate_arrays(hospitals)
+                        distances = haversine_distances(ambulance_lat, ambulance_lon, lat_rad, lon_rad)
+                        within = int((distances <= radius).sum())
+                    else:
+                        within = 0
+                    
+                    if full_scan or within >= k:
+                        break
+                    radius *= 4
+                
+                cursor.close()
+                
+                if not hospitals:
+                    return []
+                
+                ranked = []
+                for index in top_k(distances, k):
+                    hospital = hospitals[index]
+                    hospital['distance'] = round(float(distances[index]), 2)
+                    ranked.append(hospital)
+                return ranked
+                
+        except Error as e:
+            print(f"Error finding nearest hospitals: {e}")
+            return []
+    
+    def _bounding_box_clause(self, box):
+        """SQL condition (and params) restricting hospitals to a lat/lon box
+        
+        Uses the SPATIAL index on `location` when SPATIAL_SQL_ENABLED and the
+        backend supports it, else a plain range on the (latitude, longitude)
+        index for databases without MySQL spatial support.
+        """
+        lat_min, lat_max, lon_min, lon_max = box
+        if self.config.SPATIAL_SQL_ENABLED and self.backend.spatial:
+            polygon = (
+                f"POLYGON(({lat_min} {lon_min}, {lat_max} {lon_min}, {lat_max} {lon_max}, "
+                f"{lat_min} {lon_max}, {lat_min} {lon_min}))"
+            )
+            return (
+                " AND MBRCovers(ST_GeomFromText(%s, 4326, 'axis-order=lat-long'), location)",
+                (polygon,)
+            )
+        return (
+            " AND latitude BETWEEN %s AND %s AND longitude BETWEEN %s AND %s",
+            (lat_min, lat_max, lon_min, lon_max)
+        )
+    
+    def create_emergency_request(self, patient_type, emergency_type, needs, hospital_id, candidates=None, hold_id=None):
+        """Create new emergency request
+        
+        candidates is the ranked hospital list from find_nearest_hospitals; it
+        is stored with the request so a rejection can fall through to the next
+        hospital without a new search. hold_id (from hold_capacity) is
+        attached to the new request, or released if it cannot be created.
+        """
+        request_ids = self.create_emergency_requests([{
+            'patient_type': patient_type,
+            'emergency_type': emergency_type,
+            'needs': needs,
+            'hospital_id': hospital_id,
+            'candidates': candidates,
+            'hold_id': hold_id,
+        }])
+        return request_ids[0] if request_ids else None
+    
+    def create_emergency_requests(self, requests):
+        """Create several emergency requests in one transaction
+        
+        Each item is a dict with the create_emergency_request arguments.
+        Returns the list of ids, or None (with every hold released) on error.
+        With group commit enabled the rows join the next shared batch, and
+        this returns once that batch has committed.
+        """
+        queue = self.group_commit
+        if queue is not None:
+            return queue.submit(requests).result()
+        return self.write_emergency_requests(requests)
+    
+    def write_emergency_requests(self, requests, release_holds=True):
+        """Insert emergency requests now, in one transaction
+        
+        All rows go in with a single multi-row INSERT. Its auto-increment ids
+        need not be consecutive (innodb_autoinc_lock_mode=2, or an
+        auto_increment_increment above 1), so a multi-row batch is tagged
+        with a batch_token and its ids are read back by batch_row; a single
+        row uses lastrowid. Returns the list of ids, or
+        None if the INSERT or commit failed, releasing the holds unless
+        release_holds is False (the group commit queue retries a failed batch
+        request by request). Errors after the commit are logged and the ids
+        still returned, so committed rows are never retried.
+        """
+        if not requests:
+            return []
+        committed = False
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                batch_token = uuid.uuid4().hex if len(requests) > 1 else None
+                
+                query = """
+                    INSERT INTO emergency_requests 
+                    (patient_type, emergency_type, need_bed, need_icu, need_oxygen, need_ventilator, hospital_id, status,
+                     batch_token, batch_row)
+                    VALUES 
+                """ + ", ".join(["(%s, %s, %s, %s, %s, %s, %s, 'Pending', %s, %s)"] * len(requests))
+                
+                values = []
+                for row, request in enumerate(requests):
+                    needs = request['needs']
+                    values.extend((
+                        request['patient_type'],
+                        request['emergency_type'],
+                        True,  # Bed is always mandatory
+                        needs.get('icu', False),
+                        needs.get('oxygen', False),
+                        needs.get('ventilator', False),
+                        request['hospital_id'],
+                        batch_token,
+                        row if batch_token else None
+                    ))
+                
+                cursor.execute(query, values)
+                if batch_token is None:
+                    request_ids = [cursor.lastrowid]
+                else:
+                    cursor.execute(
+                        "SELECT batch_row, id FROM emergency_requests WHERE batch_token = %s",
+                        (batch_token,)
+                    )
+                    ids = dict(cursor.fetchall())
+                    request_ids = [ids[row] for row in range(len(requests))]
+                
+                candidate_rows = [
+                    (request_id, rank, hospital['id'], hospital['distance'])
+                    for request_id, request in zip(request_ids, requests)
+                    for rank, hospital in enumerate(request.get('candidates') or [])
+                ]
+                if candidate_rows:
+                    cursor.executemany(
+                        """
+                        INSERT INTO request_candidates (request_id, candidate_rank, hospital_id, distance)
+                        VALUES (%s, %s, %s, %s)
+                        """,
+                        candidate_rows
+                    )
+                
+                held = []
+                for request_id, request in zip(request_ids, requests):
+                    hold_id = request.get('hold_id')
+                    remaining = self.holds.remaining(hold_id) if self.holds and hold_id else None
+                    if remaining:
+                        held.append((request_id, request, hold_id, remaining))
+                if held and self.config.HOLDS_PERSIST:
+                    cursor.executemany(
+                        """
+                        INSERT INTO capacity_holds
+                        (request_id, hospital_id, need_icu, need_oxygen, need_ventilator, expires_at)
+                        VALUES (%s, %s, %s, %s, %s, NOW(6) + INTERVAL %s MICROSECOND)
+                        """,
+                        [
+                            (
+                                request_id, request['hospital_id'],
+                                request['needs'].get('icu', False),
+                                request['needs'].get('oxygen', False),
+                                request['needs'].get('ventilator', False),
+                                int(remaining * 1e6)
+                            )
+                            for request_id, request, hold_id, remaining in held
+                        ]
+                    )
+                
+                conn.commit()
+                committed = True
+                cursor.close()
+                
+                for request_id, request, hold_id, remaining in held:
+                    self.holds.attach(hold_id, request_id)
+                for request_id, request in zip(request_ids, requests):
+                    self.stats.record_created(request['hospital_id'])
+                for request_id in request_ids:
+                    self._publish_request(conn, 'request_created', request_id)
+                return request_ids
             
         except Error as e:
+            if committed:
+                # The rows exist; failing here would make the caller insert them again
+                print(f"Error after creating emergency requests: {e}")
+                return request_ids
             print(f"Error creating emergency request: {e}")
-            self.connection.rollback()
+            if release_holds:
+                for request in requests:
+                    self.release_hold(request.get('hold_id'))
             return None
     
-    def get_pending_requests(self):
-        """Get all pending emergency requests"""
+    def plan_dispatch_batch(self, ambulance_lat, ambulance_lon, patients):
+        """Assign a batch of patients from one origin to hospitals
+        
+        patients are dicts with 'patient_type', 'emergency_type' and 'needs'.
+        Hospitals are ranked once per distinct set of needs and filled
+        greedily by severity without exceeding their capacity (minus soft
+        holds); see models.dispatch.plan_batch. A hold is placed for each
+        placed patient, under the same lock as find_and_hold. Returns
+        plan_batch's list with 'hold_id' added.
+        """
+        with self._dispatch_lock:
+            self.expire_holds()
+            held = self.holds.totals() if self.holds else {}
+            count = len(patients) + self.config.CANDIDATE_COUNT
+            
+            def ranked_for(needs):
+                return self.find_nearest_hospitals(ambulance_lat, ambulance_lon, needs, count)
+            
+            plan = plan_batch(patients, ranked_for, held, self.config.CANDIDATE_COUNT)
+            for patient, assignment in zip(patients, plan):
+                if assignment is not None:
+                    assignment['hold_id'] = self.hold_capacity(assignment['hospital']['id'], patient['needs'])
+            return plan
+    
+    def reroute_request(self, request_id):
+        """Move a rejected request to its next ranked candidate hospital
+        
+        Candidates that no longer have the required facilities (per the
+        hospital catalog) are skipped. Returns the new hospital as a dict with
+        'id', 'name' and 'distance'; True when there is no candidate left, in
+        which case the request is marked Rejected; None when the request does
+        not exist; False on database error.
+        """
+        hold_from = None
         try:
-            cursor = self.connection.cursor(dictionary=True)
+            with self._refresh_gate.write(), self.pool.connection() as conn:
+                cursor = conn.cursor(dictionary=True)
+                
+                cursor.execute(
+                    "SELECT * FROM emergency_requests WHERE id = %s FOR UPDATE",
+                    (request_id,)
+                )
+                request = cursor.fetchone()
+                if not request:
+                    cursor.close()
+                    return None
+                if request['status'] != 'Pending':
+                    # Not pending any more: keep the plain reject behaviour
+                    # (releasing the reservation of an accepted request)
+                    changes = self._change_status(cursor, request_id, request, 'Rejected')
+                    conn.commit()
+                    cursor.close()
+                    self._status_changed(conn, request_id, request, 'Rejected', changes)
+                    return True
+                
+                query = """
+                    SELECT rc.hospital_id AS id, h.name, rc.distance
+                    FROM request_candidates rc
+                    JOIN request_candidates cur
+                      ON cur.request_id = rc.request_id AND cur.hospital_id = %s
+                    JOIN hospitals h ON h.id = rc.hospital_id
+                    WHERE rc.request_id = %s AND rc.candidate_rank > cur.candidate_rank
+                    ORDER BY rc.candidate_rank
+                """
+                cursor.execute(query, (request['hospital_id'], request_id))
+                remaining = cursor.fetchall()
+                
+                needs = {
+                    'icu': request['need_icu'],
+                    'oxygen': request['need_oxygen'],
+                    'ventilator': request['need_ventilator'],
+                }
+                catalog = self.catalog
+                next_hospital = None
+                # Check and claim under the dispatch lock, as find_and_hold does,
+                # so no dispatch can take the candidate's last unit in between
+                with self._dispatch_lock:
+                    for candidate in remaining:
+                        if catalog is not None:
+                            cached = catalog.get(candidate['id'])
+                            held = self.holds.held(candidate['id']) if self.holds else None
+                            if cached is None or not hospital_matches(cached, needs, held):
+                                continue
+                        next_hospital = candidate
+                        break
+                    if next_hospital and self.holds:
+                        self._sync_holds(self.holds.move_request(request_id, next_hospital['id']))
+                        hold_from = request['hospital_id']
+                
+                # Guard on the current hospital so concurrent rejections advance once
+                if next_hospital:
+                    cursor.execute(
+                        """
+                        UPDATE emergency_requests SET hospital_id = %s
+                        WHERE id = %s AND hospital_id = %s AND status = 'Pending'
+                        """,
+                        (next_hospital['id'], request_id, request['hospital_id'])
+                    )
+                else:
+                    cursor.execute(
+                        """
+                        UPDATE emergency_requests SET status = 'Rejected'
+                        WHERE id = %s AND hospital_id = %s AND status = 'Pending'
+                        """,
+                        (request_id, request['hospital_id'])
+                    )
+                moved = cursor.rowcount
+                if moved and self.config.HOLDS_PERSIST:
+                    if next_hospital:
+                        cursor.execute(
+                            "UPDATE capacity_holds SET hospital_id = %s WHERE request_id = %s",
+                            (next_hospital['id'], request_id)
+                        )
+                    else:
+                        cursor.execute("DELETE FROM capacity_holds WHERE request_id = %s", (request_id,))
+                conn.commit()
+                cursor.close()
+                
+                if not moved and hold_from is not None:
+                    # Another rejection moved the request first; give the claim back
+                    self._sync_holds(self.holds.move_request(request_id, hold_from))
+                if moved:
+                    if next_hospital:
+                        self.stats.record_transition(
+                            'Pending', request['hospital_id'], 'Pending', next_hospital['id']
+                        )
+                    else:
+                        self.stats.record_transition(
+                            'Pending', request['hospital_id'], 'Rejected', request['hospital_id']
+                        )
+                        if self.holds:
+                            self._sync_holds(self.holds.release_request(request_id))
+                self._publish_request(
+                    conn, 'request_updated', request_id,
+                    request['hospital_id'] if moved and next_hospital else None
+                )
+                if not next_hospital:
+                    return True
+                next_hospital['distance'] = float(next_hospital['distance'])
+                return next_hospital
             
-            query = """
+        except Error as e:
+            print(f"Error rerouting request: {e}")
+            if hold_from is not None:
+                self._sync_holds(self.holds.move_request(request_id, hold_from))
+            return False
+    
+    def _publish_request(self, conn, event_type, request_id, previous_hospital_id=None):
+        """Publish a committed request change, with its current row, on the change bus
+        
+        previous_hospital_id is set when the change moved the request to
+        another hospital, so filtered subscribers can drop it. The write has
+        already committed, so a failed read is logged and subscribers are
+        told to resync instead of failing the caller.
+        """
+        if self.events is None or not self.events.has_subscribers:
+            return
+        
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(
+                """
                 SELECT er.*, h.name as hospital_name
                 FROM emergency_requests er
                 JOIN hospitals h ON er.hospital_id = h.id
-                WHERE er.status = 'Pending'
-                ORDER BY er.created_at DESC
-            """
-            
-            cursor.execute(query)
-            requests = cursor.fetchall()
+                WHERE er.id = %s
+                """,
+                (request_id,)
+            )
+            request = cursor.fetchone()
             cursor.close()
-            
-            return requests
+        except Error as e:
+            print(f"Error publishing request change: {e}")
+            self.events.publish({'type': 'resync'})
+            return
+        
+        if request:
+            event = {'type': event_type, 'request': request}
+            if previous_hospital_id is not None:
+                event['previous_hospital_id'] = previous_hospital_id
+            self.events.publish(event)
+    
+    def get_pending_requests(self, hospital_id=None, limit=None, after=None):
+        """Get pending emergency requests, newest first
+        
+        Optionally restricted to one hospital and paginated by keyset: `after`
+        is the (created_at, id) of the last row of the previous page and
+        `limit` the page size. Served by the (hospital_id, status, created_at,
+        id) index, so each page costs the same however large the table is.
+        """
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor(dictionary=True)
+                
+                query = """
+                    SELECT er.*, h.name as hospital_name
+                    FROM emergency_requests er
+                    JOIN hospitals h ON er.hospital_id = h.id
+                    WHERE er.status = 'Pending'
+                """
+                params = []
+                
+                if hospital_id is not None:
+                    query += " AND er.hospital_id = %s"
+                    params.append(hospital_id)
+                if after is not None:
+                    query += " AND (er.created_at < %s OR (er.created_at = %s AND er.id < %s))"
+                    params.extend([after[0], after[0], after[1]])
+                
+                query += " ORDER BY er.created_at DESC, er.id DESC"
+                if limit is not None:
+                    query += " LIMIT %s"
+                    params.append(limit)
+                
+                cursor.execute(query, params)
+                requests = cursor.fetchall()
+                cursor.close()
+                
+                return requests
             
         except Error as e:
             print(f"Error fetching pending requests: {e}")
@@ -151,52 +750,235 @@ class Database:
     def get_request_status(self, request_id):
         """Get status of a specific request"""
         try:
-            cursor = self.connection.cursor(dictionary=True)
-            
-            query = """
-                SELECT er.*, h.name as hospital_name
-                FROM emergency_requests er
-                JOIN hospitals h ON er.hospital_id = h.id
-                WHERE er.id = %s
-            """
-            
-            cursor.execute(query, (request_id,))
-            request = cursor.fetchone()
-            cursor.close()
-            
-            return request
+            with self.pool.connection() as conn:
+                cursor = conn.cursor(dictionary=True)
+                
+                query = """
+                    SELECT er.*, h.name as hospital_name
+                    FROM emergency_requests er
+                    JOIN hospitals h ON er.hospital_id = h.id
+                    WHERE er.id = %s
+                """
+                
+                cursor.execute(query, (request_id,))
+                request = cursor.fetchone()
+                cursor.close()
+                
+                return request
             
         except Error as e:
             print(f"Error fetching request status: {e}")
             return None
     
     def update_request_status(self, request_id, status):
-        """Update request status (Accept/Reject)"""
+        """Update request status (Accept/Reject/Cancel)
+        
+        Accepting reserves one bed, plus one of each resource the request
+        needs, at its hospital in the same transaction as the status change;
+        moving an accepted request to any other status releases them. Only
+        a Pending request can be accepted. Returns True on success, None when
+        the request does not exist, is no longer Pending (for acceptance) or
+        the hospital no longer has the capacity, False on database error.
+        """
         try:
-            cursor = self.connection.cursor()
-            
-            query = "UPDATE emergency_requests SET status = %s WHERE id = %s"
-            cursor.execute(query, (status, request_id))
-            self.connection.commit()
-            cursor.close()
-            
-            return True
+            # Gate before borrowing a connection: a refresh waiting on us needs one
+            with self._refresh_gate.write(), self.pool.connection() as conn:
+                cursor = conn.cursor(dictionary=True)
+                
+                # Lock the row so concurrent changes reserve/release only once
+                cursor.execute(
+                    """
+                    SELECT status, hospital_id, need_icu, need_oxygen, need_ventilator,
+                           TIMESTAMPDIFF(SECOND, created_at, NOW()) AS age_seconds
+                    FROM emergency_requests WHERE id = %s FOR UPDATE
+                    """,
+                    (request_id,)
+                )
+                request = cursor.fetchone()
+                if not request:
+                    conn.rollback()
+                    cursor.close()
+                    return None
+                
+                changes = self._change_status(cursor, request_id, request, status)
+                if changes is None:
+                    conn.rollback()
+                    cursor.close()
+                    return None
+                conn.commit()
+                cursor.close()
+                
+                self._status_changed(conn, request_id, request, status, changes)
+                return True
             
         except Error as e:
             print(f"Error updating request status: {e}")
-            self.connection.rollback()
             return False
     
+    def _change_status(self, cursor, request_id, request, status):
+        """Set the status of a locked request row, reserving or releasing capacity
+        
+        Returns the capacity change made ({column: delta}, empty when none),
+        or None if the request cannot be accepted (it is not Pending, or a
+        required resource is exhausted). The caller commits or rolls back.
+        """
+        if status == 'Accepted' and request['status'] != 'Pending':
+            # Cancelled, Rejected and already Accepted requests stay as they are
+            return None
+        
+        delta = 0
+        if status == 'Accepted' and request['status'] != 'Accepted':
+            delta = -1
+        elif request['status'] == 'Accepted' and status != 'Accepted':
+            delta = 1
+        
+        changes = {}
+        if delta:
+            columns = reservation_columns(request)
+            operator = '-' if delta < 0 else '+'
+            query = "UPDATE hospitals SET " + ", ".join(
+                f"{column} = {column} {operator} 1" for column in columns
+            ) + " WHERE id = %s"
+            if delta < 0:
+                # Conditional decrement: no row matches once anything ran out
+                query += "".join(f" AND {column} > 0" for column in columns)
+            cursor.execute(query, (request['hospital_id'],))
+            if cursor.rowcount != 1:
+                return None
+            changes = {column: delta for column in columns}
+        
+        cursor.execute(
+            "UPDATE emergency_requests SET status = %s WHERE id = %s AND status = %s",
+            (status, request_id, request['status'])
+        )
+        # MySQL counts changed rows only, so a no-op update reports 0
+        if status != request['status'] and cursor.rowcount != 1:
+            return None
+        if request['status'] == 'Pending' and status != 'Pending' and self.config.HOLDS_PERSIST:
+            cursor.execute("DELETE FROM capacity_holds WHERE request_id = %s", (request_id,))
+        return changes
+    
+    def _status_changed(self, conn, request_id, request, status, changes):
+        """Mirror a committed status change into the catalog, stats and change bus"""
+        catalog = self.catalog
+        if changes and catalog is not None:
+            catalog.adjust_availability(request['hospital_id'], changes)
+        if self.holds is not None and request['status'] == 'Pending' and status != 'Pending':
+            # Leaving Pending ends the soft hold (acceptance replaced it with a reservation)
+            self._sync_holds(self.holds.release_request(request_id))
+        self.stats.record_transition(
+            request['status'], request['hospital_id'], status, request['hospital_id'],
+            request.get('age_seconds')
+        )
+        self._publish_request(conn, 'request_updated', request_id)
+    
+    def count_requests(self):
+        """Return (hospital_id, status, count) rows for every request"""
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    """
+                    SELECT hospital_id, status, COUNT(*)
+                    FROM emergency_requests
+                    GROUP BY hospital_id, status
+                    """
+                )
+                rows = cursor.fetchall()
+                cursor.close()
+                return rows
+        except Error as e:
+            print(f"Error counting requests: {e}")
+            return None
+    
+    def reconcile_stats(self):
+        """Replace the in-memory request counters with counts from the table
+        
+        Returns True when the counters were refreshed.
+        """
+        rows = self.count_requests()
+        if rows is None:
+            return False
+        self.stats.reconcile(rows)
+        return True
+    
+    def save_ambulance_positions(self):
+        """Write the latest position of every ambulance that moved since the last call
+        
+        One upsert row per ambulance, however many reports it sent in the
+        meantime. On error the ambulances are queued again for the next
+        call. Returns the number of rows written.
+        """
+        if self.fleet is None:
+            return 0
+        rows = self.fleet.drain_dirty()
+        if not rows:
+            return 0
+        
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                # recorded_at is assigned last so the guards compare against the stored time
+                cursor.executemany(
+                    """
+                    INSERT INTO ambulance_positions (ambulance_id, latitude, longitude, recorded_at)
+                    VALUES (%s, %s, %s, FROM_UNIXTIME(%s))
+                    ON DUPLICATE KEY UPDATE
+                      latitude = IF(VALUES(recorded_at) >= recorded_at, VALUES(latitude), latitude),
+                      longitude = IF(VALUES(recorded_at) >= recorded_at, VALUES(longitude), longitude),
+                      recorded_at = GREATEST(recorded_at, VALUES(recorded_at))
+                    """,
+                    rows
+                )
+                conn.commit()
+                cursor.close()
+                return len(rows)
+        except Error as e:
+            print(f"Error saving ambulance positions: {e}")
+            self.fleet.mark_dirty(row[0] for row in rows)
+            return 0
+    
+    def load_ambulance_positions(self):
+        """Seed the fleet store with the positions saved before a restart"""
+        if self.fleet is None:
+            return 0
+        try:
+            with self.pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    """
+                    SELECT ambulance_id, latitude, longitude, UNIX_TIMESTAMP(recorded_at)
+                    FROM ambulance_positions
+                    """
+                )
+                rows = cursor.fetchall()
+                cursor.close()
+        except Error as e:
+            print(f"Error loading ambulance positions: {e}")
+            return 0
+        
+        self.fleet.load(
+            (ambulance_id, float(latitude), float(longitude), float(recorded_at))
+            for ambulance_id, latitude, longitude, recorded_at in rows
+        )
+        return len(rows)
+    
     def get_all_hospitals(self):
-        """Get all hospitals"""
+        """Get all hospitals (served from the catalog once it is loaded)"""
+        catalog = self.catalog
+        if catalog is not None:
+            return list(catalog.hospitals)
+        return self._fetch_hospitals()
+    
+    def _fetch_hospitals(self):
+        """Read all hospitals from the database"""
         try:
-            cursor = self.connection.cursor(dictionary=True)
-            cursor.execute("SELECT * FROM hospitals")
-            hospitals = cursor.fetchall()
-            cursor.close()
-            return hospitals
+            with self.pool.connection() as conn:
+                cursor = conn.cursor(dictionary=True)
+                cursor.execute(f"SELECT {HOSPITAL_COLUMNS} FROM hospitals ORDER BY id")
+                hospitals = cursor.fetchall()
+                cursor.close()
+                return hospitals
         except Error as e:
             print(f"Error fetching hospitals: {e}")
             return []
-
-
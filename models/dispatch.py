@@ -0,0 +1,70 @@
+from models.spatial_index import needs_mask
+
+# Lower sorts first: serious patients are placed before normal ones
+SEVERITY_ORDER = {'Serious': 0, 'Normal': 1}
+
+# Capacity column behind each PatientNeeds flag (a bed is always needed)
+NEED_COLUMNS = (
+    ('icu', 'available_icu'),
+    ('oxygen', 'available_oxygen'),
+    ('ventilator', 'available_ventilator'),
+)
+
+
+def need_columns(needs):
+    """Capacity columns one unit of which a patient with these needs takes"""
+    return ['available_beds'] + [column for need, column in NEED_COLUMNS if needs.get(need)]
+
+
+def severity_key(patient):
+    """Sort key: severity first, then the patient needing the most resources"""
+    return (
+        SEVERITY_ORDER.get(patient['patient_type'], len(SEVERITY_ORDER)),
+        -len(need_columns(patient['needs'])),
+    )
+
+
+def plan_batch(patients, ranked_for, held=None, candidate_count=5):
+    """Assign a batch of patients to hospitals under capacity constraints
+
+    Greedy by severity: patients are taken in severity_key order and each
+    gets the nearest hospital that still has a unit of everything it needs
+    after the units on soft hold (`held`) and those given to patients placed
+    before it. ranked_for(needs) returns hospital rows nearest first; it is
+    called once per distinct combination of needs.
+
+    Returns one entry per patient, in input order: a dict with the
+    'hospital' row and its ranked fallback 'candidates' (starting with the
+    hospital itself), or None when no listed hospital has room.
+    """
+    held = held or {}
+    rankings = {}
+    remaining = {}
+
+    def free(hospital, column):
+        key = (hospital['id'], column)
+        if key not in remaining:
+            remaining[key] = hospital.get(column, 0) - held.get(hospital['id'], {}).get(column, 0)
+        return remaining[key]
+
+    plan = [None] * len(patients)
+    order = sorted(range(len(patients)), key=lambda i: severity_key(patients[i]))
+    for i in order:
+        needs = patients[i]['needs']
+        mask = needs_mask(needs)
+        if mask not in rankings:
+            rankings[mask] = ranked_for(needs)
+        columns = need_columns(needs)
+
+        available = [
+            hospital for hospital in rankings[mask]
+            if all(free(hospital, column) > 0 for column in columns)
+        ]
+        if not available:
+            continue
+
+        chosen = available[0]
+        for column in columns:
+            remaining[(chosen['id'], column)] -= 1
+        plan[i] = {'hospital': chosen, 'candidates': available[:candidate_count]}
+    return plan
@@ -0,0 +1,66 @@
+import asyncio
+
+
+class ChangeBus:
+    """In-process publish/subscribe channel for emergency request changes
+
+    Database methods publish from worker threads; subscribers are asyncio
+    queues consumed on the event loop (e.g. the SSE stream handlers).
+    """
+
+    QUEUE_SIZE = 100
+
+    def __init__(self):
+        self._subscribers = set()
+        self._waiters = {}
+        self._loop = None
+
+    def subscribe(self):
+        """Register a new subscriber queue; must be called on the event loop"""
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self._subscribers.discard(queue)
+
+    def watch(self, request_id):
+        """Future resolved with the next event for one request; call on the event loop"""
+        self._loop = asyncio.get_running_loop()
+        future = self._loop.create_future()
+        self._waiters.setdefault(request_id, set()).add(future)
+        return future
+
+    def unwatch(self, request_id, future):
+        waiters = self._waiters.get(request_id)
+        if waiters is not None:
+            waiters.discard(future)
+            if not waiters:
+                del self._waiters[request_id]
+
+    @property
+    def has_subscribers(self):
+        return bool(self._subscribers or self._waiters)
+
+    def publish(self, event):
+        """Deliver an event to every subscriber; safe to call from any thread"""
+        if self._loop is None or self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._dispatch, event)
+
+    def _dispatch(self, event):
+        request = event.get('request')
+        if request is not None:
+            for future in self._waiters.pop(request['id'], ()):
+                if not future.done():
+                    future.set_result(event)
+
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow consumer: drop its backlog and ask it to reload
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({'type': 'resync'})
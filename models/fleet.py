@@ -0,0 +1,105 @@
+import threading
+import time
+from collections import deque
+
+
+class FleetPositions:
+    """Live ambulance positions, kept in memory
+
+    Holds the latest reported position of each ambulance plus a ring buffer
+    of its last `history_size` positions. A report older than the one
+    already held (by its recorded_at time) is ignored, so out-of-order
+    delivery never moves a vehicle backwards.
+
+    Ambulances whose position changed are remembered until drain_dirty()
+    hands them out, which lets the database be updated in periodic batches
+    with one row per moved ambulance rather than one per report.
+    """
+
+    def __init__(self, history_size=60):
+        self.history_size = history_size
+        self._latest = {}
+        self._history = {}
+        self._dirty = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._latest)
+
+    def update(self, ambulance_id, latitude, longitude, recorded_at=None):
+        """Record a position report; returns False if it was older than the current one"""
+        recorded_at = time.time() if recorded_at is None else recorded_at
+        return self.ingest([(ambulance_id, latitude, longitude, recorded_at)]) == 1
+
+    def ingest(self, pings):
+        """Record many (ambulance_id, latitude, longitude, recorded_at) reports at once
+
+        Returns the number applied; the rest were older than the position
+        already held for their ambulance.
+        """
+        applied = 0
+        with self._lock:
+            latest = self._latest
+            history = self._history
+            dirty = self._dirty
+            for ping in pings:
+                ambulance_id = ping[0]
+                current = latest.get(ambulance_id)
+                if current is not None and current[3] > ping[3]:
+                    continue
+                latest[ambulance_id] = ping
+                track = history.get(ambulance_id)
+                if track is None:
+                    track = history[ambulance_id] = deque(maxlen=self.history_size)
+                track.append(ping)
+                dirty.add(ambulance_id)
+                applied += 1
+        return applied
+
+    def load(self, pings):
+        """Seed positions read back from the database (not marked for writing)"""
+        with self._lock:
+            for ping in pings:
+                current = self._latest.get(ping[0])
+                if current is None or current[3] < ping[3]:
+                    self._latest[ping[0]] = ping
+                    self._history.setdefault(ping[0], deque(maxlen=self.history_size)).append(ping)
+
+    def latest(self, ambulance_id):
+        """Return the last position of an ambulance as a dict, or None"""
+        with self._lock:
+            ping = self._latest.get(ambulance_id)
+        return self._as_dict(ping) if ping is not None else None
+
+    def positions(self):
+        """Last position of every ambulance, as dicts"""
+        with self._lock:
+            pings = list(self._latest.values())
+        return [self._as_dict(ping) for ping in pings]
+
+    def track(self, ambulance_id):
+        """Recent positions of an ambulance, oldest first"""
+        with self._lock:
+            pings = list(self._history.get(ambulance_id, ()))
+        return [self._as_dict(ping) for ping in pings]
+
+    def drain_dirty(self):
+        """Latest (ambulance_id, latitude, longitude, recorded_at) of every ambulance
+        that moved since the previous call"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            return [self._latest[ambulance_id] for ambulance_id in dirty]
+
+    def mark_dirty(self, ambulance_ids):
+        """Queue ambulances for the next drain again (e.g. after a failed write)"""
+        with self._lock:
+            self._dirty.update(ambulance_ids)
+
+    @staticmethod
+    def _as_dict(ping):
+        return {
+            'ambulance_id': ping[0],
+            'latitude': ping[1],
+            'longitude': ping[2],
+            'recorded_at': ping[3],
+        }
@@ -0,0 +1,118 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+
+class GroupCommitQueue:
+    """Write-behind queue that commits many callers' inserts in one transaction
+
+    submit() enqueues a list of rows and returns a Future. A single writer
+    thread hands everything queued (up to max_batch rows) to
+    write_batch(rows, release_holds=False) as one batch. While one commit is
+    in flight the next batch builds up, so the number of commits follows
+    fsync latency while throughput follows concurrency; a lone request is
+    written at once. `window` (seconds) optionally makes the writer wait
+    that long after the first row for more to arrive.
+
+    Futures resolve only after the batch commits, with the caller's ids in
+    submission order. If a batch's INSERT or commit fails (write_batch
+    returns None), each submission in it is retried on its own (with holds
+    released on failure) so one bad row cannot fail its neighbours; a
+    submission that still fails resolves to None. write_batch must return
+    the ids of rows it committed even if a later step fails, or they would
+    be inserted twice.
+    """
+
+    def __init__(self, write_batch, window=0.0, max_batch=500):
+        self.write_batch = write_batch
+        self.window = window
+        self.max_batch = max_batch
+        self.batches = 0
+        self.rows = 0
+        self._pending = deque()
+        self._pending_rows = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+        self._thread.start()
+
+    def submit(self, rows):
+        """Queue rows for the next batch; the Future resolves to their ids (or None)"""
+        future = Future()
+        if not rows:
+            future.set_result([])
+            return future
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Group commit queue is closed")
+            self._pending.append((rows, future))
+            self._pending_rows += len(rows)
+            self._cond.notify()
+        return future
+
+    def close(self):
+        """Flush everything queued, then stop the writer thread"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def _take_batch(self):
+        """Block until a batch is due; returns [(rows, future), ...] or None once closed"""
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if not self._pending:
+                return None
+
+            deadline = time.monotonic() + self.window
+            while not self._closed and self._pending_rows < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            # Whole submissions only; a single oversized one still goes alone
+            batch = []
+            count = 0
+            while self._pending and (not batch or count + len(self._pending[0][0]) <= self.max_batch):
+                rows, future = self._pending.popleft()
+                batch.append((rows, future))
+                count += len(rows)
+            self._pending_rows -= count
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            self._flush(batch)
+
+    def _flush(self, batch):
+        rows = [row for submission, _ in batch for row in submission]
+        try:
+            ids = self.write_batch(rows, release_holds=len(batch) == 1)
+        except Exception as e:
+            print(f"Error in group commit: {e}")
+            ids = None
+        self.batches += 1
+        self.rows += len(rows)
+
+        if ids is not None:
+            start = 0
+            for submission, future in batch:
+                future.set_result(ids[start:start + len(submission)])
+                start += len(submission)
+            return
+
+        if len(batch) == 1:
+            batch[0][1].set_result(None)
+            return
+        for submission, future in batch:
+            try:
+                future.set_result(self.write_batch(submission, release_holds=True))
+            except Exception as e:
+                print(f"Error in group commit: {e}")
+                future.set_result(None)
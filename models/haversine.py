@@ -0,0 +1,71 @@
+import numpy as np
+
+EARTH_RADIUS_KM = 6371
+
+
+def coordinate_arrays(hospitals):
+    """Return contiguous float64 latitude/longitude arrays (radians) for hospital rows"""
+    count = len(hospitals)
+    lat = np.fromiter((float(h['latitude']) for h in hospitals), dtype=np.float64, count=count)
+    lon = np.fromiter((float(h['longitude']) for h in hospitals), dtype=np.float64, count=count)
+    return np.ascontiguousarray(np.radians(lat)), np.ascontiguousarray(np.radians(lon))
+
+
+def haversine_distances(latitude, longitude, lat_rad, lon_rad):
+    """Distances in km from one point (degrees) to every point in the radian arrays
+
+    Same formula as Database.calculate_distance, evaluated in one vectorized pass.
+    """
+    lat1 = np.radians(latitude)
+    lon1 = np.radians(longitude)
+
+    sin_dlat = np.sin((lat_rad - lat1) / 2)
+    sin_dlon = np.sin((lon_rad - lon1) / 2)
+    a = sin_dlat * sin_dlat + np.cos(lat1) * np.cos(lat_rad) * sin_dlon * sin_dlon
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    return EARTH_RADIUS_KM * c
+
+
+def nearest_index(distances):
+    """Index of the smallest distance (first one on ties), or None if empty"""
+    if len(distances) == 0:
+        return None
+    return int(np.argmin(distances))
+
+
+def top_k(distances, k):
+    """Indices of the k smallest distances, nearest first
+
+    Uses argpartition so only the k winners are sorted (by distance, then row).
+    """
+    count = len(distances)
+    if k <= 0 or count == 0:
+        return np.empty(0, dtype=np.intp)
+    if k < count:
+        candidates = np.argpartition(distances, k - 1)[:k]
+    else:
+        candidates = np.arange(count)
+    order = np.lexsort((candidates, distances[candidates]))
+    return candidates[order]
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """(lat_min, lat_max, lon_min, lon_max) in degrees enclosing a radius around a point
+
+    Every point within radius_km lies inside the box. Near the poles, or when
+    the box would cross the antimeridian, longitude spans the full -180..180.
+    """
+    angular = radius_km / EARTH_RADIUS_KM
+    lat = np.radians(latitude)
+    lat_min = np.degrees(lat - angular)
+    lat_max = np.degrees(lat + angular)
+
+    if lat_min <= -90 or lat_max >= 90:
+        return float(max(lat_min, -90.0)), float(min(lat_max, 90.0)), -180.0, 180.0
+
+    delta_lon = np.degrees(np.arcsin(np.sin(angular) / np.cos(lat)))
+    lon_min = longitude - delta_lon
+    lon_max = longitude + delta_lon
+    if lon_min < -180 or lon_max > 180:
+        return float(lat_min), float(lat_max), -180.0, 180.0
+    return float(lat_min), float(lat_max), float(lon_min), float(lon_max)
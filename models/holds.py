@@ -0,0 +1,132 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import Counter
+
+
+class HoldLedger:
+    """Short-lived soft holds on hospital capacity
+
+    A hold is placed on the chosen hospital as soon as a dispatch picks it,
+    for the resources the request will need on acceptance, so concurrent
+    dispatches rank that hospital by what is left after the holds. Holds
+    expire after `ttl` seconds and are released as soon as the request
+    leaves Pending (acceptance turns the hold into a real reservation).
+
+    Methods that change holds return the ids of the hospitals whose held
+    totals changed, for the caller to re-rank.
+    """
+
+    def __init__(self, ttl, clock=time.monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._holds = {}
+        self._by_request = {}
+        self._held = {}
+        self._expiry = []
+
+    def __len__(self):
+        return len(self._holds)
+
+    def place(self, hospital_id, columns, request_id=None, ttl=None):
+        """Hold one unit of each column at a hospital; returns the hold id"""
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            hold_id = next(self._ids)
+            expires_at = self._clock() + ttl
+            self._holds[hold_id] = {
+                'hospital_id': hospital_id,
+                'columns': tuple(columns),
+                'request_id': request_id,
+                'expires_at': expires_at,
+            }
+            if request_id is not None:
+                self._by_request[request_id] = hold_id
+            self._add(hospital_id, columns, 1)
+            heapq.heappush(self._expiry, (expires_at, hold_id))
+            return hold_id
+
+    def attach(self, hold_id, request_id):
+        """Bind a hold placed before its request was created to the request id"""
+        with self._lock:
+            hold = self._holds.get(hold_id)
+            if hold is None:
+                return False
+            hold['request_id'] = request_id
+            self._by_request[request_id] = hold_id
+            return True
+
+    def remaining(self, hold_id):
+        """Seconds until a hold expires (None if it is gone)"""
+        with self._lock:
+            hold = self._holds.get(hold_id)
+            if hold is None:
+                return None
+            return max(0.0, hold['expires_at'] - self._clock())
+
+    def release(self, hold_id):
+        """Drop a hold; returns the affected hospital ids"""
+        with self._lock:
+            return self._drop(hold_id)
+
+    def release_request(self, request_id):
+        """Drop the hold of a request, if it has one"""
+        with self._lock:
+            hold_id = self._by_request.get(request_id)
+            if hold_id is None:
+                return []
+            return self._drop(hold_id)
+
+    def move_request(self, request_id, hospital_id):
+        """Move a request's hold to another hospital, keeping its expiry"""
+        with self._lock:
+            hold_id = self._by_request.get(request_id)
+            hold = self._holds.get(hold_id)
+            if hold is None or hold['hospital_id'] == hospital_id:
+                return []
+            previous = hold['hospital_id']
+            self._add(previous, hold['columns'], -1)
+            self._add(hospital_id, hold['columns'], 1)
+            hold['hospital_id'] = hospital_id
+            return [previous, hospital_id]
+
+    def expire(self):
+        """Drop every hold past its expiry; returns the affected hospital ids"""
+        now = self._clock()
+        affected = []
+        with self._lock:
+            while self._expiry and self._expiry[0][0] <= now:
+                _, hold_id = heapq.heappop(self._expiry)
+                affected.extend(self._drop(hold_id))
+        return affected
+
+    def held(self, hospital_id):
+        """Units currently held per column at one hospital"""
+        with self._lock:
+            return dict(self._held.get(hospital_id, ()))
+
+    def totals(self):
+        """Units currently held per column, for every hospital with holds"""
+        with self._lock:
+            return {hospital_id: dict(counts) for hospital_id, counts in self._held.items()}
+
+    def _add(self, hospital_id, columns, delta):
+        counts = self._held.setdefault(hospital_id, Counter())
+        for column in columns:
+            counts[column] += delta
+            if counts[column] <= 0:
+                del counts[column]
+        if not counts:
+            del self._held[hospital_id]
+
+    def _drop(self, hold_id):
+        hold = self._holds.pop(hold_id, None)
+        if hold is None:
+            return []
+        if hold['request_id'] is not None and self._by_request.get(hold['request_id']) == hold_id:
+            del self._by_request[hold['request_id']]
+        self._add(hold['hospital_id'], hold['columns'], -1)
+        return [hold['hospital_id']]
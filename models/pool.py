@@ -0,0 +1,121 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from models.backends import Error
+
+
+class PoolTimeout(Error):
+    """Raised when no pooled connection frees up within the checkout timeout"""
+
+
+class ConnectionPool:
+    """Thread-safe pool of database connections
+
+    Connections are opened lazily up to `size`. A connection that has sat idle
+    longer than `health_check_interval` seconds is pinged (and reconnected if
+    the server dropped it) before being handed out, and any transaction left
+    open by the borrower is rolled back when it is returned.
+    """
+
+    def __init__(self, connect_fn, size=10, timeout=5.0, health_check_interval=30.0):
+        self._connect = connect_fn
+        self.size = size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+
+        # LIFO keeps the hottest connections in use and lets idle ones age out
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _open(self):
+        """Open a new connection, reserving a slot before connecting"""
+        with self._lock:
+            if self._opened >= self.size:
+                return None
+            self._opened += 1
+        try:
+            return self._connect()
+        except Exception:
+            with self._lock:
+                self._opened -= 1
+            raise
+
+    def _discard(self, conn):
+        with self._lock:
+            self._opened -= 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _healthy(self, conn, last_used):
+        """Ping connections that have been idle for a while, reconnecting if needed"""
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            conn.ping(reconnect=True, attempts=1, delay=0)
+            return True
+        except Error:
+            return False
+
+    def checkout(self):
+        """Borrow a connection, waiting up to `timeout` seconds for one to free up"""
+        if self._closed:
+            raise PoolTimeout(msg="Connection pool is closed")
+
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                conn, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._open()
+                if conn is not None:
+                    return conn
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout(msg=f"No database connection available within {self.timeout}s")
+                try:
+                    conn, last_used = self._idle.get(timeout=remaining)
+                except queue.Empty:
+                    continue
+
+            if self._healthy(conn, last_used):
+                return conn
+            self._discard(conn)
+
+    def checkin(self, conn):
+        """Return a borrowed connection, rolling back anything left uncommitted"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            usable = conn.is_connected()
+        except Error:
+            usable = False
+
+        if self._closed or not usable:
+            self._discard(conn)
+        else:
+            self._idle.put((conn, time.monotonic()))
+
+    @contextmanager
+    def connection(self):
+        """Context manager that borrows a connection for the duration of a block"""
+        conn = self.checkout()
+        try:
+            yield conn
+        finally:
+            self.checkin(conn)
+
+    def close(self):
+        """Close all idle connections; borrowed ones are closed when returned"""
+        self._closed = True
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
@@ -0,0 +1,435 @@
+import bz2
+import gzip
+import heapq
+import math
+import os
+import xml.etree.ElementTree as ET
+from functools import lru_cache
+
+import numpy as np
+
+from models.haversine import EARTH_RADIUS_KM, haversine_distances
+
+try:
+    import osmium
+except ImportError:  # optional: only needed for .pbf extracts
+    osmium = None
+
+# Free-flow speeds (km/h) for drivable highway types without a usable maxspeed
+HIGHWAY_SPEEDS = {
+    'motorway': 100, 'motorway_link': 60,
+    'trunk': 80, 'trunk_link': 50,
+    'primary': 60, 'primary_link': 40,
+    'secondary': 50, 'secondary_link': 35,
+    'tertiary': 40, 'tertiary_link': 30,
+    'unclassified': 30, 'residential': 25,
+    'living_street': 10, 'service': 15, 'road': 30,
+}
+
+# Bumped whenever the snapshot layout changes, invalidating old snapshots
+SNAPSHOT_VERSION = 1
+
+# Grid cell size (degrees) used to snap coordinates to road nodes
+SNAP_CELL_DEG = 0.01
+
+# Coordinates farther than this from any road node do not snap
+SNAP_MAX_KM = 2.0
+
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def parse_maxspeed(value):
+    """km/h from an OSM maxspeed tag ('50', '30 mph'), or None if not numeric"""
+    if not value:
+        return None
+    value = value.strip().lower()
+    factor = 1.0
+    if value.endswith('mph'):
+        factor = 1.609344
+        value = value[:-3].strip()
+    elif value.endswith('km/h'):
+        value = value[:-4].strip()
+    try:
+        speed = float(value) * factor
+    except ValueError:
+        return None
+    return speed if speed > 0 else None
+
+
+def way_directions(tags):
+    """(forward, backward) travel permitted along a way's node order"""
+    oneway = tags.get('oneway', '').lower()
+    if oneway in ('yes', 'true', '1'):
+        return True, False
+    if oneway == '-1' or oneway == 'reverse':
+        return False, True
+    if oneway == 'no':
+        return True, True
+    if tags.get('highway') == 'motorway' or tags.get('junction') in ('roundabout', 'circular'):
+        return True, False
+    return True, True
+
+
+def way_speed(tags):
+    """Speed (km/h) for a drivable way, or None if cars cannot use it"""
+    base = HIGHWAY_SPEEDS.get(tags.get('highway'))
+    if base is None or tags.get('access') in ('no', 'private') or tags.get('motor_vehicle') == 'no':
+        return None
+    return parse_maxspeed(tags.get('maxspeed')) or base
+
+
+def _open_extract(path):
+    if path.endswith('.bz2'):
+        return bz2.open(path, 'rb')
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def _read_osm_xml(path):
+    """Node coordinates and drivable ways (refs, speed, directions) of an .osm XML extract"""
+    nodes = {}
+    ways = []
+    with _open_extract(path) as source:
+        for _, element in ET.iterparse(source, events=('end',)):
+            if element.tag == 'node':
+                nodes[int(element.get('id'))] = (float(element.get('lat')), float(element.get('lon')))
+                element.clear()
+            elif element.tag == 'way':
+                tags = {tag.get('k'): tag.get('v') for tag in element.iter('tag')}
+                speed = way_speed(tags)
+                if speed is not None:
+                    refs = [int(nd.get('ref')) for nd in element.iter('nd')]
+                    ways.append((refs, speed, way_directions(tags)))
+                element.clear()
+            elif element.tag == 'relation':
+                element.clear()
+    return nodes, ways
+
+
+def _read_osm_pbf(path):
+    """Same as _read_osm_xml for .pbf extracts (needs the optional osmium package)"""
+    if osmium is None:
+        raise RuntimeError("Reading .pbf extracts requires the 'osmium' package; convert to .osm XML or install it")
+
+    nodes = {}
+    ways = []
+
+    class Handler(osmium.SimpleHandler):
+        def node(self, node):
+            nodes[node.id] = (node.location.lat, node.location.lon)
+
+        def way(self, way):
+            tags = {tag.k: tag.v for tag in way.tags}
+            speed = way_speed(tags)
+            if speed is not None:
+                ways.append(([nd.ref for nd in way.nodes], speed, way_directions(tags)))
+
+    Handler().apply_file(path)
+    return nodes, ways
+
+
+def build_graph(path):
+    """Build a RoadGraph from an OSM extract (.osm, .osm.bz2, .osm.gz or .pbf)"""
+    reader = _read_osm_pbf if path.endswith('.pbf') else _read_osm_xml
+    nodes, ways = reader(path)
+
+    # Compact ids: only nodes used by drivable ways become graph nodes
+    index = {}
+    sources, targets, speeds = [], [], []
+    for refs, speed, (forward, backward) in ways:
+        refs = [ref for ref in refs if ref in nodes]
+        for a, b in zip(refs, refs[1:]):
+            if a == b:
+                continue
+            ia = index.setdefault(a, len(index))
+            ib = index.setdefault(b, len(index))
+            if forward:
+                sources.append(ia)
+                targets.append(ib)
+                speeds.append(speed)
+            if backward:
+                sources.append(ib)
+                targets.append(ia)
+                speeds.append(speed)
+
+    node_lat = np.empty(len(index), dtype=np.float64)
+    node_lon = np.empty(len(index), dtype=np.float64)
+    for osm_id, i in index.items():
+        node_lat[i], node_lon[i] = nodes[osm_id]
+
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int32)
+    speeds = np.asarray(speeds, dtype=np.float64)
+
+    # Edge length with the same haversine as everywhere else, then seconds
+    lat1, lon1 = np.radians(node_lat[sources]), np.radians(node_lon[sources])
+    lat2, lon2 = np.radians(node_lat[targets]), np.radians(node_lon[targets])
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    km = 2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    seconds = km / speeds * 3600
+
+    order = np.argsort(sources, kind='stable')
+    offsets = np.zeros(len(index) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=len(index)), out=offsets[1:])
+    max_speed = float(speeds.max()) if len(speeds) else 1.0
+    return RoadGraph(node_lat, node_lon, offsets, targets[order], seconds[order].astype(np.float32), max_speed)
+
+
+def extract_source(osm_path):
+    """Fingerprint of an extract (size, mtime, snapshot version) stored with derived files"""
+    stat = os.stat(osm_path)
+    return np.array([stat.st_size, stat.st_mtime_ns, SNAPSHOT_VERSION], dtype=np.int64)
+
+
+def load_graph(osm_path, snapshot_path=None):
+    """Load the road graph for an extract, via its binary snapshot when up to date
+
+    The snapshot (default: <extract>.graph.npz) records the extract's size
+    and modification time; a stale or missing snapshot is rebuilt from the
+    extract and rewritten.
+    """
+    snapshot_path = snapshot_path or osm_path + '.graph.npz'
+    source = extract_source(osm_path)
+
+    if os.path.exists(snapshot_path):
+        try:
+            graph = RoadGraph.load(snapshot_path, source)
+            if graph is not None:
+                return graph
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error reading road graph snapshot: {e}")
+
+    graph = build_graph(osm_path)
+    graph.save(snapshot_path, source)
+    return graph
+
+
+class RoadGraph:
+    """Directed road network in CSR form with travel times in seconds
+
+    The outgoing edges of node i are targets[offsets[i]:offsets[i + 1]]
+    with matching weights. Queries use straight-line distance at the
+    network's top speed as an admissible A* heuristic.
+    """
+
+    def __init__(self, node_lat, node_lon, offsets, targets, weights, max_speed_kmh):
+        self.node_lat = node_lat
+        self.node_lon = node_lon
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.max_speed_kmh = max_speed_kmh
+
+        self.lat_rad = np.radians(node_lat)
+        self.lon_rad = np.radians(node_lon)
+
+        # Plain lists: much faster than numpy scalars in the search loops
+        self._offsets = offsets.tolist()
+        self._targets = targets.tolist()
+        self._weights = weights.tolist()
+        self._lat_rad = self.lat_rad.tolist()
+        self._lon_rad = self.lon_rad.tolist()
+        self._build_grid()
+
+    def __len__(self):
+        return len(self.node_lat)
+
+    @property
+    def edge_count(self):
+        return len(self.targets)
+
+    def save(self, path, source=None):
+        """Write the graph to an uncompressed .npz snapshot"""
+        with open(path, 'wb') as f:
+            np.savez(
+                f,
+                node_lat=self.node_lat, node_lon=self.node_lon,
+                offsets=self.offsets, targets=self.targets, weights=self.weights,
+                max_speed=np.array([self.max_speed_kmh]),
+                source=source if source is not None else np.zeros(3, dtype=np.int64)
+            )
+
+    @classmethod
+    def load(cls, path, source=None):
+        """Read a snapshot; returns None if it was built from a different source"""
+        with np.load(path) as data:
+            if source is not None and not np.array_equal(data['source'], source):
+                return None
+            return cls(
+                data['node_lat'], data['node_lon'],
+                data['offsets'], data['targets'], data['weights'],
+                float(data['max_speed'][0])
+            )
+
+    def _build_grid(self):
+        """Bucket nodes into SNAP_CELL_DEG cells, sorted by cell key"""
+        self._cell_lat = np.floor(self.node_lat / SNAP_CELL_DEG).astype(np.int64)
+        self._cell_lon = np.floor(self.node_lon / SNAP_CELL_DEG).astype(np.int64)
+        keys = self._cell_key(self._cell_lat, self._cell_lon)
+        self._grid_order = np.argsort(keys, kind='stable')
+        self._grid_keys = keys[self._grid_order]
+
+    @staticmethod
+    def _cell_key(cell_lat, cell_lon):
+        return (cell_lat + 100000) * 1000000 + (cell_lon + 100000)
+
+    def snap(self, latitude, longitude):
+        """Nearest road node to a coordinate as (node, km away), or (None, None)
+
+        Searches grid rings outward until the best node found is provably
+        the nearest, up to SNAP_MAX_KM.
+        """
+        if len(self) == 0:
+            return None, None
+        cell_lat = math.floor(latitude / SNAP_CELL_DEG)
+        cell_lon = math.floor(longitude / SNAP_CELL_DEG)
+        # Smallest width of a cell in km at this latitude (longitude shrinks)
+        cell_km = SNAP_CELL_DEG * KM_PER_DEGREE * max(math.cos(math.radians(min(abs(latitude) + SNAP_CELL_DEG, 90))), 1e-6)
+
+        best, best_km = None, None
+        ring = 0
+        while True:
+            members = []
+            for dlat in range(-ring, ring + 1):
+                for dlon in range(-ring, ring + 1):
+                    if max(abs(dlat), abs(dlon)) != ring:
+                        continue
+                    key = self._cell_key(cell_lat + dlat, cell_lon + dlon)
+                    lo = np.searchsorted(self._grid_keys, key, 'left')
+                    hi = np.searchsorted(self._grid_keys, key, 'right')
+                    if hi > lo:
+                        members.append(self._grid_order[lo:hi])
+            if members:
+                members = np.concatenate(members)
+                distances = haversine_distances(latitude, longitude, self.lat_rad[members], self.lon_rad[members])
+                i = int(np.argmin(distances))
+                if best_km is None or distances[i] < best_km:
+                    best, best_km = int(members[i]), float(distances[i])
+            # Anything outside this ring is at least ring * cell_km away
+            if best_km is not None and best_km <= ring * cell_km:
+                break
+            if ring * cell_km > SNAP_MAX_KM:
+                break
+            ring += 1
+
+        if best_km is None or best_km > SNAP_MAX_KM:
+            return None, None
+        return best, best_km
+
+    def _heuristic_seconds(self, node, target_lat, target_lon, cos_target):
+        """Straight-line time from a node to the target at the network's top speed"""
+        lat = self._lat_rad[node]
+        dlat = target_lat - lat
+        dlon = target_lon - self._lon_rad[node]
+        a = math.sin(dlat / 2) ** 2 + math.cos(lat) * cos_target * math.sin(dlon / 2) ** 2
+        km = 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+        # Shaved slightly so float32 edge weights never make it overestimate
+        return km / self.max_speed_kmh * 3600 * (1 - 1e-6)
+
+    def route(self, source, target):
+        """Fastest travel time in seconds from one node to another (A*), or None"""
+        if source == target:
+            return 0.0
+        offsets, targets, weights = self._offsets, self._targets, self._weights
+        target_lat = self._lat_rad[target]
+        target_lon = self._lon_rad[target]
+        cos_target = math.cos(target_lat)
+
+        best = {source: 0.0}
+        heap = [(self._heuristic_seconds(source, target_lat, target_lon, cos_target), 0.0, source)]
+        while heap:
+            _, cost, node = heapq.heappop(heap)
+            if node == target:
+                return cost
+            if cost > best[node]:
+                continue
+            for edge in range(offsets[node], offsets[node + 1]):
+                neighbour = targets[edge]
+                new_cost = cost + weights[edge]
+                if new_cost < best.get(neighbour, math.inf):
+                    best[neighbour] = new_cost
+                    estimate = new_cost + self._heuristic_seconds(neighbour, target_lat, target_lon, cos_target)
+                    heapq.heappush(heap, (estimate, new_cost, neighbour))
+        return None
+
+    def travel_times(self, source, targets, limit=None):
+        """Fastest travel times (seconds) from one node to several (one Dijkstra)
+
+        Stops once every target is settled, or past `limit` seconds. Returns
+        {target: seconds}; unreachable targets are missing.
+        """
+        pending = set(targets)
+        found = {}
+        if source in pending:
+            found[source] = 0.0
+            pending.discard(source)
+        offsets, edge_targets, weights = self._offsets, self._targets, self._weights
+
+        best = {source: 0.0}
+        heap = [(0.0, source)]
+        while heap and pending:
+            cost, node = heapq.heappop(heap)
+            if cost > best[node]:
+                continue
+            if limit is not None and cost > limit:
+                break
+            if node in pending:
+                found[node] = cost
+                pending.discard(node)
+            for edge in range(offsets[node], offsets[node + 1]):
+                neighbour = edge_targets[edge]
+                new_cost = cost + weights[edge]
+                if new_cost < best.get(neighbour, math.inf):
+                    best[neighbour] = new_cost
+                    heapq.heappush(heap, (new_cost, neighbour))
+        return found
+
+
+class DriveTimeRanker:
+    """Re-ranks straight-line hospital candidates by road travel time
+
+    Origin and hospitals are snapped to their nearest road nodes (the most
+    recent SNAP_CACHE_SIZE hospital snaps are cached); the short legs
+    between a point and its node are added at ACCESS_SPEED_KMH. `engine`
+    answers travel_times(source, targets) and defaults to the graph's own
+    Dijkstra.
+    """
+
+    ACCESS_SPEED_KMH = 20
+    SNAP_CACHE_SIZE = 65536
+
+    def __init__(self, graph, engine=None):
+        self.graph = graph
+        self.engine = engine or graph
+        # Keyed by coordinates, so a moved hospital's old entry just ages out
+        self._snap_cached = lru_cache(maxsize=self.SNAP_CACHE_SIZE)(graph.snap)
+
+    def _snap_hospital(self, hospital):
+        return self._snap_cached(float(hospital['latitude']), float(hospital['longitude']))
+
+    def rank(self, latitude, longitude, hospitals, k):
+        """Return the k hospitals with the shortest drive time, fastest first
+
+        Each row is a copy with 'drive_time' (minutes, None if unreachable)
+        added; unreachable hospitals follow the reachable ones in their
+        original (straight-line) order.
+        """
+        origin, origin_km = self.graph.snap(latitude, longitude)
+        snaps = [self._snap_hospital(hospital) for hospital in hospitals]
+
+        times = {}
+        if origin is not None:
+            targets = {node for node, _ in snaps if node is not None}
+            times = self.engine.travel_times(origin, targets)
+
+        ranked = []
+        for position, (hospital, (node, node_km)) in enumerate(zip(hospitals, snaps)):
+            seconds = times.get(node) if node is not None else None
+            if seconds is not None:
+                seconds += (origin_km + node_km) / self.ACCESS_SPEED_KMH * 3600
+            row = dict(hospital)
+            row['drive_time'] = round(seconds / 60, 1) if seconds is not None else None
+            ranked.append((seconds is None, seconds or 0.0, position, row))
+        ranked.sort(key=lambda item: item[:3])
+        return [row for _, _, _, row in ranked[:k]]
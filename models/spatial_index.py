@@ -0,0 +1,280 @@
+import heapq
+import math
+
+from models.haversine import EARTH_RADIUS_KM
+
+
+# Capability bits; a hospital sets a bit when that resource is available
+BED = 1
+ICU = 2
+OXYGEN = 4
+VENTILATOR = 8
+
+
+def to_unit_vector(latitude, longitude):
+    """Convert latitude/longitude in degrees to a point on the unit sphere"""
+    lat = math.radians(latitude)
+    lon = math.radians(longitude)
+    cos_lat = math.cos(lat)
+    return (cos_lat * math.cos(lon), cos_lat * math.sin(lon), math.sin(lat))
+
+
+def capability_mask(hospital, held=None):
+    """Bitmask of the resources a hospital row currently has available
+
+    held optionally maps available_* columns to units on soft hold, which
+    are not counted as available.
+    """
+    held = held or {}
+    mask = 0
+    if hospital.get('available_beds', 0) - held.get('available_beds', 0) > 0:
+        mask |= BED
+    if hospital.get('available_icu', 0) - held.get('available_icu', 0) > 0:
+        mask |= ICU
+    if hospital.get('available_oxygen', 0) - held.get('available_oxygen', 0) > 0:
+        mask |= OXYGEN
+    if hospital.get('available_ventilator', 0) - held.get('available_ventilator', 0) > 0:
+        mask |= VENTILATOR
+    return mask
+
+
+def needs_mask(needs):
+    """Bitmask a hospital must cover to serve PatientNeeds (a bed is always required)"""
+    mask = BED
+    if needs.get('icu'):
+        mask |= ICU
+    if needs.get('oxygen'):
+        mask |= OXYGEN
+    if needs.get('ventilator'):
+        mask |= VENTILATOR
+    return mask
+
+
+def hospital_matches(hospital, needs, held=None):
+    """Check a hospital row against the same rules as the SQL needs filter"""
+    required = needs_mask(needs)
+    return capability_mask(hospital, held) & required == required
+
+
+class HospitalIndex:
+    """KD-tree over hospital locations projected onto the unit sphere
+
+    Straight-line (chord) distance between unit vectors grows monotonically
+    with great-circle distance, so the nearest point in 3D space is also the
+    nearest hospital by haversine distance.
+
+    Every node also keeps the OR of its hospitals' capability masks, so a
+    search for e.g. ICU + ventilator skips whole subtrees where no hospital
+    has both available. Masks are updated in place along one root-to-leaf
+    path when a hospital's availability changes (update_availability).
+    Units on soft hold (`held`, hospital id -> {column: units}) are treated
+    as unavailable.
+    """
+
+    LEAF_SIZE = 8
+
+    # Relative slack used when collecting near-ties, so the final pick can be
+    # made with the reference haversine in the original row order.
+    TIE_TOLERANCE = 1e-9
+
+    def __init__(self, hospitals, distance_fn, held=None):
+        """Build the tree from hospital rows (as returned by the hospitals table)"""
+        self.hospitals = list(hospitals)
+        self.distance_fn = distance_fn
+        self.held = dict(held or {})
+        self.points = [
+            to_unit_vector(float(h['latitude']), float(h['longitude']))
+            for h in self.hospitals
+        ]
+        self.masks = [capability_mask(h, self.held.get(h['id'])) for h in self.hospitals]
+        self.positions = {h['id']: i for i, h in enumerate(self.hospitals)}
+        self.paths = [None] * len(self.hospitals)
+        self.root = self._build(list(range(len(self.points))), ())
+
+    def __len__(self):
+        return len(self.hospitals)
+
+    def _build(self, indices, path):
+        """Recursively split indices on the widest axis at the median
+
+        Nodes are lists so their mask (last item) can be updated; `path` is
+        the tuple of ancestors, recorded per hospital for those updates.
+        """
+        if len(indices) <= self.LEAF_SIZE:
+            mask = 0
+            for i in indices:
+                mask |= self.masks[i]
+            leaf = ['leaf', indices, mask]
+            for i in indices:
+                self.paths[i] = path + (leaf,)
+            return leaf
+
+        points = self.points
+        spreads = []
+        for axis in range(3):
+            values = [points[i][axis] for i in indices]
+            spreads.append(max(values) - min(values))
+        axis = spreads.index(max(spreads))
+
+        indices.sort(key=lambda i: points[i][axis])
+        mid = len(indices) // 2
+        split = points[indices[mid]][axis]
+        node = ['node', axis, split, None, None, 0]
+        left = self._build(indices[:mid], path + (node,))
+        right = self._build(indices[mid:], path + (node,))
+        node[3], node[4], node[5] = left, right, left[-1] | right[-1]
+        return node
+
+    def _squared_chord(self, query, index):
+        point = self.points[index]
+        dx = query[0] - point[0]
+        dy = query[1] - point[1]
+        dz = query[2] - point[2]
+        return dx * dx + dy * dy + dz * dz
+
+    def _bound(self, state):
+        """Current pruning radius (squared chord), widened by the tie tolerance"""
+        heap = state['heap']
+        if len(heap) < state['k']:
+            return float('inf')
+        return -heap[0] * (1 + self.TIE_TOLERANCE) + 1e-18
+
+    def _search(self, node, query, required, state):
+        """Branch-and-bound k-nearest search collecting candidates within the bound"""
+        if node[-1] & required != required:
+            return
+
+        if node[0] == 'leaf':
+            masks = self.masks
+            heap = state['heap']
+            for i in node[1]:
+                if masks[i] & required != required:
+                    continue
+                d2 = self._squared_chord(query, i)
+                if d2 > self._bound(state):
+                    continue
+                state['candidates'].append((d2, i))
+                if len(heap) < state['k']:
+                    heapq.heappush(heap, -d2)
+                elif d2 < -heap[0]:
+                    heapq.heapreplace(heap, -d2)
+            return
+
+        _, axis, split, left, right, _ = node
+        diff = query[axis] - split
+        near, far = (left, right) if diff < 0 else (right, left)
+        self._search(near, query, required, state)
+        if diff * diff <= self._bound(state):
+            self._search(far, query, required, state)
+
+    def nearest_k(self, latitude, longitude, needs, k):
+        """Return up to k hospital rows satisfying needs, nearest first
+
+        Each row is a copy with a rounded 'distance' (km) added, the same
+        shape find_nearest_hospital has always returned.
+        """
+        if not self.hospitals or k <= 0:
+            return []
+
+        query = to_unit_vector(latitude, longitude)
+        state = {'k': k, 'heap': [], 'candidates': []}
+        self._search(self.root, query, needs_mask(needs), state)
+        bound = self._bound(state)
+
+        # Rank the surviving candidates with the reference haversine, breaking
+        # ties by row order exactly like the linear scan did.
+        ranked = []
+        for d2, i in state['candidates']:
+            if d2 > bound:
+                continue
+            hospital = self.hospitals[i]
+            distance = self.distance_fn(
+                latitude, longitude,
+                float(hospital['latitude']), float(hospital['longitude'])
+            )
+            ranked.append((distance, i))
+        ranked.sort()
+
+        results = []
+        for distance, i in ranked[:k]:
+            hospital = dict(self.hospitals[i])
+            hospital['distance'] = round(distance, 2)
+            results.append(hospital)
+        return results
+
+    def nearest_positions(self, latitude, longitude, required, k):
+        """Row positions of the k nearest hospitals whose masks cover `required`
+
+        Nearest first by chord distance, so equal great-circle distances may
+        come in either order; callers rank with their own distances.
+        """
+        if not self.hospitals or k <= 0:
+            return []
+        state = {'k': k, 'heap': [], 'candidates': []}
+        self._search(self.root, to_unit_vector(latitude, longitude), required, state)
+        return [i for _, i in sorted(state['candidates'])[:k]]
+
+    def positions_within(self, latitude, longitude, required, radius_km):
+        """Row positions of every hospital covering `required` within radius_km"""
+        found = []
+        if self.hospitals:
+            angle = min(radius_km / EARTH_RADIUS_KM, math.pi)
+            bound = (2 * math.sin(angle / 2)) ** 2 * (1 + self.TIE_TOLERANCE) + 1e-18
+            self._collect(self.root, to_unit_vector(latitude, longitude), required, bound, found)
+        return found
+
+    def _collect(self, node, query, required, bound, found):
+        """Append every position within a fixed squared chord of the query"""
+        if node[-1] & required != required:
+            return
+        if node[0] == 'leaf':
+            masks = self.masks
+            for i in node[1]:
+                if masks[i] & required == required and self._squared_chord(query, i) <= bound:
+                    found.append(i)
+            return
+        _, axis, split, left, right, _ = node
+        diff = query[axis] - split
+        near, far = (left, right) if diff < 0 else (right, left)
+        self._collect(near, query, required, bound, found)
+        if diff * diff <= bound:
+            self._collect(far, query, required, bound, found)
+
+    def get(self, hospital_id):
+        """Return the cached row for a hospital id, or None"""
+        index = self.positions.get(hospital_id)
+        return self.hospitals[index] if index is not None else None
+
+    def update_availability(self, hospital_id):
+        """Recompute the masks for one hospital after its counts changed
+
+        The caller updates the row's available_* values (or the held units)
+        first. Only the nodes on the hospital's root-to-leaf path are
+        touched. Returns False for an unknown hospital id.
+        """
+        index = self.positions.get(hospital_id)
+        if index is None:
+            return False
+
+        mask = capability_mask(self.hospitals[index], self.held.get(hospital_id))
+        if mask == self.masks[index]:
+            return True
+        self.masks[index] = mask
+
+        path = self.paths[index]
+        leaf = path[-1]
+        leaf_mask = 0
+        for i in leaf[1]:
+            leaf_mask |= self.masks[i]
+        leaf[2] = leaf_mask
+        for node in reversed(path[:-1]):
+            node[5] = node[3][-1] | node[4][-1]
+        return True
+
+    def set_held(self, hospital_id, held):
+        """Replace the units on soft hold at one hospital and update its masks"""
+        if held:
+            self.held[hospital_id] = dict(held)
+        else:
+            self.held.pop(hospital_id, None)
+        return self.update_availability(hospital_id)
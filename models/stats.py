@@ -0,0 +1,69 @@
+import threading
+from collections import Counter, defaultdict, deque
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+class DispatchStats:
+    """In-memory request counters for the dashboard
+
+    Per-status and per-hospital counts are updated as requests are created
+    and change status, and periodically replaced by a GROUP BY over the
+    table (reconcile) to correct any drift. Response times are the seconds
+    from a request's creation to its acceptance, kept for the most recent
+    `sample_size` acceptances.
+    """
+
+    def __init__(self, sample_size=1000):
+        self._lock = threading.Lock()
+        self.by_status = Counter()
+        self.by_hospital = defaultdict(Counter)
+        self._response_times = deque(maxlen=sample_size)
+
+    def record_created(self, hospital_id, status='Pending'):
+        with self._lock:
+            self.by_status[status] += 1
+            self.by_hospital[hospital_id][status] += 1
+
+    def record_transition(self, old_status, old_hospital_id, new_status, new_hospital_id, age_seconds=None):
+        """Move one request between status/hospital buckets
+
+        age_seconds is the request's age at the time of the change; it is
+        sampled as a response time when the request becomes Accepted.
+        """
+        with self._lock:
+            self.by_status[old_status] -= 1
+            self.by_hospital[old_hospital_id][old_status] -= 1
+            self.by_status[new_status] += 1
+            self.by_hospital[new_hospital_id][new_status] += 1
+            if new_status == 'Accepted' and old_status != 'Accepted' and age_seconds is not None:
+                self._response_times.append(float(age_seconds))
+
+    def reconcile(self, rows):
+        """Replace the counters with (hospital_id, status, count) rows from the database"""
+        by_status = Counter()
+        by_hospital = defaultdict(Counter)
+        for hospital_id, status, count in rows:
+            by_status[status] += count
+            by_hospital[hospital_id][status] += count
+        with self._lock:
+            self.by_status = by_status
+            self.by_hospital = by_hospital
+
+    def status_counts(self, hospital_id=None):
+        """Counts per status, overall or for one hospital"""
+        with self._lock:
+            counts = self.by_hospital.get(hospital_id, Counter()) if hospital_id is not None else self.by_status
+            return {status: count for status, count in counts.items() if count}
+
+    def response_time_percentiles(self):
+        """(median, p90) acceptance time in seconds, or (None, None) with no samples"""
+        with self._lock:
+            samples = sorted(self._response_times)
+        return percentile(samples, 0.5), percentile(samples, 0.9)
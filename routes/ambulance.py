@@ -1,6 +1,9 @@
+import asyncio
+import time
+
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 
 ambulance_router = APIRouter()
 
@@ -15,18 +18,75 @@ class EmergencyRequest(BaseModel):
     patient_type: str
     emergency_type: str
     needs: PatientNeeds
+    # Where the ambulance is: explicit coordinates, or the id of an ambulance
+    # reporting its position; falls back to the configured default location
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
+    ambulance_id: Optional[str] = None
+
+class BatchDispatchRequest(BaseModel):
+    patients: List[EmergencyRequest]
+    # Incident location, resolved like EmergencyRequest's (per-patient
+    # locations are ignored: the whole batch leaves from one place)
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
+    ambulance_id: Optional[str] = None
+
+class PositionReport(BaseModel):
+    ambulance_id: str = Field(..., min_length=1, max_length=64)
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+    # Unix time of the GPS fix; defaults to the time it is received
+    recorded_at: Optional[float] = None
+
+class RequestCancel(BaseModel):
+    request_id: int
 
 class RequestStatusCheck(BaseModel):
     request_id: int
+    # Long-poll: with both set, wait up to `timeout` seconds for the request
+    # to change away from `last_status` before answering
+    last_status: Optional[str] = None
+    timeout: Optional[float] = None
+
+# Upper bound on a single long-poll wait, in seconds
+MAX_STATUS_WAIT = 30
+
+# Largest number of patients accepted by one batch dispatch
+MAX_BATCH_SIZE = 200
 
 # Global reference to database (will be set by app)
 db = None
 
 def set_db(database):
-    """Set database instance from main app"""
+    """Set database instance (an AsyncDatabase) from main app"""
     global db
     db = database
 
+def resolve_origin(latitude, longitude, ambulance_id):
+    """Pick the dispatch origin: coordinates, else the ambulance's last position, else the default"""
+    if (latitude is None) != (longitude is None):
+        raise HTTPException(status_code=400, detail="Give both latitude and longitude")
+    if latitude is not None:
+        return latitude, longitude
+    
+    if ambulance_id is not None:
+        position = db.fleet.latest(ambulance_id) if db.fleet is not None else None
+        if position is None:
+            raise HTTPException(
+                status_code=404, 
+                detail=f"No known position for ambulance {ambulance_id}"
+            )
+        max_age = db.config.FLEET_POSITION_MAX_AGE
+        if max_age and time.time() - position['recorded_at'] > max_age:
+            raise HTTPException(
+                status_code=409, 
+                detail=f"Last position of ambulance {ambulance_id} is too old to dispatch from"
+            )
+        return position['latitude'], position['longitude']
+    
+    return db.config.DEFAULT_AMBULANCE_LATITUDE, db.config.DEFAULT_AMBULANCE_LONGITUDE
+
 @ambulance_router.post("/find-hospital")
 async def find_hospital(emergency_req: EmergencyRequest):
     """Find nearest hospital based on patient needs"""
@@ -34,31 +94,38 @@ async def find_hospital(emergency_req: EmergencyRequest):
         raise HTTPException(status_code=500, detail="Database not initialized")
     
     try:
-        # Get ambulance location from config
-        from config import Config
-        config = Config()
-        ambulance_lat = config.DEFAULT_AMBULANCE_LATITUDE
-        ambulance_lon = config.DEFAULT_AMBULANCE_LONGITUDE
-        
-        # Find nearest hospital
-        nearest_hospital = db.find_nearest_hospital(
+        ambulance_lat, ambulance_lon = resolve_origin(
+            emergency_req.latitude,
+            emergency_req.longitude,
+            emergency_req.ambulance_id
+        )
+        
+        # Rank the nearest candidate hospitals in one search; the first one
+        # gets the request, the rest are kept as fallbacks for rejections.
+        # The needed resources are soft-held at the first in the same step,
+        # so concurrent dispatches rank it by what is left until it answers
+        candidates, hold_id = await db.find_and_hold(
             ambulance_lat, 
             ambulance_lon, 
-            emergency_req.needs.dict()
+            emergency_req.needs.dict(),
+            db.config.CANDIDATE_COUNT
         )
         
-        if not nearest_hospital:
+        if not candidates:
             raise HTTPException(
                 status_code=404, 
                 detail="No hospital found with required facilities"
             )
+        nearest_hospital = candidates[0]
         
         # Create emergency request
-        request_id = db.create_emergency_request(
+        request_id = await db.create_emergency_request(
             emergency_req.patient_type,
             emergency_req.emergency_type,
             emergency_req.needs.dict(),
-            nearest_hospital['id']
+            nearest_hospital['id'],
+            candidates,
+            hold_id
         )
         
         if not request_id:
@@ -72,8 +139,19 @@ async def find_hospital(emergency_req: EmergencyRequest):
             "message": "Request sent to nearest hospital",
             "hospital_name": nearest_hospital['name'],
             "distance": nearest_hospital['distance'],
+            "drive_time": nearest_hospital.get('drive_time'),
             "request_id": request_id,
-            "hospital_id": nearest_hospital['id']
+            "hospital_id": nearest_hospital['id'],
+            "origin": {"latitude": ambulance_lat, "longitude": ambulance_lon},
+            "candidates": [
+                {
+                    "hospital_id": hospital['id'],
+                    "hospital_name": hospital['name'],
+                    "distance": hospital['distance'],
+                    "drive_time": hospital.get('drive_time')
+                }
+                for hospital in candidates
+            ]
         }
         
     except HTTPException:
@@ -85,14 +163,167 @@ async def find_hospital(emergency_req: EmergencyRequest):
             detail="An error occurred while processing your request"
         )
 
+@ambulance_router.post("/dispatch-batch")
+async def dispatch_batch(batch: BatchDispatchRequest):
+    """Place several patients from one incident in a single pass
+    
+    Patients are assigned greedily by severity (Serious first) to the
+    nearest hospital with capacity left for them, counting patients already
+    placed in the batch, and all requests are written in one transaction.
+    Assignments are returned in input order; patients no hospital can take
+    are reported with hospital_id None.
+    """
+    if not db:
+        raise HTTPException(status_code=500, detail="Database not initialized")
+    
+    if not batch.patients:
+        raise HTTPException(status_code=400, detail="At least one patient is required")
+    if len(batch.patients) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {MAX_BATCH_SIZE} patients per batch"
+        )
+    
+    try:
+        latitude, longitude = resolve_origin(batch.latitude, batch.longitude, batch.ambulance_id)
+        patients = [
+            {
+                'patient_type': patient.patient_type,
+                'emergency_type': patient.emergency_type,
+                'needs': patient.needs.dict(),
+            }
+            for patient in batch.patients
+        ]
+        
+        plan = await db.plan_dispatch_batch(latitude, longitude, patients)
+        
+        placed = [
+            dict(patient, hospital_id=assignment['hospital']['id'],
+                 candidates=assignment['candidates'], hold_id=assignment['hold_id'])
+            for patient, assignment in zip(patients, plan)
+            if assignment is not None
+        ]
+        request_ids = await db.create_emergency_requests(placed)
+        if request_ids is None:
+            raise HTTPException(
+                status_code=500, 
+                detail="Failed to create emergency requests"
+            )
+        
+        request_ids = iter(request_ids)
+        assignments = []
+        for index, assignment in enumerate(plan):
+            if assignment is None:
+                assignments.append({
+                    "index": index,
+                    "request_id": None,
+                    "hospital_id": None,
+                    "message": "No hospital found with required facilities"
+                })
+                continue
+            hospital = assignment['hospital']
+            assignments.append({
+                "index": index,
+                "request_id": next(request_ids),
+                "hospital_id": hospital['id'],
+                "hospital_name": hospital['name'],
+                "distance": hospital['distance'],
+                "drive_time": hospital.get('drive_time')
+            })
+        
+        return {
+            "success": True,
+            "dispatched": len(placed),
+            "unplaced": len(plan) - len(placed),
+            "assignments": assignments
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in dispatch_batch: {e}")
+        raise HTTPException(
+            status_code=500, 
+            detail="An error occurred while processing your request"
+        )
+
+@ambulance_router.post("/position")
+async def report_position(report: PositionReport):
+    """Record an ambulance's current GPS position for dispatches by ambulance_id"""
+    if not db:
+        raise HTTPException(status_code=500, detail="Database not initialized")
+    if db.fleet is None:
+        raise HTTPException(status_code=503, detail="Position tracking not enabled")
+    
+    updated = db.fleet.update(
+        report.ambulance_id, report.latitude, report.longitude, report.recorded_at
+    )
+    return {
+        "success": True,
+        "updated": updated
+    }
+
+@ambulance_router.post("/cancel-request")
+async def cancel_request(cancel: RequestCancel):
+    """Cancel an emergency request, releasing any capacity reserved for it"""
+    if not db:
+        raise HTTPException(status_code=500, detail="Database not initialized")
+    
+    try:
+        success = await db.update_request_status(cancel.request_id, 'Cancelled')
+        
+        if success is None:
+            raise HTTPException(status_code=404, detail="Request not found")
+        if not success:
+            raise HTTPException(status_code=500, detail="Failed to cancel request")
+        
+        return {
+            "success": True,
+            "message": "Request cancelled successfully"
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error in cancel_request: {e}")
+        raise HTTPException(
+            status_code=500, 
+            detail="An error occurred while cancelling request"
+        )
+
+def format_status(request_data):
+    """Format a request row for the check-status response"""
+    return {
+        "success": True,
+        "request_id": request_data['id'],
+        "status": request_data['status'],
+        "hospital_name": request_data['hospital_name'],
+        "patient_type": request_data['patient_type'],
+        "emergency_type": request_data['emergency_type'],
+        "created_at": request_data['created_at'].isoformat() if hasattr(request_data['created_at'], 'isoformat') else str(request_data['created_at'])
+    }
+
 @ambulance_router.post("/check-status")
 async def check_status(status_check: RequestStatusCheck):
-    """Check status of emergency request"""
+    """Check status of emergency request
+    
+    When last_status and timeout are given and the status still equals
+    last_status, the call waits until the request changes or the timeout
+    expires instead of returning immediately.
+    """
     if not db:
         raise HTTPException(status_code=500, detail="Database not initialized")
     
+    long_poll = (
+        status_check.last_status is not None
+        and status_check.timeout
+        and db.events is not None
+    )
+    
+    # Start watching before reading so a change in between is not missed
+    waiter = db.events.watch(status_check.request_id) if long_poll else None
     try:
-        request_data = db.get_request_status(status_check.request_id)
+        request_data = await db.get_request_status(status_check.request_id)
         
         if not request_data:
             raise HTTPException(
@@ -100,15 +331,15 @@ async def check_status(status_check: RequestStatusCheck):
                 detail="Request not found"
             )
         
-        return {
-            "success": True,
-            "request_id": request_data['id'],
-            "status": request_data['status'],
-            "hospital_name": request_data['hospital_name'],
-            "patient_type": request_data['patient_type'],
-            "emergency_type": request_data['emergency_type'],
-            "created_at": request_data['created_at'].isoformat() if hasattr(request_data['created_at'], 'isoformat') else str(request_data['created_at'])
-        }
+        if waiter is not None and request_data['status'] == status_check.last_status:
+            timeout = min(status_check.timeout, MAX_STATUS_WAIT)
+            try:
+                event = await asyncio.wait_for(waiter, timeout=timeout)
+                request_data = event['request']
+            except asyncio.TimeoutError:
+                pass
+        
+        return format_status(request_data)
         
     except HTTPException:
         raise
@@ -118,23 +349,46 @@ async def check_status(status_check: RequestStatusCheck):
             status_code=500, 
             detail="An error occurred while checking status"
         )
+    finally:
+        if waiter is not None:
+            db.events.unwatch(status_check.request_id, waiter)
+
+def format_duration(seconds):
+    """Human-readable duration for the dashboard, e.g. '45s' or '2.5min'"""
+    if seconds is None:
+        return "n/a"
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    return f"{seconds / 60:.1f}min"
 
 @ambulance_router.get("/stats")
-async def get_stats():
-    """Get ambulance dashboard statistics"""
+async def get_stats(hospital_id: Optional[int] = None):
+    """Get ambulance dashboard statistics
+    
+    Counts come from in-memory counters (periodically reconciled with the
+    database); response time is the measured time from request creation to
+    acceptance over recent requests. With hospital_id, counts are for that
+    hospital only.
+    """
     if not db:
         raise HTTPException(status_code=500, detail="Database not initialized")
     
     try:
-        pending_requests = db.get_pending_requests()
-        hospitals = db.get_all_hospitals()
+        catalog = db.catalog
+        total_hospitals = len(catalog) if catalog is not None else len(await db.get_all_hospitals())
+        counts = db.stats.status_counts(hospital_id)
+        median, p90 = db.stats.response_time_percentiles()
         
         return {
             "success": True,
-            "total_hospitals": len(hospitals),
-            "pending_count": len([r for r in pending_requests if r['status'] == 'Pending']),
-            "accepted_count": len([r for r in pending_requests if r['status'] == 'Accepted']),
-            "response_time": "~2min"
+            "total_hospitals": total_hospitals,
+            "pending_count": counts.get('Pending', 0),
+            "accepted_count": counts.get('Accepted', 0),
+            "rejected_count": counts.get('Rejected', 0),
+            "status_counts": counts,
+            "response_time": format_duration(median),
+            "response_time_median_seconds": median,
+            "response_time_p90_seconds": p90
         }
     except Exception as e:
         print(f"Error in get_stats: {e}")
@@ -0,0 +1,163 @@
+import json
+import math
+import time
+
+from fastapi import APIRouter, HTTPException, Request
+
+fleet_router = APIRouter()
+
+# Global reference to database (will be set by app)
+db = None
+
+# Largest JSON array accepted by the bulk endpoint (stream larger feeds as NDJSON)
+MAX_BATCH_PINGS = 10000
+
+# Matches ambulance_positions.ambulance_id VARCHAR(64)
+MAX_AMBULANCE_ID_LENGTH = 64
+
+# NDJSON lines are applied to the fleet store in chunks of this many pings
+STREAM_CHUNK_PINGS = 1000
+
+def set_db(database):
+    """Set database instance (an AsyncDatabase) from main app"""
+    global db
+    db = database
+
+def parse_ping(item, received_at):
+    """Validate one GPS report into an (ambulance_id, latitude, longitude, recorded_at) tuple
+
+    Returns None for a malformed or out-of-range report. recorded_at is the
+    Unix time of the fix and defaults to the time the batch was received.
+    """
+    try:
+        ambulance_id = item['ambulance_id']
+        latitude = float(item['latitude'])
+        longitude = float(item['longitude'])
+        recorded_at = item.get('recorded_at')
+        recorded_at = received_at if recorded_at is None else float(recorded_at)
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return None
+
+    if ambulance_id is None or isinstance(ambulance_id, (dict, list)):
+        return None
+    ambulance_id = str(ambulance_id)
+    if not ambulance_id or len(ambulance_id) > MAX_AMBULANCE_ID_LENGTH:
+        return None
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180 and math.isfinite(recorded_at)):
+        return None
+    return (ambulance_id, latitude, longitude, recorded_at)
+
+def ingest_result(received, pings):
+    """Apply validated pings and build the response counts"""
+    accepted = db.fleet.ingest(pings)
+    return {
+        "success": True,
+        "received": received,
+        "accepted": accepted,
+        "stale": len(pings) - accepted,
+        "rejected": received - len(pings)
+    }
+
+def require_fleet():
+    if not db:
+        raise HTTPException(status_code=500, detail="Database not initialized")
+    if db.fleet is None:
+        raise HTTPException(status_code=503, detail="Position tracking not enabled")
+
+@fleet_router.post("/positions")
+async def ingest_positions(request: Request):
+    """Ingest a JSON array of GPS reports
+
+    Each item has ambulance_id, latitude, longitude and optionally
+    recorded_at (Unix seconds). Invalid items are counted as rejected and
+    reports older than the ambulance's current position as stale; neither
+    fails the batch.
+    """
+    require_fleet()
+
+    try:
+        items = json.loads(await request.body())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body must be a JSON array")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=400, detail="Body must be a JSON array")
+    if len(items) > MAX_BATCH_PINGS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {MAX_BATCH_PINGS} reports per batch; use /positions/stream"
+        )
+
+    received_at = time.time()
+    pings = [ping for ping in (parse_ping(item, received_at) for item in items) if ping is not None]
+    return ingest_result(len(items), pings)
+
+@fleet_router.post("/positions/stream")
+async def stream_positions(request: Request):
+    """Ingest newline-delimited JSON GPS reports (one object per line)
+
+    The body is consumed as it arrives and applied in chunks, so a
+    long-lived upload from a gateway is ingested continuously.
+    """
+    require_fleet()
+
+    received = 0
+    accepted = 0
+    valid = 0
+    pings = []
+    buffer = b""
+
+    def flush():
+        nonlocal accepted, pings
+        if pings:
+            accepted += db.fleet.ingest(pings)
+            pings = []
+
+    def take(line):
+        nonlocal received, valid
+        line = line.strip()
+        if not line:
+            return
+        received += 1
+        try:
+            item = json.loads(line)
+        except ValueError:
+            return
+        ping = parse_ping(item, time.time())
+        if ping is not None:
+            valid += 1
+            pings.append(ping)
+            if len(pings) >= STREAM_CHUNK_PINGS:
+                flush()
+
+    async for chunk in request.stream():
+        buffer += chunk
+        lines = buffer.split(b"\n")
+        buffer = lines.pop()
+        for line in lines:
+            take(line)
+    take(buffer)
+    flush()
+
+    return {
+        "success": True,
+        "received": received,
+        "accepted": accepted,
+        "stale": valid - accepted,
+        "rejected": received - valid
+    }
+
+@fleet_router.get("/ambulances")
+async def get_ambulances():
+    """Last known position of every ambulance"""
+    require_fleet()
+    return {"success": True, "ambulances": db.fleet.positions()}
+
+@fleet_router.get("/ambulances/{ambulance_id}/track")
+async def get_track(ambulance_id: str):
+    """Recent positions of one ambulance, oldest first"""
+    require_fleet()
+
+    track = db.fleet.track(ambulance_id)
+    if not track:
+        raise HTTPException(status_code=404, detail="Unknown ambulance")
+    return {"success": True, "ambulance_id": ambulance_id, "positions": track}
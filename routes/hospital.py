@@ -1,4 +1,12 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 hospital_router = APIRouter()
@@ -10,40 +18,87 @@ class RequestAction(BaseModel):
 db = None
 
 def set_db(database):
-    """Set database instance from main app"""
+    """Set database instance (an AsyncDatabase) from main app"""
     global db
     db = database
 
+# Seconds between SSE keep-alive comments on an idle stream
+KEEPALIVE_INTERVAL = 15
+
+# Pending-request page sizes
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+def format_request(req):
+    """Format an emergency request row for the hospital admin panel"""
+    return {
+        'id': req['id'],
+        'patient_type': req['patient_type'],
+        'emergency_type': req['emergency_type'],
+        'need_bed': req['need_bed'],
+        'need_icu': req['need_icu'],
+        'need_oxygen': req['need_oxygen'],
+        'need_ventilator': req['need_ventilator'],
+        'hospital_id': req['hospital_id'],
+        'hospital_name': req['hospital_name'],
+        'status': req['status'],
+        'created_at': req['created_at'].isoformat() if hasattr(req['created_at'], 'isoformat') else str(req['created_at'])
+    }
+
+def sse_message(event, data):
+    """Encode one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def encode_cursor(req):
+    """Opaque pagination cursor pointing just past a request row"""
+    created_at = req['created_at']
+    created_at = created_at.isoformat() if hasattr(created_at, 'isoformat') else str(created_at)
+    raw = json.dumps([created_at, req['id']]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Turn a cursor back into the (created_at, id) keyset position"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, request_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(request_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def fetch_page(hospital_id, limit, after=None):
+    """One page of formatted pending requests plus the cursor for the next page"""
+    # Read one extra row to know whether another page exists
+    rows = await db.get_pending_requests(hospital_id, limit + 1, after)
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1]) if len(rows) > limit else None
+    return [format_request(req) for req in page], next_cursor
+
 @hospital_router.get("/pending-requests")
-async def get_pending_requests():
-    """Get all pending emergency requests for hospital admin"""
+async def get_pending_requests(
+    hospital_id: Optional[int] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    """Get pending emergency requests for hospital admin, newest first
+    
+    Filter with hospital_id; page with limit and the next_cursor returned by
+    the previous call.
+    """
     if not db:
         raise HTTPException(status_code=500, detail="Database not initialized")
     
     try:
-        pending_requests = db.get_pending_requests()
-        
-        # Format the response
-        formatted_requests = []
-        for req in pending_requests:
-            formatted_requests.append({
-                'id': req['id'],
-                'patient_type': req['patient_type'],
-                'emergency_type': req['emergency_type'],
-                'need_bed': req['need_bed'],
-                'need_icu': req['need_icu'],
-                'need_oxygen': req['need_oxygen'],
-                'need_ventilator': req['need_ventilator'],
-                'hospital_name': req['hospital_name'],
-                'status': req['status'],
-                'created_at': req['created_at'].isoformat() if hasattr(req['created_at'], 'isoformat') else str(req['created_at'])
-            })
+        after = decode_cursor(cursor) if cursor else None
+        formatted_requests, next_cursor = await fetch_page(hospital_id, limit, after)
         
         return {
             "success": True,
-            "requests": formatted_requests
+            "requests": formatted_requests,
+            "next_cursor": next_cursor
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Error in get_pending_requests: {e}")
         raise HTTPException(
@@ -51,9 +106,60 @@ async def get_pending_requests():
             detail="An error occurred while fetching requests"
         )
 
+@hospital_router.get("/pending-requests/stream")
+async def stream_pending_requests(request: Request, hospital_id: Optional[int] = None):
+    """Server-Sent Events stream of pending requests
+    
+    Sends a `snapshot` (first page, with next_cursor for the rest), then
+    `request_created` / `request_updated` events as they happen. With
+    hospital_id, other hospitals' changes are skipped, except that a request
+    rerouted away from this hospital arrives as `request_removed` with its id.
+    """
+    if not db or db.events is None:
+        raise HTTPException(status_code=500, detail="Database not initialized")
+    
+    async def event_stream():
+        # Subscribe before the snapshot so no change falls in between
+        queue = db.events.subscribe()
+        try:
+            resync = True
+            while not await request.is_disconnected():
+                if resync:
+                    formatted_requests, next_cursor = await fetch_page(hospital_id, DEFAULT_PAGE_SIZE)
+                    yield sse_message('snapshot', {
+                        "requests": formatted_requests,
+                        "next_cursor": next_cursor
+                    })
+                    resync = False
+                
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                
+                if event['type'] == 'resync':
+                    resync = True
+                    continue
+                
+                req = event['request']
+                if hospital_id is not None and req['hospital_id'] != hospital_id:
+                    if event.get('previous_hospital_id') == hospital_id:
+                        yield sse_message('request_removed', {"request": {"id": req['id']}})
+                    continue
+                yield sse_message(event['type'], {"request": format_request(req)})
+        finally:
+            db.events.unsubscribe(queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @hospital_router.post("/accept-request")
 async def accept_request(action: RequestAction):
-    """Accept an emergency request"""
+    """Accept an emergency request, reserving the capacity it needs"""
     if not db:
         raise HTTPException(status_code=500, detail="Database not initialized")
     
@@ -61,14 +167,19 @@ async def accept_request(action: RequestAction):
         if not action.request_id:
             raise HTTPException(status_code=400, detail="Request ID is required")
         
-        # Update status to Accepted
-        success = db.update_request_status(action.request_id, 'Accepted')
+        # Update status to Accepted (fails if a required resource ran out)
+        success = await db.update_request_status(action.request_id, 'Accepted')
         
         if success:
             return {
                 "success": True,
                 "message": "Request accepted successfully"
             }
+        elif success is None:
+            raise HTTPException(
+                status_code=409,
+                detail="Request not found, no longer pending, or hospital has no capacity left for it"
+            )
         else:
             raise HTTPException(status_code=500, detail="Failed to accept request")
             
@@ -91,16 +202,29 @@ async def reject_request(action: RequestAction):
         if not action.request_id:
             raise HTTPException(status_code=400, detail="Request ID is required")
         
-        # Update status to Rejected
-        success = db.update_request_status(action.request_id, 'Rejected')
+        # Hand the request to the next ranked candidate, or reject it outright
+        next_hospital = await db.reroute_request(action.request_id)
         
-        if success:
+        if next_hospital is None:
+            raise HTTPException(status_code=404, detail="Request not found")
+        if next_hospital is False:
+            raise HTTPException(status_code=500, detail="Failed to reject request")
+        
+        if next_hospital is not True:
             return {
                 "success": True,
-                "message": "Request rejected successfully"
+                "message": f"Request rejected and forwarded to {next_hospital['name']}",
+                "rerouted": True,
+                "hospital_id": next_hospital['id'],
+                "hospital_name": next_hospital['name'],
+                "distance": next_hospital['distance']
             }
-        else:
-            raise HTTPException(status_code=500, detail="Failed to reject request")
+        
+        return {
+            "success": True,
+            "message": "Request rejected successfully",
+            "rerouted": False
+        }
             
     except HTTPException:
         raise
@@ -1,41 +1,141 @@
-from fastapi import APIRouter, HTTPException
+import gzip
+import hashlib
+import json
+
+from fastapi import APIRouter, HTTPException, Request, Response
+
+try:
+    import brotli
+except ImportError:  # optional: gzip is always available
+    brotli = None
 
 hospitals_router = APIRouter()
 
 # Global reference to database (will be set by app)
 db = None
 
+# Responses smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+# Serialized payload for the current catalog and version (ETag + body per encoding);
+# keyed on the catalog object too, since a rebuilt catalog restarts its version
+_payload_cache = {'catalog': None, 'version': None, 'etags': {}, 'bodies': {}}
+
 def set_db(database):
-    """Set database instance from main app"""
+    """Set database instance (an AsyncDatabase) from main app"""
     global db
     db = database
 
+def format_hospital(hospital):
+    """Format a hospital row for the API"""
+    return {
+        'id': hospital['id'],
+        'name': hospital['name'],
+        'latitude': float(hospital['latitude']),
+        'longitude': float(hospital['longitude']),
+        'available_beds': hospital.get('available_beds', 0),
+        'available_icu': hospital.get('available_icu', 0),
+        'available_oxygen': hospital.get('available_oxygen', 0),
+        'available_ventilator': hospital.get('available_ventilator', 0)
+    }
+
+def build_payload(hospitals):
+    """Serialize the hospital list once and pre-compress it
+    
+    Returns (etags, bodies), both keyed by content-coding. The strong ETag
+    is a hash of the uncompressed JSON, so every worker process serving the
+    same data hands out the same tag; encoded bodies are different
+    representations and get the coding as a suffix (RFC 9110 8.8.3).
+    """
+    body = json.dumps(
+        {"success": True, "hospitals": [format_hospital(h) for h in hospitals]},
+        separators=(",", ":")
+    ).encode("utf-8")
+    digest = hashlib.sha256(body).hexdigest()[:32]
+    
+    bodies = {'identity': body}
+    if len(body) >= MIN_COMPRESS_SIZE:
+        bodies['gzip'] = gzip.compress(body, compresslevel=6)
+        if brotli is not None:
+            bodies['br'] = brotli.compress(body)
+    etags = {
+        coding: f'"{digest}"' if coding == 'identity' else f'"{digest}-{coding}"'
+        for coding in bodies
+    }
+    return etags, bodies
+
+def etag_matches(if_none_match, etag):
+    """Evaluate an If-None-Match header (weak comparison, as RFC 9110 requires)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+def choose_encoding(accept_encoding, available):
+    """Pick the best content-coding the client accepts: br, then gzip, then none"""
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding.lower()] = quality
+    
+    for coding in ('br', 'gzip'):
+        if coding in available and accepted.get(coding, accepted.get('*', 0)) > 0:
+            return coding
+    return 'identity'
+
+async def current_payload():
+    """ETags and encoded bodies for the hospital list, cached per catalog version"""
+    catalog = db.catalog
+    if catalog is None:
+        return build_payload(await db.get_all_hospitals())
+    
+    version = catalog.version
+    if _payload_cache['catalog'] is not catalog or _payload_cache['version'] != version:
+        etags, bodies = build_payload(catalog.hospitals)
+        _payload_cache.update(catalog=catalog, version=version, etags=etags, bodies=bodies)
+    return _payload_cache['etags'], _payload_cache['bodies']
+
 @hospitals_router.get("/")
-async def get_all_hospitals():
-    """Get list of all hospitals"""
+async def get_all_hospitals(request: Request):
+    """Get list of all hospitals
+    
+    Supports conditional requests (ETag / If-None-Match -> 304) and gzip or
+    brotli compression for large catalogs.
+    """
     if not db:
         raise HTTPException(status_code=500, detail="Database not initialized")
     
     try:
-        hospitals = db.get_all_hospitals()
+        etags, bodies = await current_payload()
+        encoding = choose_encoding(request.headers.get("accept-encoding"), bodies)
+        headers = {
+            "ETag": etags[encoding],
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding"
+        }
         
-        formatted_hospitals = []
-        for hospital in hospitals:
-            formatted_hospitals.append({
-                'id': hospital['id'],
-                'name': hospital['name'],
-                'latitude': float(hospital['latitude']),
-                'longitude': float(hospital['longitude']),
-                'available_beds': hospital.get('available_beds', 0),
-                'available_icu': hospital.get('available_icu', 0),
-                'available_oxygen': hospital.get('available_oxygen', 0),
-                'available_ventilator': hospital.get('available_ventilator', 0)
-            })
+        if etag_matches(request.headers.get("if-none-match"), etags[encoding]):
+            return Response(status_code=304, headers=headers)
         
-        return {
-            "success": True,
-            "hospitals": formatted_hospitals
-        }
+        if encoding != 'identity':
+            headers["Content-Encoding"] = encoding
+        
+        return Response(content=bodies[encoding], media_type="application/json", headers=headers)
     except Exception as e:
         print(f"Error in get_all_hospitals: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch hospitals")
@@ -152,6 +152,194 @@ def test_get_stats():
         print_test("Get Statistics", False, str(e))
         return False
 
+def create_request(patient_type="Serious", needs=None):
+    """Dispatch one patient and return the find-hospital response (or None)"""
+    payload = {
+        "patient_type": patient_type,
+        "emergency_type": "Accident",
+        "needs": needs or {"bed": True, "icu": False, "oxygen": False, "ventilator": False}
+    }
+    response = requests.post(f"{API_URL}/ambulance/find-hospital", json=payload)
+    if response.status_code != 200:
+        return None
+    return response.json()
+
+def hospital_beds(hospital_id):
+    """Available beds of one hospital from the hospital list"""
+    response = requests.get(f"{API_URL}/hospitals/")
+    for hospital in response.json().get("hospitals", []):
+        if hospital["id"] == hospital_id:
+            return hospital["available_beds"]
+    return None
+
+def test_reject_reroutes():
+    """Test 8: Rejecting a request forwards it to the next candidate"""
+    try:
+        created = create_request()
+        if not created:
+            print_test("Reject Reroutes", False, "Could not create a request")
+            return False
+        response = requests.post(f"{API_URL}/hospital/reject-request", json={"request_id": created["request_id"]})
+        if response.status_code != 200:
+            print_test("Reject Reroutes", False, f"Status: {response.status_code}")
+            return False
+        data = response.json()
+        if not data.get("rerouted"):
+            ok = len(created["candidates"]) == 1
+            print_test("Reject Reroutes", ok, "Rejected outright" + ("" if ok else " despite other candidates"))
+            return ok
+        status = requests.post(f"{API_URL}/ambulance/check-status", json={"request_id": created["request_id"]}).json()
+        ok = (
+            data["hospital_id"] != created["hospital_id"]
+            and status.get("status") == "Pending"
+            and status.get("hospital_name") == data["hospital_name"]
+        )
+        print_test("Reject Reroutes", ok, f"{created['hospital_name']} -> {data['hospital_name']}, status {status.get('status')}")
+        return ok
+    except Exception as e:
+        print_test("Reject Reroutes", False, str(e))
+        return False
+
+def test_reject_unknown_request():
+    """Test 9: Rejecting a request that does not exist answers 404"""
+    try:
+        response = requests.post(f"{API_URL}/hospital/reject-request", json={"request_id": 999999999})
+        ok = response.status_code == 404
+        print_test("Reject Unknown Request", ok, f"Status: {response.status_code}")
+        return ok
+    except Exception as e:
+        print_test("Reject Unknown Request", False, str(e))
+        return False
+
+def test_accept_cancelled_request():
+    """Test 10: Accepting a cancelled request answers 409"""
+    try:
+        created = create_request()
+        if not created:
+            print_test("Accept Cancelled Request", False, "Could not create a request")
+            return False
+        requests.post(f"{API_URL}/ambulance/cancel-request", json={"request_id": created["request_id"]})
+        response = requests.post(f"{API_URL}/hospital/accept-request", json={"request_id": created["request_id"]})
+        ok = response.status_code == 409
+        print_test("Accept Cancelled Request", ok, f"Status: {response.status_code}")
+        return ok
+    except Exception as e:
+        print_test("Accept Cancelled Request", False, str(e))
+        return False
+
+def test_cancel_releases_capacity():
+    """Test 11: Cancelling an accepted request gives its bed back"""
+    try:
+        created = create_request()
+        if not created:
+            print_test("Cancel Releases Capacity", False, "Could not create a request")
+            return False
+        request_id, hospital_id = created["request_id"], created["hospital_id"]
+        accept = requests.post(f"{API_URL}/hospital/accept-request", json={"request_id": request_id})
+        if accept.status_code != 200:
+            print_test("Cancel Releases Capacity", False, f"Accept status: {accept.status_code}")
+            return False
+        beds = hospital_beds(hospital_id)
+        cancel = requests.post(f"{API_URL}/ambulance/cancel-request", json={"request_id": request_id})
+        beds_after = hospital_beds(hospital_id)
+        ok = cancel.status_code == 200 and beds is not None and beds_after == beds + 1
+        print_test("Cancel Releases Capacity", ok, f"Beds {beds} -> {beds_after}")
+        return ok
+    except Exception as e:
+        print_test("Cancel Releases Capacity", False, str(e))
+        return False
+
+def test_pending_pagination():
+    """Test 12: Paging pending requests with next_cursor visits each once"""
+    try:
+        created_ids = set()
+        for _ in range(3):
+            created = create_request()
+            if created:
+                created_ids.add(created["request_id"])
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            response = requests.get(f"{API_URL}/hospital/pending-requests", params=params)
+            if response.status_code != 200:
+                print_test("Pending Pagination", False, f"Status: {response.status_code}")
+                return False
+            data = response.json()
+            seen.extend(req["id"] for req in data["requests"])
+            cursor = data.get("next_cursor")
+            if not cursor:
+                break
+        bad_cursor = requests.get(f"{API_URL}/hospital/pending-requests", params={"cursor": "not-a-cursor"})
+        ok = (
+            len(created_ids) == 3
+            and len(seen) == len(set(seen))
+            and created_ids <= set(seen)
+            and bad_cursor.status_code == 400
+        )
+        print_test("Pending Pagination", ok, f"{len(seen)} requests over pages of 2, invalid cursor -> {bad_cursor.status_code}")
+        return ok
+    except Exception as e:
+        print_test("Pending Pagination", False, str(e))
+        return False
+
+def test_hospitals_etag():
+    """Test 13: Hospital list answers 304 to a matching If-None-Match"""
+    try:
+        plain = {"Accept-Encoding": "identity"}
+        first = requests.get(f"{API_URL}/hospitals/", headers=plain)
+        etag = first.headers.get("ETag")
+        if first.status_code != 200 or not etag:
+            print_test("Hospitals ETag", False, f"Status: {first.status_code}, ETag: {etag}")
+            return False
+        cached = requests.get(f"{API_URL}/hospitals/", headers=dict(plain, **{"If-None-Match": etag}))
+        # A gzip body is a different representation with its own tag and must
+        # not match (small lists are sent uncompressed under the identity tag)
+        gzipped = requests.get(f"{API_URL}/hospitals/", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+        gzip_ok = gzipped.status_code == (304 if gzipped.headers.get("ETag") == etag else 200)
+        ok = cached.status_code == 304 and gzip_ok
+        print_test("Hospitals ETag", ok, f"Identity: {cached.status_code}, gzip: {gzipped.status_code}")
+        return ok
+    except Exception as e:
+        print_test("Hospitals ETag", False, str(e))
+        return False
+
+def test_dispatch_batch():
+    """Test 14: Batch dispatch places each patient once, in input order"""
+    try:
+        patient = {
+            "patient_type": "Normal",
+            "emergency_type": "Accident",
+            "needs": {"bed": True, "icu": False, "oxygen": False, "ventilator": False}
+        }
+        serious = dict(patient, patient_type="Serious")
+        response = requests.post(f"{API_URL}/ambulance/dispatch-batch", json={"patients": [patient, serious, patient]})
+        if response.status_code != 200:
+            print_test("Dispatch Batch", False, f"Status: {response.status_code}")
+            return False
+        data = response.json()
+        assignments = data["assignments"]
+        placed = [a for a in assignments if a["request_id"] is not None]
+        ids_unique = len({a["request_id"] for a in placed}) == len(placed)
+        # Every returned id must point at the request of that patient
+        ids_match = all(
+            requests.post(f"{API_URL}/ambulance/check-status", json={"request_id": a["request_id"]}).json().get("patient_type")
+            == (serious if a["index"] == 1 else patient)["patient_type"]
+            for a in placed
+        )
+        ok = (
+            [a["index"] for a in assignments] == [0, 1, 2]
+            and data["dispatched"] + data["unplaced"] == 3
+            and ids_unique and ids_match
+        )
+        print_test("Dispatch Batch", ok, f"Dispatched {data['dispatched']}, unplaced {data['unplaced']}")
+        return ok
+    except Exception as e:
+        print_test("Dispatch Batch", False, str(e))
+        return False
+
 def run_all_tests():
     """Run all tests"""
     print(f"\n{BLUE}{'='*70}{END}")
@@ -183,6 +371,15 @@ def run_all_tests():
     # Test 7: Get statistics
     test_get_stats()
     
+    # Tests 8-14: Rejection, cancellation, paging, caching and batches
+    test_reject_reroutes()
+    test_reject_unknown_request()
+    test_accept_cancelled_request()
+    test_cancel_releases_capacity()
+    test_pending_pagination()
+    test_hospitals_etag()
+    test_dispatch_batch()
+    
     # Print summary
     print(f"\n{BLUE}{'='*70}{END}")
     print(f"{BLUE}Test Summary{END}")
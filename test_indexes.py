@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Emergency Routing System - Hospital Search Index Check
+Compares every nearest-hospital index with a brute-force scalar scan
+over seeded random hospitals. No server or database is needed.
+
+Run from the project root:  python test_indexes.py [seed]
+"""
+
+import random
+import sys
+
+import numpy as np
+
+from config import Config
+from models.backends import MemoryBackend
+from models.catalog import HospitalCatalog
+from models.coverage import CoverageGrid
+from models.database import Database
+from models.haversine import (
+    bounding_box, coordinate_arrays, haversine_distances, nearest_index, top_k
+)
+from models.spatial_index import HospitalIndex, hospital_matches
+
+HOSPITALS = 2000
+QUERIES = 300
+UPDATES = 300
+K = 5
+# Service region the hospitals are spread over (south, west, north, east)
+BOUNDS = (10.8, 76.8, 11.2, 77.2)
+RADIUS_KM = 15
+TEST_RESULTS = []
+
+# Color codes for output
+GREEN = '\033[92m'
+RED = '\033[91m'
+YELLOW = '\033[93m'
+BLUE = '\033[94m'
+END = '\033[0m'
+
+# Every combination of needs a patient can have (a bed is always required)
+NEEDS = [
+    {'icu': icu, 'oxygen': oxygen, 'ventilator': ventilator}
+    for icu in (False, True) for oxygen in (False, True) for ventilator in (False, True)
+]
+
+def print_test(name, status, message=""):
+    """Print test result"""
+    symbol = "[OK]" if status else "[X]"
+    TEST_RESULTS.append((name, status, message))
+    print(f"{symbol} {name}")
+    if message:
+        print(f"  |-- {message}")
+
+def random_hospitals(rng):
+    """Hospital rows scattered over BOUNDS; about a third lack each resource"""
+    south, west, north, east = BOUNDS
+    return [
+        {
+            'id': i + 1,
+            'name': f"Hospital {i + 1}",
+            'latitude': rng.uniform(south, north),
+            'longitude': rng.uniform(west, east),
+            'available_beds': rng.choice((0, 1, 5, 20)),
+            'available_icu': rng.choice((0, 0, 1, 3)),
+            'available_oxygen': rng.choice((0, 1, 4, 10)),
+            'available_ventilator': rng.choice((0, 0, 0, 2)),
+        }
+        for i in range(HOSPITALS)
+    ]
+
+def random_queries(rng):
+    """(latitude, longitude, needs) queries, a few of them outside the region"""
+    south, west, north, east = BOUNDS
+    margin = 0.1
+    return [
+        (rng.uniform(south - margin, north + margin), rng.uniform(west - margin, east + margin), rng.choice(NEEDS))
+        for _ in range(QUERIES)
+    ]
+
+def brute_force(db, hospitals, latitude, longitude, needs, k):
+    """Reference answer: scalar haversine over every row, ties by row order"""
+    ranked = sorted(
+        (db.calculate_distance(latitude, longitude, h['latitude'], h['longitude']), i)
+        for i, h in enumerate(hospitals)
+        if hospital_matches(h, needs)
+    )
+    return [hospitals[i]['id'] for _, i in ranked[:k]]
+
+def check_vectorized(db, hospitals, queries):
+    """haversine_distances + top_k / nearest_index against the scalar scan"""
+    lat_rad, lon_rad = coordinate_arrays(hospitals)
+    mismatches = 0
+    for latitude, longitude, needs in queries:
+        rows = np.array([i for i, h in enumerate(hospitals) if hospital_matches(h, needs)], dtype=np.intp)
+        distances = haversine_distances(latitude, longitude, lat_rad[rows], lon_rad[rows])
+        expected = brute_force(db, hospitals, latitude, longitude, needs, K)
+        found = [hospitals[i]['id'] for i in rows[top_k(distances, K)]]
+        nearest = nearest_index(distances)
+        if found != expected or (nearest is not None and hospitals[rows[nearest]]['id'] != expected[0]):
+            mismatches += 1
+    print_test("Vectorized haversine top-k", mismatches == 0, f"{mismatches}/{len(queries)} queries differ")
+    return mismatches == 0
+
+def check_kdtree(db, hospitals, queries):
+    """HospitalIndex.nearest_k against the scalar scan"""
+    index = HospitalIndex(hospitals, db.calculate_distance)
+    mismatches = 0
+    for latitude, longitude, needs in queries:
+        found = [h['id'] for h in index.nearest_k(latitude, longitude, needs, K)]
+        if found != brute_force(db, hospitals, latitude, longitude, needs, K):
+            mismatches += 1
+    print_test("KD-tree nearest_k", mismatches == 0, f"{mismatches}/{len(queries)} queries differ")
+    return mismatches == 0
+
+def check_coverage_grid(db, hospitals, queries):
+    """CoverageGrid.nearest_k against the scalar scan (None = falls back, skipped)"""
+    grid = CoverageGrid(HospitalIndex(hospitals, db.calculate_distance), BOUNDS, cell_deg=0.02, depth=K * 2)
+    mismatches = answered = 0
+    for latitude, longitude, needs in queries:
+        results = grid.nearest_k(latitude, longitude, needs, K)
+        if results is None:
+            continue
+        answered += 1
+        if [h['id'] for h in results] != brute_force(db, hospitals, latitude, longitude, needs, K):
+            mismatches += 1
+    print_test(
+        "Coverage grid nearest_k", mismatches == 0 and answered > 0,
+        f"{mismatches}/{answered} answered queries differ ({len(queries) - answered} fell back)"
+    )
+    return mismatches == 0 and answered > 0
+
+def check_coverage_updates(db, hospitals, queries, rng):
+    """Coverage grid after random capacity, hold and location changes"""
+    catalog = HospitalCatalog([dict(h) for h in hospitals], db.calculate_distance, coverage=(BOUNDS, 0.02, K * 2))
+    south, west, north, east = BOUNDS
+    for _ in range(UPDATES):
+        hospital = catalog.get(rng.randrange(1, HOSPITALS + 1))
+        change = rng.random()
+        if change < 0.4:
+            catalog.adjust_availability(hospital['id'], {'available_icu': 1 if rng.random() < 0.5 else -hospital['available_icu']})
+        elif change < 0.8:
+            catalog.set_held(hospital['id'], {'available_beds': hospital['available_beds']} if rng.random() < 0.5 else {})
+        else:
+            catalog.update_rows([dict(hospital, latitude=rng.uniform(south, north), longitude=rng.uniform(west, east))])
+    catalog.wait_for_coverage()
+
+    index = catalog.index
+    mismatches = answered = 0
+    for latitude, longitude, needs in queries:
+        results = catalog.coverage.nearest_k(latitude, longitude, needs, K)
+        if results is None:
+            continue
+        answered += 1
+        ranked = sorted(
+            (db.calculate_distance(latitude, longitude, h['latitude'], h['longitude']), i)
+            for i, h in enumerate(index.hospitals)
+            if hospital_matches(h, needs, index.held.get(h['id']))
+        )
+        if [h['id'] for h in results] != [index.hospitals[i]['id'] for _, i in ranked[:K]]:
+            mismatches += 1
+    print_test(
+        "Coverage grid after updates", mismatches == 0 and answered > 0,
+        f"{UPDATES} changes, {mismatches}/{answered} answered queries differ"
+    )
+    return mismatches == 0 and answered > 0
+
+def check_bounding_box(db, hospitals, queries):
+    """Every hospital within RADIUS_KM of a query lies inside its bounding box"""
+    misses = 0
+    for latitude, longitude, _ in queries:
+        lat_min, lat_max, lon_min, lon_max = bounding_box(latitude, longitude, RADIUS_KM)
+        for h in hospitals:
+            if db.calculate_distance(latitude, longitude, h['latitude'], h['longitude']) > RADIUS_KM:
+                continue
+            if not (lat_min <= h['latitude'] <= lat_max and lon_min <= h['longitude'] <= lon_max):
+                misses += 1
+    print_test("Bounding box prefilter", misses == 0, f"{misses} hospitals inside the radius were boxed out")
+    return misses == 0
+
+def run_all_tests(seed):
+    """Run every index check on one seeded catalog"""
+    print(f"\n{BLUE}{'='*70}{END}")
+    print(f"{BLUE}Hospital search index check (seed {seed}, {HOSPITALS} hospitals, {QUERIES} queries){END}")
+    print(f"{BLUE}{'='*70}{END}\n")
+
+    rng = random.Random(seed)
+    hospitals = random_hospitals(rng)
+    queries = random_queries(rng)
+    # calculate_distance is the scalar reference; nothing is connected
+    db = Database(Config, backend=MemoryBackend())
+
+    check_vectorized(db, hospitals, queries)
+    check_kdtree(db, hospitals, queries)
+    check_coverage_grid(db, hospitals, queries)
+    check_coverage_updates(db, hospitals, queries, rng)
+    check_bounding_box(db, hospitals, queries)
+
+    passed = sum(1 for _, status, _ in TEST_RESULTS if status)
+    total = len(TEST_RESULTS)
+    print(f"\nResults: {passed}/{total} checks passed")
+
+    if passed == total:
+        print(f"{GREEN}[OK] Every index matches the brute-force scan{END}\n")
+        return True
+    print(f"{RED}[X] Some indexes disagree with the brute-force scan{END}\n")
+    return False
+
+if __name__ == "__main__":
+    seed = int(sys.argv[1]) if len(sys.argv) > 1 else 42
+    sys.exit(0 if run_all_tests(seed) else 1)
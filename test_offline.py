@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Emergency Routing System - Offline Dispatch State Check
+Exercises the soft-hold ledger, the group commit retry path and the
+SQLite rewrites of Database's MySQL statements on the in-memory backend.
+No server or MySQL database is needed.
+
+Run from the project root:  python test_offline.py
+"""
+
+import contextlib
+import sys
+import time
+
+from config import Config
+from models.backends import Error, MemoryBackend, translate_query
+from models.database import Database
+from models.fleet import FleetPositions
+from models.group_commit import GroupCommitQueue
+from models.holds import HoldLedger
+
+TEST_RESULTS = []
+
+# Color codes for output
+GREEN = '\033[92m'
+RED = '\033[91m'
+YELLOW = '\033[93m'
+BLUE = '\033[94m'
+END = '\033[0m'
+
+
+class PersistConfig(Config):
+    """Config with holds mirrored to the capacity_holds table"""
+    HOLDS_PERSIST = True
+    HOLD_TTL_SECONDS = 60
+
+
+def print_test(name, status, message=""):
+    """Print test result"""
+    symbol = "[OK]" if status else "[X]"
+    TEST_RESULTS.append((name, status, message))
+    print(f"{symbol} {name}")
+    if message:
+        print(f"  |-- {message}")
+
+def open_database(config=Config, backend=None):
+    """A Database on a fresh (or the given) in-memory backend, catalog loaded"""
+    db = Database(config, backend=backend or MemoryBackend())
+    # connect() and load_catalog() report progress on stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        db.connect()
+        db.load_catalog()
+    return db
+
+def request_row(hospital_id, patient_type='Normal'):
+    """One write_emergency_requests item"""
+    return {'patient_type': patient_type, 'emergency_type': 'Accident', 'needs': {}, 'hospital_id': hospital_id}
+
+def stored_requests(db):
+    """(id, hospital_id) of every stored emergency request"""
+    with db.pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id, hospital_id FROM emergency_requests ORDER BY id")
+        rows = cursor.fetchall()
+        cursor.close()
+    return rows
+
+def check_hold_ledger():
+    """Holds are counted, attached, moved, released and expired on a fake clock"""
+    now = [0.0]
+    ledger = HoldLedger(10, clock=lambda: now[0])
+    first = ledger.place(1, ('available_beds', 'available_icu'))
+    second = ledger.place(1, ('available_beds',), request_id=7)
+    problems = []
+    if ledger.held(1) != {'available_beds': 2, 'available_icu': 1}:
+        problems.append(f"held after place: {ledger.held(1)}")
+
+    ledger.attach(first, 5)
+    if ledger.move_request(5, 2) != [1, 2] or ledger.held(2) != {'available_beds': 1, 'available_icu': 1}:
+        problems.append(f"move: {ledger.totals()}")
+    if ledger.move_request(5, 2) != [] or ledger.release_request(99) != []:
+        problems.append("no-op move or release reported changes")
+    if ledger.release(second) != [1] or 1 in ledger.totals():
+        problems.append(f"release: {ledger.totals()}")
+
+    now[0] = 4.0
+    if ledger.remaining(first) != 6.0:
+        problems.append(f"remaining: {ledger.remaining(first)}")
+    now[0] = 10.0
+    if ledger.expire() != [2] or len(ledger) != 0 or ledger.totals() or ledger.remaining(first) is not None:
+        problems.append(f"expire left {len(ledger)} holds")
+
+    print_test("Hold ledger", not problems, "; ".join(problems) or "place, attach, move, release and expire")
+    return not problems
+
+def check_group_commit_retry():
+    """A failing submission is retried alone and cannot fail its neighbours"""
+    db = open_database()
+    queue = GroupCommitQueue(db.write_emergency_requests, window=0.05)
+    # patient_type is NOT NULL, so this row fails the batch INSERT
+    futures = [queue.submit([request_row(1)]), queue.submit([request_row(2, None)]), queue.submit([request_row(3)])]
+    ids = [future.result() for future in futures]
+    queue.close()
+
+    rows = stored_requests(db)
+    ok = (
+        ids[1] is None and ids[0] and ids[2]
+        and sorted(rows) == sorted([(ids[0][0], 1), (ids[2][0], 3)])
+    )
+    print_test("Group commit isolates a failing row", ok, f"ids {ids}, {len(rows)} rows stored")
+    return ok
+
+def check_group_commit_after_commit_error():
+    """An error after the commit must not make the queue insert the batch again"""
+    db = open_database()
+    publish = db._publish_request
+    calls = []
+
+    def flaky_publish(conn, *args, **kwargs):
+        calls.append(args)
+        if len(calls) == 1:
+            raise Error(msg="connection lost after commit")
+        return publish(conn, *args, **kwargs)
+
+    db._publish_request = flaky_publish
+    queue = GroupCommitQueue(db.write_emergency_requests, window=0.05)
+    futures = [queue.submit([request_row(1)]), queue.submit([request_row(2)])]
+    ids = [future.result() for future in futures]
+    queue.close()
+
+    rows = stored_requests(db)
+    ok = (
+        queue.batches == 1 and len(rows) == 2
+        and all(ids) and sorted(rows) == sorted([(ids[0][0], 1), (ids[1][0], 2)])
+    )
+    print_test("Group commit after a post-commit error", ok, f"ids {ids}, {len(rows)} rows stored")
+    return ok
+
+def check_query_rewrites():
+    """translate_query turns MySQL-only syntax into its SQLite equivalent"""
+    cases = [
+        ("SELECT status FROM emergency_requests WHERE id = %s FOR UPDATE",
+         "SELECT status FROM emergency_requests WHERE id = ?"),
+        ("SELECT TIMESTAMPDIFF(SECOND, created_at, NOW())",
+         "SELECT CAST((julianday('now') - julianday(created_at)) * 86400 AS INTEGER)"),
+        ("SELECT UNIX_TIMESTAMP(recorded_at)",
+         "SELECT ((julianday(recorded_at) - 2440587.5) * 86400.0)"),
+        ("latitude = IF(VALUES(recorded_at) >= recorded_at, VALUES(latitude), latitude)",
+         "latitude = IIF(excluded.recorded_at >= recorded_at, excluded.latitude, latitude)"),
+        ("ON DUPLICATE KEY UPDATE recorded_at = GREATEST(recorded_at, VALUES(recorded_at))",
+         "ON CONFLICT DO UPDATE SET recorded_at = MAX(recorded_at, excluded.recorded_at)"),
+    ]
+    wrong = [query for query, expected in cases if translate_query(query) != expected]
+    print_test("SQLite query rewrites", not wrong, f"{len(cases) - len(wrong)}/{len(cases)} rewrites as expected")
+    return not wrong
+
+def check_persisted_holds():
+    """NOW(6) + INTERVAL and TIMESTAMPDIFF(MICROSECOND) round-trip a hold's expiry"""
+    backend = MemoryBackend()
+    db = open_database(PersistConfig, backend)
+    candidates, hold_id = db.find_and_hold(
+        Config.DEFAULT_AMBULANCE_LATITUDE, Config.DEFAULT_AMBULANCE_LONGITUDE, {'icu': True}, 3
+    )
+    request_id = db.create_emergency_request('Serious', 'Accident', {'icu': True}, candidates[0]['id'], candidates, hold_id)
+
+    restarted = open_database(PersistConfig, backend)
+    # A fresh ledger on a frozen clock, so its first hold's remaining() is the stored TTL
+    restarted.holds = HoldLedger(PersistConfig.HOLD_TTL_SECONDS, clock=lambda: 0.0)
+    restored = restarted.load_holds()
+    remaining = restarted.holds.remaining(1)
+    held = restarted.holds.held(candidates[0]['id'])
+    ok = (
+        request_id and restored == 1 and held.get('available_icu') == 1
+        and remaining is not None and abs(remaining - PersistConfig.HOLD_TTL_SECONDS) < 5
+    )
+    print_test("Persisted hold expiry on SQLite", ok, f"{restored} restored, {remaining} s left")
+    return ok
+
+def check_position_upsert():
+    """FROM_UNIXTIME, the IF/GREATEST upsert guard and UNIX_TIMESTAMP on SQLite"""
+    backend = MemoryBackend()
+    recorded_at = time.time() - 30
+    # Two workers share the table; the one saving last has the older report
+    for latitude, longitude, at in ((11.0, 77.0, recorded_at), (12.0, 78.0, recorded_at - 60)):
+        worker = open_database(backend=backend)
+        worker.fleet = FleetPositions()
+        worker.fleet.update('amb-1', latitude, longitude, at)
+        worker.save_ambulance_positions()
+
+    restarted = open_database(backend=backend)
+    restarted.fleet = FleetPositions()
+    restarted.load_ambulance_positions()
+    latest = restarted.fleet.latest('amb-1')
+    ok = (
+        latest is not None
+        and (latest['latitude'], latest['longitude']) == (11.0, 77.0)
+        and abs(latest['recorded_at'] - recorded_at) < 0.01
+    )
+    print_test("Ambulance position upsert on SQLite", ok, f"Loaded {latest}")
+    return ok
+
+def run_all_tests():
+    """Run every offline check"""
+    print(f"\n{BLUE}{'='*70}{END}")
+    print(f"{BLUE}Offline dispatch state check (in-memory SQLite){END}")
+    print(f"{BLUE}{'='*70}{END}\n")
+
+    check_hold_ledger()
+    check_group_commit_retry()
+    check_group_commit_after_commit_error()
+    check_query_rewrites()
+    check_persisted_holds()
+    check_position_upsert()
+
+    passed = sum(1 for _, status, _ in TEST_RESULTS if status)
+    total = len(TEST_RESULTS)
+    print(f"\nResults: {passed}/{total} checks passed")
+
+    if passed == total:
+        print(f"{GREEN}[OK] All offline checks passed{END}\n")
+        return True
+    print(f"{RED}[X] Some offline checks failed{END}\n")
+    return False
+
+if __name__ == "__main__":
+    sys.exit(0 if run_all_tests() else 1)